@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark PNG rendering of many-layer keymaps.
+
+Compares the per-key artist path of LayerVisualizer (``batched=False``)
+with the collection-based path (``batched=True``) and, optionally, with
+parallel per-layer rendering composited into the sheet, and reports the
+native SVG renderer for reference.
+
+Usage:
+    python benchmarks/render_benchmark.py [input.vil] [--layers N] [--repeat N] [--workers 1 2 4 8]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core import VialLoader, LayerVisualizer, SvgVisualizer, LAYOUT_SECTIONS  # noqa: E402
+
+
+def render_time(layers, max_rows, max_cols, batched, output_file, repeat, workers=None):
+    """Best wall-clock time of ``repeat`` renders (``workers``: parallel compositing)."""
+    best = float('inf')
+    for _ in range(repeat):
+        visualizer = LayerVisualizer(layers, max_rows, max_cols, batched=batched)
+        start = time.perf_counter()
+        visualizer.create_visualization(output_file, show_progress=False,
+                                        parallel=workers is not None, workers=workers)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batched vs per-key layer rendering')
+    parser.add_argument('input_file', nargs='?', default='test.vil',
+                        help='.vil file providing the layers (default: test.vil)')
+    parser.add_argument('--layers', type=int, default=16,
+                        help='Number of layers to render; the file layers are repeated (default: 16)')
+    parser.add_argument('--workers', type=int, nargs='*', default=[],
+                        help='Also time parallel per-layer rendering with these worker counts')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Renders per mode, the best time is reported (default: 3)')
+    args = parser.parse_args()
+
+    source = VialLoader.extract_layers(VialLoader.load_file(args.input_file, LAYOUT_SECTIONS))
+    layers = [source[idx % len(source)] for idx in range(args.layers)]
+    max_rows, max_cols = VialLoader.get_key_dimensions(layers)
+    keys = sum(len(row) for layer in layers for row in layer)
+    print(f"{len(layers)} layers, {keys} positions ({max_rows}x{max_cols} matrix)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, 'layers.png')
+        legacy = render_time(layers, max_rows, max_cols, False, output_file, args.repeat)
+        print(f"  per-key artists: {legacy:.3f}s")
+        batched = render_time(layers, max_rows, max_cols, True, output_file, args.repeat)
+        print(f"  collections:     {batched:.3f}s ({legacy / batched:.1f}x faster)")
+        for workers in args.workers:
+            parallel = render_time(layers, max_rows, max_cols, True, output_file, args.repeat, workers)
+            print(f"  {workers:>2} worker(s):    {parallel:.3f}s ({legacy / parallel:.1f}x faster)")
+        
+        svg_file = os.path.join(tmp, 'layers.svg')
+        start = time.perf_counter()
+        SvgVisualizer(layers, max_rows, max_cols).create_visualization(svg_file)
+        svg = time.perf_counter() - start
+        print(f"  native SVG:      {svg:.3f}s ({os.path.getsize(svg_file) // 1024} KiB, "
+              f"PNG {os.path.getsize(output_file) // 1024} KiB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark CLI startup and guard against heavy imports.
+
+Times fresh interpreter runs of common CLI invocations and checks that
+importing the CLI (and everything a summary-only run needs) does not load
+modules that are only required to rasterize images.
+
+Usage:
+    python benchmarks/startup_benchmark.py [input.vil] [--repeat N] [--importtime N]
+
+Exits with status 1 if a heavy module is imported at startup.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules only a PNG render (or, for numpy, building a KeymapMatrix) may import
+HEAVY_MODULES = ('matplotlib', 'PIL', 'tqdm', 'numpy')
+
+CHECK_IMPORTS = '''
+import sys
+import cli
+import src.core, src.web.app
+print(" ".join(m for m in {heavy!r} if m in sys.modules))
+'''
+
+
+def run_time(args, repeat):
+    """Median wall-clock time of ``repeat`` fresh interpreter runs."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def import_profile(top):
+    """Slowest imports of ``cli`` by cumulative time (``python -X importtime``)."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import cli'],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CLI startup time')
+    parser.add_argument('input_file', nargs='?', default='test.vil',
+                        help='.vil file for the summary run (default: test.vil)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Runs per command, the median is reported (default: 5)')
+    parser.add_argument('--importtime', type=int, metavar='N', default=0,
+                        help='Also list the N slowest imports of cli')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        commands = [
+            ('interpreter only', ['-c', 'pass']),
+            ('import cli', ['-c', 'import cli']),
+            ('cli.py --help', ['cli.py', '--help']),
+            ('cli.py --summary-only', ['cli.py', args.input_file, '--summary-only']),
+            # The svg renderer replaces the extension, so the output must be a real path
+            ('cli.py --renderer svg', ['cli.py', args.input_file, os.path.join(output_dir, 'sheet.svg'),
+                                       '--renderer', 'svg', '--no-summary']),
+        ]
+        for label, command in commands:
+            print(f"  {label:<24} {run_time(command, args.repeat) * 1000:7.1f} ms")
+
+    for cumulative, module in import_profile(args.importtime):
+        print(f"  {cumulative / 1000:8.1f} ms {module}")
+
+    result = subprocess.run([sys.executable, '-c', CHECK_IMPORTS.format(heavy=HEAVY_MODULES)],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    loaded = result.stdout.split()
+    if loaded:
+        print(f"Heavy modules imported at startup: {', '.join(loaded)}")
+        return 1
+    print("No heavy modules imported at startup")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,16 +4,171 @@ Command-line interface for keyboard visualization.
 """
 
 import argparse
+import itertools
+import json
+import os
 import sys
-from src.core import VialLoader, KeycodeTransformer, LayerVisualizer
-from src.utils import setup_logger
+from src.core import (VialLoader, KeycodeTransformer, SvgVisualizer, InteractiveVisualizer,
+                      RuleSet, DiffReference, RenderCache, LAYOUT_SECTIONS,
+                      print_layer_summary)
+from src.core.layer_graph import analyze_layers
+from src.core.loader import expand_paths
+from src.utils import setup_logger, ColorScheme, set_color_scheme
+from src.utils.compression import write_precompressed
 
 # Setup logger
 logger = setup_logger('keyboard_visualizer')
 
 
-def main():
+def graph_main(argv):
+    """Layer reachability analysis over one or many .vil files."""
+    parser = argparse.ArgumentParser(
+        prog='cli.py graph',
+        description='Report unreachable layers, dead layers, cycles and activation paths',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  # Analyze one backup
+  python cli.py graph input.vil
+
+  # Analyze a whole collection (directory or glob) with 8 workers
+  python cli.py graph backups/ --workers 8 --json > graph.jsonl
+        '''
+    )
+    parser.add_argument('paths', nargs='+',
+                        help='.vil files, directories or glob patterns')
+    parser.add_argument('--workers', type=int,
+                        help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--json', action='store_true',
+                        help='Print one JSON object per file')
+    parser.add_argument('--debug', action='store_true',
+                        help='Enable debug logging')
+    args = parser.parse_args(argv)
+    
+    if args.debug:
+        logger.setLevel('DEBUG')
+    
+    files = failed = with_dead = 0
+    # One pool for every argument: expand them all into a single path stream
+    paths = itertools.chain.from_iterable(expand_paths(pattern) for pattern in args.paths)
+    for result in VialLoader.load_many(paths, workers=args.workers, analyze=analyze_layers):
+        files += 1
+        if not result.ok:
+            failed += 1
+            continue
+        graph = result.analysis
+        if graph['dead']:
+            with_dead += 1
+        if args.json:
+            print(json.dumps({'path': result.path, **graph}))
+            continue
+        
+        print(f"{result.path}: {graph['num_layers']} layers, {len(graph['edges'])} layer keys")
+        print(f"  Unreachable: {graph['unreachable'] or 'none'}")
+        print(f"  Dead: {graph['dead'] or 'none'}")
+        print(f"  Cycles: {graph['cycles'] or 'none'}")
+        for layer, path in graph['paths'].items():
+            print(f"  Layer {layer}: {' -> '.join(path)}")
+    
+    logger.info(f"Analyzed {files - failed} of {files} file(s); {with_dead} with dead layers")
+    return 1 if failed else 0
+
+
+def diff_main(argv):
+    """Compare one or many .vil files against a reference keymap."""
+    parser = argparse.ArgumentParser(
+        prog='cli.py diff',
+        description='Report changed, added, removed and moved keys against a reference .vil file',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  # Compare a backup with the reference and write a highlighted view
+  python cli.py diff reference.vil customer.vil --html output/diff.html
+
+  # Compare a whole collection against the reference
+  python cli.py diff reference.vil backups/ --workers 8 --json > diff.jsonl
+        '''
+    )
+    parser.add_argument('reference', help='Reference .vil file')
+    parser.add_argument('paths', nargs='+',
+                        help='.vil files, directories or glob patterns to compare')
+    parser.add_argument('--workers', type=int,
+                        help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--json', action='store_true',
+                        help='Print one JSON object per file')
+    parser.add_argument('--html', metavar='FILE',
+                        help='Write an interactive view highlighting the differences (single file only)')
+    parser.add_argument('--debug', action='store_true',
+                        help='Enable debug logging')
+    args = parser.parse_args(argv)
+    
+    if args.debug:
+        logger.setLevel('DEBUG')
+    
+    # Preprocess the reference once; workers reuse its digests
+    reference_layers = VialLoader.extract_layers(VialLoader.load_file(args.reference, LAYOUT_SECTIONS))
+    reference = DiffReference(reference_layers)
+    
+    if args.html and (len(args.paths) != 1 or not os.path.isfile(args.paths[0])):
+        parser.error('--html needs exactly one file to compare')
+    
+    files = failed = different = 0
+    # One pool for every argument; with --html the file's layers come back
+    # from the same run and are diffed here, so the view and the report share
+    # a single load and a single diff
+    paths = itertools.chain.from_iterable(expand_paths(pattern) for pattern in args.paths)
+    for result in VialLoader.load_many(paths, workers=args.workers, include_layers=bool(args.html),
+                                       analyze=None if args.html else reference.analyze):
+        files += 1
+        if not result.ok:
+            failed += 1
+            continue
+        if args.html:
+            keymap_diff = reference.diff(result.layers)
+            max_rows, max_cols = result.dimensions
+            InteractiveVisualizer(result.layers, max_rows, max_cols,
+                                  diff=keymap_diff).generate_html(args.html)
+            diff = keymap_diff.to_dict()
+        else:
+            diff = result.analysis
+        if not diff['identical']:
+            different += 1
+        if args.json:
+            print(json.dumps({'path': result.path, **diff}))
+            continue
+        
+        counts = diff['counts']
+        print(f"{result.path}: " + ("identical" if diff['identical'] else
+              f"{counts['changed']} changed, {counts['added']} added, "
+              f"{counts['removed']} removed, {counts['moved']} moved"))
+        for move in diff['layer_moves']:
+            print(f"  Layer {move['from']} moved to {move['to']}")
+        if diff['added_layers']:
+            print(f"  Added layers: {diff['added_layers']}")
+        if diff['removed_layers']:
+            print(f"  Removed layers: {diff['removed_layers']}")
+        for change in diff['changes']:
+            print(f"  Layer {change['layer']}, Row {change['row']}, Col {change['col']}: "
+                  f"{change['old'] or '-'} -> {change['new'] or '-'}")
+    
+    logger.info(f"Compared {files - failed} of {files} file(s); {different} differ from the reference")
+    return 1 if failed else 0
+
+
+# Subcommands are dispatched on the first argument; anything else is the
+# classic "input.vil output.png" visualization
+SUBCOMMANDS = {
+    'graph': graph_main,
+    'diff': diff_main,
+}
+
+
+def main(argv=None):
     """Main CLI entry point."""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](argv[1:])
+    
     parser = argparse.ArgumentParser(
         description='Visualize Vial keyboard layers from .vil backup files',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -25,30 +180,85 @@ Examples:
   # Rename KC_TRNS to KC_NO in layer 4
   python cli.py input.vil output.png --rename-layer 4 --rename-old KC_TRNS --rename-new KC_NO
   
+  # Apply a JSON file of transformation rules
+  python cli.py input.vil output.png --rules rules.json
+
+  # Show what transparent keys fall through to
+  python cli.py input.vil output.png --resolved
+  
+  # Vector output without matplotlib
+  python cli.py input.vil output.svg --renderer svg
+  
+  # Render layers in parallel processes and also write one PNG per layer
+  python cli.py input.vil output.png --parallel --layer-images output/layers
+  
+  # Thumbnail and print image from the same render
+  python cli.py input.vil output.png --outputs thumb:0.25:webp print:2:png
+  
+  # Show where KC_TRNS is placed
+  python cli.py input.vil output.png --find KC_TRNS
+  
+  # Text summary only (no image, matplotlib is never imported)
+  python cli.py input.vil --summary-only
+  
   # Without text summary
   python cli.py input.vil output.png --no-summary
   
   # Enable debug logging
   python cli.py input.vil output.png --debug
+  
+  # Layer reachability analysis (see: python cli.py graph --help)
+  python cli.py graph backups/
+  
+  # Compare backups with a reference keymap (see: python cli.py diff --help)
+  python cli.py diff reference.vil backups/
         '''
     )
     
     parser.add_argument('input_file', nargs='?', default='current copy.vil',
                         help='Input .vil file (default: current copy.vil)')
     parser.add_argument('output_file', nargs='?', default='output/keyboard_layers.png',
-                        help='Output PNG file (default: output/keyboard_layers.png)')
+                        help='Output image file (default: output/keyboard_layers.png, .svg with --renderer svg)')
     parser.add_argument('--rename-layer', type=int, metavar='N',
                         help='Layer index to apply keycode rename (e.g., 4)')
     parser.add_argument('--rename-old', metavar='KEYCODE',
                         help='Old keycode to replace (e.g., KC_TRNS)')
     parser.add_argument('--rename-new', metavar='KEYCODE',
                         help='New keycode to use (e.g., KC_NO)')
+    parser.add_argument('--rules', metavar='FILE',
+                        help='JSON file of transformation rules to apply')
+    parser.add_argument('--find', action='append', metavar='KEYCODE',
+                        help='Print the positions of a keycode (repeatable)')
+    parser.add_argument('--resolved', action='store_true',
+                        help='Show the effective key of transparent (KC_TRNS) positions')
+    parser.add_argument('--colors', metavar='FILE',
+                        help='JSON color scheme for key categories')
+    parser.add_argument('--renderer', choices=['matplotlib', 'svg'], default='matplotlib',
+                        help='Image renderer: matplotlib (PNG) or native SVG (default: matplotlib)')
+    parser.add_argument('--precompress', action='store_true',
+                        help='Also write .gz (and .br/.zst when available) copies of SVG output for static hosting')
+    parser.add_argument('--parallel', action='store_true',
+                        help='Render each layer in a process pool and composite the sheet '
+                             '(panels are packed tighter than in the default sheet)')
+    parser.add_argument('--workers', type=int,
+                        help='Number of render processes for --parallel/--layer-images (default: CPU count)')
+    parser.add_argument('--layer-images', metavar='DIR',
+                        help='Also write one PNG per layer to DIR')
+    parser.add_argument('--outputs', nargs='+', metavar='NAME:SCALE:FORMAT',
+                        help='Extra sizes/formats from the same render, e.g. thumb:0.25:webp print:2:png '
+                             '(written next to OUTPUT as OUTPUT_NAME.FORMAT)')
+    parser.add_argument('--render-cache', metavar='DIR',
+                        help='Reuse PNGs rendered earlier for the same keymap and options')
+    parser.add_argument('--json-backend', choices=['orjson', 'ujson', 'json'],
+                        help='JSON parser to use (default: fastest installed)')
     parser.add_argument('--no-summary', action='store_true',
                         help='Skip printing text summary')
+    parser.add_argument('--summary-only', action='store_true',
+                        help='Print the summary (and --find results) without rendering an image')
     parser.add_argument('--debug', action='store_true',
                         help='Enable debug logging')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Set debug level if requested
     if args.debug:
@@ -56,30 +266,74 @@ Examples:
         logger.debug("Debug logging enabled")
     
     try:
+        if args.colors:
+            set_color_scheme(ColorScheme.from_file(args.colors))
+        
         # Load the file
         loader = VialLoader()
-        vil_data = loader.load_file(args.input_file)
+        vil_data = loader.load_file(args.input_file, sections=LAYOUT_SECTIONS,
+                                    json_backend=args.json_backend)
         
-        # Extract layers
-        layers = loader.extract_layers(vil_data)
+        # Extract layers and index them in one pass
+        layers = loader.extract_layers(vil_data, compact=True)
+        index = loader.build_index(layers)
         
         # Apply keycode rename if specified
         if args.rename_layer is not None and args.rename_old and args.rename_new:
             transformer = KeycodeTransformer()
             layers = transformer.rename_keycode_in_all_layers(
-                layers, args.rename_layer, args.rename_old, args.rename_new
+                layers, args.rename_layer, args.rename_old, args.rename_new, index=index
+            )
+        
+        # Apply a batch of transformation rules if specified
+        if args.rules:
+            layers = KeycodeTransformer.apply_rules(
+                layers, RuleSet.from_file(args.rules), index=index
             )
         
+        # Report where the requested keycodes are placed
+        for keycode in args.find or []:
+            positions = index.positions(keycode)
+            print(f"{keycode}: {len(positions)} key(s)")
+            for layer_idx, row_idx, col_idx in positions:
+                print(f"  Layer {layer_idx}, Row {row_idx}, Col {col_idx}")
+        
         # Print summary if requested
         if not args.no_summary:
-            LayerVisualizer.print_layer_summary(layers)
+            print_layer_summary(layers)
+        if args.summary_only:
+            return 0
         
         # Get dimensions and create visualizer
-        max_rows, max_cols = loader.get_key_dimensions(layers)
-        visualizer = LayerVisualizer(layers, max_rows, max_cols)
+        max_rows, max_cols = loader.get_key_dimensions(index)
+        if args.renderer == 'svg':
+            output_file = os.path.splitext(args.output_file)[0] + '.svg'
+            SvgVisualizer(layers, max_rows, max_cols, resolved=args.resolved).create_visualization(
+                output_file)
+            if args.precompress:
+                write_precompressed(output_file)
+            logger.info("Visualization complete!")
+            return 0
+        
+        # Imported here: matplotlib is only loaded when a PNG is rendered
+        from src.core.visualizer import LayerVisualizer
+        cache = RenderCache(args.render_cache) if args.render_cache else None
+        visualizer = LayerVisualizer(layers, max_rows, max_cols, resolved=args.resolved,
+                                     cache=cache)
         
         # Create visualization
-        visualizer.create_visualization(args.output_file)
+        if args.outputs:
+            from src.core.visualizer import OutputSpec, IMAGE_FORMATS
+            main_format = os.path.splitext(args.output_file)[1].lstrip('.').lower()
+            outputs = [OutputSpec('', 1.0, main_format if main_format in IMAGE_FORMATS else 'png')]
+            outputs += [OutputSpec.parse(spec) for spec in args.outputs]
+            visualizer.create_outputs(args.output_file, outputs, workers=args.workers)
+            if args.layer_images:
+                visualizer.save_layer_images(args.layer_images, workers=args.workers)
+        else:
+            # With --parallel the layer images reuse the panels of the sheet
+            visualizer.create_visualization(args.output_file, parallel=args.parallel,
+                                            workers=args.workers, layer_images=args.layer_images)
         
         logger.info("Visualization complete!")
         return 0
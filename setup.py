@@ -30,7 +30,9 @@ setup(
     ],
     python_requires=">=3.7",
     install_requires=[
-        "matplotlib>=3.5.0",
+        "matplotlib>=3.6.0",
+        "numpy>=1.21.0",
+        "Pillow>=9.0.0",
         "tqdm>=4.65.0",
         "Flask>=2.3.0",
         "Werkzeug>=2.3.0",
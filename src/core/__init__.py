@@ -1,11 +1,49 @@
 """
 Core modules for keyboard layout processing.
+
+Modules that pull in heavy dependencies (matplotlib for ``LayerVisualizer``)
+are imported on first attribute access, so loading, analysis, SVG and HTML
+output never pay for them.
 """
 
-from .loader import VialLoader
+from importlib import import_module
+from .loader import VialLoader, LAYOUT_SECTIONS
+from .keymap import KeymapMatrix, NO_KEY
+from .layout_index import LayoutIndex
+from .parse_cache import ParseCache
+from .render_cache import RenderCache
+from .rules import RuleSet
 from .transformer import KeycodeTransformer
-from .visualizer import LayerVisualizer
+from .history import KeymapHistory
+from .resolver import KeymapResolver
+from .layer_graph import LayerGraph
+from .diff import DiffReference, KeymapDiff
+from .summary import print_layer_summary
+from .svg_visualizer import SvgVisualizer
 from .interactive_visualizer import InteractiveVisualizer
+from .viewer_assets import write_assets
+
+# Exported name -> submodule imported on first access
+_LAZY_EXPORTS = {
+    'LayerVisualizer': '.visualizer',
+}
+
+__all__ = [
+    'VialLoader', 'LAYOUT_SECTIONS', 'KeymapMatrix', 'NO_KEY', 'ParseCache', 'RenderCache', 'LayoutIndex',
+    'RuleSet', 'KeycodeTransformer', 'KeymapHistory', 'KeymapResolver', 'LayerGraph',
+    'DiffReference', 'KeymapDiff', 'print_layer_summary', 'LayerVisualizer', 'SvgVisualizer',
+    'InteractiveVisualizer', 'write_assets',
+]
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
 
-__all__ = ['VialLoader', 'KeycodeTransformer', 'LayerVisualizer', 'InteractiveVisualizer']
 
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,252 @@
+"""
+Keymap diff engine.
+"""
+
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from ..utils.keycode_parser import normalize_keycode
+from ..utils.logger import get_logger
+from .keymap import is_no_key, row_cells, row_digest, layer_digest
+from .resolver import TRANSPARENT_KEYCODES
+
+logger = get_logger(__name__)
+
+Cells = Tuple[str, ...]
+
+# Keys that are too common to be worth reporting as moved
+_UNTRACKED_MOVES = frozenset(TRANSPARENT_KEYCODES + ('KC_NO',))
+
+
+class KeyChange(NamedTuple):
+    """One position that differs from the reference (``old``/``new`` are None when empty)."""
+    layer: int
+    row: int
+    col: int
+    kind: str  # 'changed', 'added' or 'removed'
+    old: Optional[str]
+    new: Optional[str]
+
+
+class KeyMove(NamedTuple):
+    """A keycode that left one position of a layer and appeared at another."""
+    layer: int
+    keycode: str
+    from_pos: Tuple[int, int]
+    to_pos: Tuple[int, int]
+
+
+class KeymapDiff:
+    """Structured result of comparing a keymap against a reference."""
+
+    def __init__(self, reference_layers: int, num_layers: int):
+        self.reference_layers = reference_layers
+        self.num_layers = num_layers
+        self.changes: List[KeyChange] = []
+        self.moves: List[KeyMove] = []
+        # (reference layer, layer) pairs for layers found at another index
+        self.layer_moves: List[Tuple[int, int]] = []
+        self.added_layers: List[int] = []
+        self.removed_layers: List[int] = []
+        self.identical_layers = 0
+
+    @property
+    def identical(self) -> bool:
+        return not (self.changes or self.layer_moves or self.added_layers or self.removed_layers)
+
+    def counts(self) -> Dict[str, int]:
+        """Number of changed, added, removed and moved keys."""
+        counts = Counter(change.kind for change in self.changes)
+        return {
+            'changed': counts['changed'],
+            'added': counts['added'],
+            'removed': counts['removed'],
+            'moved': len(self.moves),
+        }
+
+    def layer_changes(self, layer: int) -> Dict[Tuple[int, int], KeyChange]:
+        """Changes of one layer keyed by (row, col)."""
+        return {(c.row, c.col): c for c in self.changes if c.layer == layer}
+
+    def layer_move_targets(self, layer: int) -> List[Tuple[int, int]]:
+        """(row, col) positions of one layer that received a moved key."""
+        return [move.to_pos for move in self.moves if move.layer == layer]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialize the diff.
+
+        Returns:
+            JSON-serializable dictionary
+        """
+        return {
+            'identical': self.identical,
+            'reference_layers': self.reference_layers,
+            'num_layers': self.num_layers,
+            'counts': self.counts(),
+            'changes': [change._asdict() for change in self.changes],
+            'moves': [move._asdict() for move in self.moves],
+            'layer_moves': [{'from': old, 'to': new} for old, new in self.layer_moves],
+            'added_layers': self.added_layers,
+            'removed_layers': self.removed_layers,
+        }
+
+
+def _cells(row: Any) -> Cells:
+    """
+    Get the cells of a row with every keycode in its canonical spelling.
+
+    Spacing and alias variants (``LT(2, KC_SPC)``, ``LT2(KC_SPC)``) compare
+    and digest as equal, and changes report the canonical spelling.
+    """
+    cells = []
+    for cell in row_cells(row):
+        keycode = normalize_keycode(cell) if cell else ''
+        cells.append('' if is_no_key(keycode) else keycode)
+    while cells and not cells[-1]:
+        cells.pop()
+    return tuple(cells)
+
+
+def _prepare(layers: Any) -> Tuple[List[List[Cells]], List[List[bytes]], List[bytes]]:
+    """Get the cells, row digests and layer digests of a keymap."""
+    cells = [[_cells(row) for row in layer] for layer in layers]
+    row_digests = [[row_digest(row) for row in layer] for layer in cells]
+    return cells, row_digests, [layer_digest(digests) for digests in row_digests]
+
+
+def _diff_rows(layer: int, old_rows: Sequence[Cells], old_digests: Sequence[bytes],
+               new_rows: Sequence[Cells], new_digests: Sequence[bytes],
+               result: KeymapDiff) -> None:
+    """Compare two layers row by row, skipping rows with equal digests."""
+    changes = []
+    for row_idx in range(max(len(old_rows), len(new_rows))):
+        if (row_idx < len(old_rows) and row_idx < len(new_rows)
+                and old_digests[row_idx] == new_digests[row_idx]):
+            continue
+        old_row = old_rows[row_idx] if row_idx < len(old_rows) else ()
+        new_row = new_rows[row_idx] if row_idx < len(new_rows) else ()
+        for col_idx in range(max(len(old_row), len(new_row))):
+            old = old_row[col_idx] if col_idx < len(old_row) else ''
+            new = new_row[col_idx] if col_idx < len(new_row) else ''
+            if old == new:
+                continue
+            kind = 'added' if not old else 'removed' if not new else 'changed'
+            changes.append(KeyChange(layer, row_idx, col_idx, kind, old or None, new or None))
+
+    # Pair up keycodes that left one position and appeared at another
+    lost: Dict[str, List[Tuple[int, int]]] = {}
+    for change in changes:
+        if change.old and change.old not in _UNTRACKED_MOVES:
+            lost.setdefault(change.old, []).append((change.row, change.col))
+    for change in changes:
+        sources = lost.get(change.new)
+        if sources:
+            result.moves.append(KeyMove(layer, change.new, sources.pop(0), (change.row, change.col)))
+
+    result.changes.extend(changes)
+
+
+def diff_layers(old_layer: Any, new_layer: Any, layer: int = 0) -> KeymapDiff:
+    """
+    Compare two single layers.
+
+    Args:
+        old_layer: Reference layer (list of rows, or a LayerView)
+        new_layer: Layer to compare
+        layer: Layer index to report in the changes
+
+    Returns:
+        KeymapDiff of the two layers
+    """
+    old_rows = [_cells(row) for row in old_layer]
+    new_rows = [_cells(row) for row in new_layer]
+    result = KeymapDiff(1, 1)
+    _diff_rows(layer, old_rows, [row_digest(row) for row in old_rows],
+               new_rows, [row_digest(row) for row in new_rows], result)
+    return result
+
+
+class DiffReference:
+    """
+    Reference keymap preprocessed for repeated comparisons.
+
+    Row and layer digests of the reference are computed once; each
+    comparison only hashes the other keymap, skips layers and rows whose
+    digests match, and recognizes layers that moved to another index by
+    their digest.
+    """
+
+    def __init__(self, layers: Any):
+        """
+        Preprocess the reference.
+
+        Args:
+            layers: Reference layers (lists of rows), or a KeymapMatrix
+        """
+        self.cells, self.row_digests, self.layer_digests = _prepare(layers)
+        self._layers_by_digest: Dict[bytes, List[int]] = {}
+        for layer_idx, digest in enumerate(self.layer_digests):
+            self._layers_by_digest.setdefault(digest, []).append(layer_idx)
+        logger.debug(f"Prepared diff reference with {len(self.cells)} layers")
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def diff(self, layers: Any) -> KeymapDiff:
+        """
+        Compare a keymap against the reference.
+
+        Args:
+            layers: Layers to compare (lists of rows), or a KeymapMatrix
+
+        Returns:
+            KeymapDiff describing what changed relative to the reference
+        """
+        cells, row_digests, layer_digests = _prepare(layers)
+        result = KeymapDiff(len(self.cells), len(cells))
+        common = min(len(cells), len(self.cells))
+
+        pending = []
+        moved_from = set()
+        for layer_idx in range(common):
+            if layer_digests[layer_idx] == self.layer_digests[layer_idx]:
+                result.identical_layers += 1
+            else:
+                pending.append(layer_idx)
+        pending.extend(range(common, len(cells)))
+
+        for layer_idx in pending:
+            # A layer identical to a reference layer at another index was moved
+            candidates = [ref_idx for ref_idx in self._layers_by_digest.get(layer_digests[layer_idx], ())
+                          if ref_idx not in moved_from
+                          and not (ref_idx < len(cells) and layer_digests[ref_idx] == self.layer_digests[ref_idx])]
+            if candidates:
+                moved_from.add(candidates[0])
+                result.layer_moves.append((candidates[0], layer_idx))
+            elif layer_idx < len(self.cells):
+                _diff_rows(layer_idx, self.cells[layer_idx], self.row_digests[layer_idx],
+                           cells[layer_idx], row_digests[layer_idx], result)
+            else:
+                result.added_layers.append(layer_idx)
+
+        result.removed_layers = [layer_idx for layer_idx in range(len(cells), len(self.cells))
+                                 if layer_idx not in moved_from]
+        return result
+
+    def analyze(self, layers: Any) -> Dict[str, Any]:
+        """Diff a keymap and serialize the result (usable as ``VialLoader.load_many(analyze=...)``)."""
+        return self.diff(layers).to_dict()
+
+
+def diff_keymaps(reference: Any, layers: Any) -> KeymapDiff:
+    """
+    Compare two keymaps.
+
+    Args:
+        reference: Reference layers (lists of rows), or a KeymapMatrix
+        layers: Layers to compare
+
+    Returns:
+        KeymapDiff describing what changed relative to the reference
+    """
+    return DiffReference(reference).diff(layers)
@@ -0,0 +1,262 @@
+"""
+Versioned keymap history with undo/redo.
+"""
+
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from ..utils.logger import get_logger
+from .keymap import KeymapMatrix
+from .rules import RuleSet
+
+logger = get_logger(__name__)
+
+Change = Tuple[int, int, int, Any, Any]
+Snapshot = Tuple[Tuple[Tuple[Any, ...], ...], ...]
+
+
+def _snapshot(layers: Any) -> Snapshot:
+    """Convert layers (lists, tuples or a KeymapMatrix) into nested tuples."""
+    if isinstance(layers, KeymapMatrix):
+        layers = layers.to_layers()
+    return tuple(tuple(tuple(row) for row in layer) for layer in layers)
+
+
+class Version:
+    """One entry of the history: a snapshot plus the delta that produced it."""
+
+    __slots__ = ('layers', 'changes', 'label')
+
+    def __init__(self, layers: Snapshot, changes: Tuple[Change, ...], label: str):
+        self.layers = layers
+        self.changes = changes
+        self.label = label
+
+
+class KeymapHistory:
+    """
+    Persistent history of keymap transformations.
+
+    Every version is an immutable snapshot (nested tuples) that shares all
+    unchanged layers and rows with its predecessor, and records the delta of
+    (layer, row, col, old, new) changes that produced it. Undo, redo and
+    jumping to a version only move a pointer, and memory grows with the
+    number of edited rows rather than with the keymap size.
+    """
+
+    def __init__(self, layers: Any, label: str = 'initial'):
+        """
+        Start a history from an initial keymap.
+
+        Args:
+            layers: List of all layers, or a KeymapMatrix
+            label: Description of the initial version
+        """
+        self._versions: List[Version] = [Version(_snapshot(layers), (), label)]
+        self._current = 0
+        logger.debug(f"Started keymap history with {len(self._versions[0].layers)} layers")
+
+    @property
+    def current(self) -> Snapshot:
+        """Layers of the current version (nested tuples)."""
+        return self._versions[self._current].layers
+
+    @property
+    def version(self) -> int:
+        """Index of the current version."""
+        return self._current
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+    def labels(self) -> List[str]:
+        """Descriptions of all versions, oldest first."""
+        return [version.label for version in self._versions]
+
+    def changes(self, version: Optional[int] = None) -> Tuple[Change, ...]:
+        """Delta that produced a version (default: the current one)."""
+        return self._versions[self._current if version is None else version].changes
+
+    def can_undo(self) -> bool:
+        return self._current > 0
+
+    def can_redo(self) -> bool:
+        return self._current < len(self._versions) - 1
+
+    def undo(self) -> Snapshot:
+        """Step back one version and return its layers."""
+        if self.can_undo():
+            self._current -= 1
+        return self.current
+
+    def redo(self) -> Snapshot:
+        """Step forward one version and return its layers."""
+        if self.can_redo():
+            self._current += 1
+        return self.current
+
+    def goto(self, version: int) -> Snapshot:
+        """
+        Jump to any version.
+
+        Args:
+            version: Version index (negative values count from the newest)
+
+        Returns:
+            Layers of that version
+
+        Raises:
+            IndexError: If the version does not exist
+        """
+        if version < 0:
+            version += len(self._versions)
+        if not 0 <= version < len(self._versions):
+            raise IndexError(f"Version {version} out of range (0-{len(self._versions)-1})")
+        self._current = version
+        return self.current
+
+    def record(self, changes: Iterable[Change], label: str = '') -> Snapshot:
+        """
+        Commit a new version from a delta.
+
+        Only the rows named in the delta are rebuilt; every other row and
+        layer is shared with the current version. Versions after the
+        current one (the redo branch) are discarded.
+
+        Args:
+            changes: (layer, row, col, old, new) tuples, e.g. from ``RuleSet.apply``
+            label: Description of the edit
+
+        Returns:
+            Layers of the new version
+        """
+        changes = tuple(changes)
+        base = self.current
+        by_row: Dict[Tuple[int, int], List[Change]] = {}
+        for change in changes:
+            by_row.setdefault((change[0], change[1]), []).append(change)
+
+        layers = list(base)
+        rows_by_layer: Dict[int, List[Tuple[Any, ...]]] = {}
+        for (layer_idx, row_idx), row_changes in by_row.items():
+            rows = rows_by_layer.get(layer_idx)
+            if rows is None:
+                rows = rows_by_layer[layer_idx] = list(base[layer_idx])
+            row = list(rows[row_idx])
+            for _, _, col_idx, _, new in row_changes:
+                row[col_idx] = new
+            rows[row_idx] = tuple(row)
+        for layer_idx, rows in rows_by_layer.items():
+            layers[layer_idx] = tuple(rows)
+
+        del self._versions[self._current + 1:]
+        self._versions.append(Version(tuple(layers), changes, label))
+        self._current += 1
+        logger.debug(f"Recorded version {self._current} ({label}): {len(changes)} changes")
+        return self.current
+
+    def apply(self, transform: Callable[[Snapshot], Any], label: str = '') -> Snapshot:
+        """
+        Run a transformation on the current layers and commit the result.
+
+        The delta is computed by comparing the result with the current
+        version; layers and rows the transform returned unchanged (by
+        identity, as KeycodeTransformer and RuleSet do) are not compared.
+
+        Args:
+            transform: Function taking the current layers and returning new layers
+            label: Description of the edit
+
+        Returns:
+            Layers of the new version
+
+        Raises:
+            ValueError: If the transform added or removed layers, rows or
+                columns; deltas only record keycode changes at fixed positions
+        """
+        base = self.current
+        result = transform(base)
+        if isinstance(result, KeymapMatrix):
+            result = result.to_layers()
+
+        if len(result) != len(base):
+            raise ValueError(f"Transform changed the number of layers ({len(base)} -> {len(result)})")
+        changes = []
+        for layer_idx, (old_layer, new_layer) in enumerate(zip(base, result)):
+            if old_layer is new_layer:
+                continue
+            if len(new_layer) != len(old_layer):
+                raise ValueError(f"Transform changed the number of rows of layer {layer_idx} "
+                                 f"({len(old_layer)} -> {len(new_layer)})")
+            for row_idx, (old_row, new_row) in enumerate(zip(old_layer, new_layer)):
+                if old_row is new_row:
+                    continue
+                if len(new_row) != len(old_row):
+                    raise ValueError(f"Transform changed the length of layer {layer_idx}, row {row_idx} "
+                                     f"({len(old_row)} -> {len(new_row)})")
+                for col_idx, (old, new) in enumerate(zip(old_row, new_row)):
+                    if old != new:
+                        changes.append((layer_idx, row_idx, col_idx, old, new))
+
+        return self.record(changes, label)
+
+    def apply_rules(self, rules: RuleSet, layer_indices: Optional[Iterable[int]] = None,
+                    label: str = '') -> Snapshot:
+        """
+        Apply a rule set and commit its delta directly (no comparison pass).
+
+        Args:
+            rules: Compiled RuleSet
+            layer_indices: Optional layer indices to restrict the rules to
+            label: Description of the edit (default: number of rules)
+
+        Returns:
+            Layers of the new version
+        """
+        _, changes = rules.apply(self.current, layer_indices)
+        return self.record(changes, label or f"apply {len(rules)} rules")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialize the history compactly: the initial layers plus each delta.
+
+        Returns:
+            JSON-serializable dictionary
+        """
+        return {
+            'base': [[list(row) for row in layer] for layer in self._versions[0].layers],
+            'current': self._current,
+            'versions': [
+                {'label': version.label, 'changes': [list(change) for change in version.changes]}
+                for version in self._versions
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'KeymapHistory':
+        """
+        Rebuild a history serialized with ``to_dict`` by replaying its deltas.
+
+        Args:
+            data: Dictionary produced by ``to_dict``
+
+        Returns:
+            KeymapHistory positioned at the serialized current version
+        """
+        versions = data['versions']
+        history = cls(data['base'], versions[0]['label'] if versions else 'initial')
+        for version in versions[1:]:
+            history.record((tuple(change) for change in version['changes']), version['label'])
+        history.goto(data.get('current', len(history) - 1))
+        return history
+
+    def save(self, filepath: str) -> None:
+        """Write the serialized history to a JSON file."""
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+        logger.info(f"Saved {len(self)} versions to {filepath}")
+
+    @classmethod
+    def load(cls, filepath: str) -> 'KeymapHistory':
+        """Read a history written by ``save``."""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
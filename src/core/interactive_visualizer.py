@@ -2,342 +2,223 @@
 Interactive HTML keyboard visualization module.
 """
 
-from typing import List, Dict
-from ..utils.keycode_simplifier import simplify_keycode, get_key_color
+import json
+from html import escape
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple
+from ..utils.keycode_simplifier import ColorScheme, get_color_scheme
 from ..utils.logger import get_logger
+from .diff import KeymapDiff
+from .render_cache import RenderCache, display_digest
+from .resolver import KeymapResolver, iter_display_keys
+from .viewer_assets import ASSET_FILES, VIEWER_CSS, VIEWER_JS
 
 logger = get_logger(__name__)
 
+# Part of render cache keys; bump when the output for the same input changes
+RENDERER_VERSION = 2
+
+
+def _script_json(value: Any) -> str:
+    """Serialize a value as compact JSON that cannot close an enclosing <script> element."""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).replace('<', '\\u003c')
+
 
 class InteractiveVisualizer:
     """Generates interactive HTML visualizations of keyboard layers."""
     
-    def __init__(self, layers: List[List[List[str]]], max_rows: int, max_cols: int):
+    def __init__(self, layers: List[List[List[str]]], max_rows: int, max_cols: int,
+                 resolved: bool = False, diff: Optional[KeymapDiff] = None,
+                 color_scheme: Optional[ColorScheme] = None,
+                 cache: Optional[RenderCache] = None):
         """
         Initialize the interactive visualizer.
         
         Args:
-            layers: List of all layers to visualize
+            layers: List of all layers to visualize (or a KeymapMatrix)
             max_rows: Maximum number of rows
             max_cols: Maximum number of columns
+            resolved: Show the effective key of transparent positions
+            diff: Optional diff against a reference keymap to highlight
+            color_scheme: Key colors (default: the active scheme, see ``set_color_scheme``)
+            cache: Optional render cache consulted by ``generate_html``
         """
         self.layers = layers
         self.max_rows = max_rows
         self.max_cols = max_cols
+        self.resolver = KeymapResolver(layers) if resolved else None
+        self.colors = color_scheme or get_color_scheme()
+        self.diff = diff
+        self.cache = cache
         logger.info(f"Initializing interactive visualizer for {len(layers)} layers")
     
-    def _generate_layer_data(self) -> str:
+    def _iter_layer_data(self) -> Iterator[str]:
         """
-        Generate JavaScript data structure for all layers.
+        Generate the JSON payload of all layers, one layer at a time.
         
-        Returns:
-            JavaScript code defining the layers data
+        The payload is columnar: labels, original keycodes and color pairs
+        are stored once in shared tables, and each layer holds parallel
+        integer arrays (position ``row * maxCols + col`` and table indices),
+        plus sparse diff annotations. The page script decodes it with
+        ``decodeLayers``. Layers are emitted as they are built and the
+        tables last, so only the tables are kept in memory.
+        
+        With a render cache, each layer's keys are cached by the keys it
+        displays (and its diff), so only changed layers are rebuilt.
+        
+        Yields:
+            Pieces of JSON text, safe to embed in a <script> element
         """
-        js_layers = []
+        labels: Dict[str, int] = {}
+        originals: Dict[str, int] = {}
+        colors: Dict[Tuple[str, str], int] = {}
         
+        yield '{"layers":['
         for layer_idx, layer in enumerate(self.layers):
-            js_keys = []
-            for row_idx, row in enumerate(layer):
-                for col_idx, keycode in enumerate(row):
-                    if keycode == -1 or keycode == "-1":
-                        continue
-                    
-                    simplified = simplify_keycode(str(keycode))
-                    face_color, edge_color = get_key_color(simplified)
-                    
-                    js_keys.append({
-                        'row': row_idx,
-                        'col': col_idx,
-                        'keycode': simplified,
-                        'original': str(keycode),
-                        'faceColor': face_color,
-                        'edgeColor': edge_color
-                    })
-            
-            js_layers.append(js_keys)
-        
-        return str(js_layers).replace("'", '"')
+            layer_keys = self._cached_layer_keys(layer_idx, layer)
+            js_layer = {'pos': [], 'label': [], 'original': [], 'color': []}
+            diffs = {'key': [], 'kind': [], 'before': []}
+            for key_idx, (position, label, original, face, edge, kind, before) in enumerate(layer_keys):
+                js_layer['pos'].append(position)
+                js_layer['label'].append(labels.setdefault(label, len(labels)))
+                js_layer['original'].append(originals.setdefault(original, len(originals)))
+                js_layer['color'].append(colors.setdefault((face, edge), len(colors)))
+                if kind:
+                    diffs['key'].append(key_idx)
+                    diffs['kind'].append(kind)
+                    diffs['before'].append(originals.setdefault(before, len(originals)))
+            if diffs['key']:
+                js_layer['diff'] = diffs
+            yield (',' if layer_idx else '') + _script_json(js_layer)
+        
+        yield (f'],"labels":{_script_json(list(labels))},'
+               f'"originals":{_script_json(list(originals))},'
+               f'"colors":{_script_json([list(pair) for pair in colors])}}}')
+    
+    def _cached_layer_keys(self, layer_idx: int, layer) -> List[list]:
+        """Keys of one layer (see ``_layer_keys``), from the render cache when possible."""
+        changes = self.diff.layer_changes(layer_idx) if self.diff else {}
+        moved = set(self.diff.layer_move_targets(layer_idx)) if self.diff else set()
+        keys = list(iter_display_keys(layer, layer_idx, self.resolver))
+        if self.cache is None:
+            return self._layer_keys(keys, changes, moved)
+        
+        cache_key = self.cache.make_key(
+            renderer='InteractiveVisualizer.layer', version=RENDERER_VERSION,
+            keys=display_digest(keys), dimensions=(self.max_rows, self.max_cols),
+            changes=sorted(changes.values()), moved=sorted(moved),
+            colors=self.colors.cache_key(),
+        )
+        cached = self.cache.load(cache_key, '.json')
+        if cached is not None:
+            return json.loads(cached)
+        layer_keys = self._layer_keys(keys, changes, moved)
+        self.cache.save(cache_key, '.json',
+                        json.dumps(layer_keys, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        return layer_keys
     
-    def generate_html(self, output_file: str, static_image_filename: str = None) -> None:
+    def _layer_keys(self, keys, changes: Dict, moved: set) -> List[list]:
         """
-        Generate interactive HTML visualization.
+        Collect the displayed keys of one layer.
         
         Args:
-            output_file: Path to save the HTML file
-            static_image_filename: Optional filename of static PNG image
+            keys: (row, col, keycode, inherited) tuples of the layer
+            changes: Diff changes of the layer keyed by (row, col)
+            moved: Positions of the layer that received a moved key
+            
+        Returns:
+            [position, label, original, face color, edge color, diff kind,
+            keycode before] per key; the last two are None for unchanged keys
         """
-        logger.info(f"Generating interactive HTML visualization: {output_file}")
+        layer_keys = []
+        for row_idx, col_idx, keycode, inherited in keys:
+            simplified, face_color, edge_color = self.colors.get_key_style(keycode)
+            if inherited:
+                # Keys inherited from a lower layer keep the transparent colors
+                face_color, edge_color = self.colors.get_key_color('▽')
+            
+            kind = before = None
+            change = changes.get((row_idx, col_idx))
+            if change:
+                kind = 'moved' if (row_idx, col_idx) in moved else change.kind
+                before = change.old or '∅'
+            layer_keys.append([row_idx * self.max_cols + col_idx, simplified,
+                               f"KC_TRNS → {keycode}" if inherited else keycode,
+                               face_color, edge_color, kind, before])
+        
+        # Keys only present in the reference are drawn as ghosts
+        for change in changes.values():
+            if change.kind != 'removed' or change.row >= self.max_rows or change.col >= self.max_cols:
+                continue
+            simplified, face_color, edge_color = self.colors.get_key_style(change.old)
+            layer_keys.append([change.row * self.max_cols + change.col, simplified, change.old,
+                               face_color, edge_color, 'removed', change.old])
+        
+        return layer_keys
+    
+    def iter_html(self, static_image_filename: str = None,
+                  assets_url: Optional[str] = None) -> Iterator[str]:
+        """
+        Generate the interactive HTML page in chunks.
+        
+        The document head comes first and the keymap data is produced one
+        layer at a time, so the page can be streamed to a file or an HTTP
+        response without holding it in memory.
         
-        layers_data = self._generate_layer_data()
+        By default the page is self-contained (viewer stylesheet and script
+        inlined), which suits offline sharing. With ``assets_url`` it only
+        holds the markup and keymap data and loads the shared, cacheable
+        assets written by ``write_assets``.
         
-        html_content = f"""<!DOCTYPE html>
+        Args:
+            static_image_filename: Optional filename of the static PNG or SVG image
+            assets_url: URL of the directory holding the viewer assets
+                (e.g. '/static/viewer'), or None to inline them
+            
+        Yields:
+            Pieces of HTML text, in document order
+        """
+        if assets_url is None:
+            stylesheet = f"<style>\n{VIEWER_CSS}</style>"
+            script = f"<script>\n{VIEWER_JS}</script>"
+        else:
+            base_url = escape(assets_url.rstrip('/'))
+            stylesheet = f'<link rel="stylesheet" href="{base_url}/{ASSET_FILES["css"]}">'
+            script = f'<script src="{base_url}/{ASSET_FILES["js"]}"></script>'
+        
+        legend_items = "\n".join(
+            f'''                <div class="legend-item">
+                    <div class="legend-color" style="background: {escape(face)}; border: 2px solid {escape(edge)};"></div>
+                    <span>{escape(label)}</span>
+                </div>'''
+            for label, face, edge in self.colors.legend()
+        )
+        diff_summary = ""
+        diff_legend = ""
+        if self.diff:
+            counts = self.diff.counts()
+            diff_summary = (f"<p>Compared with reference: {counts['changed']} changed • "
+                            f"{counts['added']} added • {counts['removed']} removed • "
+                            f"{counts['moved']} moved</p>")
+            diff_legend = "".join(
+                f'<div class="legend-item"><div class="legend-color diff-{kind}"></div><span>{label}</span></div>'
+                for kind, label in (('changed', 'Changed'), ('added', 'Added'),
+                                    ('removed', 'Removed'), ('moved', 'Moved'))
+            )
+        
+        yield f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Interactive Keyboard Layout</title>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 20px;
-        }}
-        
-        .container {{
-            max-width: 1400px;
-            margin: 0 auto;
-        }}
-        
-        .header {{
-            text-align: center;
-            color: white;
-            margin-bottom: 30px;
-        }}
-        
-        .header h1 {{
-            font-size: 2.5rem;
-            margin-bottom: 10px;
-            text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
-        }}
-        
-        .controls {{
-            background: white;
-            padding: 20px;
-            border-radius: 12px;
-            box-shadow: 0 10px 30px rgba(0,0,0,0.2);
-            margin-bottom: 20px;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            flex-wrap: wrap;
-            gap: 15px;
-        }}
-        
-        .layer-selector {{
-            display: flex;
-            gap: 10px;
-            align-items: center;
-            flex-wrap: wrap;
-        }}
-        
-        .layer-btn {{
-            padding: 10px 20px;
-            border: 2px solid #667eea;
-            background: white;
-            color: #667eea;
-            border-radius: 8px;
-            cursor: pointer;
-            font-weight: 600;
-            transition: all 0.3s;
-        }}
-        
-        .layer-btn:hover {{
-            background: #f0f0ff;
-        }}
-        
-        .layer-btn.active {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-        }}
-        
-        .action-buttons {{
-            display: flex;
-            gap: 10px;
-        }}
-        
-        .btn {{
-            padding: 10px 20px;
-            border: none;
-            border-radius: 8px;
-            cursor: pointer;
-            font-weight: 600;
-            transition: all 0.3s;
-            text-decoration: none;
-            display: inline-block;
-        }}
-        
-        .btn-primary {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-        }}
-        
-        .btn-primary:hover {{
-            transform: translateY(-2px);
-            box-shadow: 0 5px 20px rgba(102, 126, 234, 0.4);
-        }}
-        
-        .btn-secondary {{
-            background: #6c757d;
-            color: white;
-        }}
-        
-        .btn-secondary:hover {{
-            background: #5a6268;
-        }}
-        
-        .keyboard {{
-            background: white;
-            padding: 30px;
-            border-radius: 12px;
-            box-shadow: 0 10px 30px rgba(0,0,0,0.2);
-            overflow-x: auto;
-        }}
-        
-        .keyboard-grid {{
-            display: inline-block;
-            min-width: fit-content;
-        }}
-        
-        .all-layers-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(400px, 1fr));
-            gap: 20px;
-            padding: 10px;
-        }}
-        
-        .layer-container {{
-            background: #f8f9fa;
-            padding: 20px;
-            border-radius: 8px;
-            border: 2px solid #e0e0e0;
-        }}
-        
-        .layer-container.active {{
-            border-color: #667eea;
-            box-shadow: 0 0 0 2px rgba(102, 126, 234, 0.2);
-        }}
-        
-        .layer-title {{
-            font-size: 1.1rem;
-            font-weight: 700;
-            color: #667eea;
-            margin-bottom: 15px;
-            text-align: center;
-        }}
-        
-        .layer-keyboard {{
-            transform: scale(0.7);
-            transform-origin: top center;
-        }}
-        
-        .keyboard-row {{
-            display: flex;
-            margin-bottom: 5px;
-        }}
-        
-        .key {{
-            width: 60px;
-            height: 60px;
-            margin: 2px;
-            border-radius: 6px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-size: 11px;
-            font-weight: 600;
-            text-align: center;
-            cursor: pointer;
-            transition: all 0.2s;
-            word-wrap: break-word;
-            padding: 4px;
-            position: relative;
-        }}
-        
-        .key:hover {{
-            transform: translateY(-3px);
-            box-shadow: 0 5px 15px rgba(0,0,0,0.3);
-        }}
-        
-        .key:active {{
-            transform: translateY(-1px);
-        }}
-        
-        .key-tooltip {{
-            position: absolute;
-            bottom: 100%;
-            left: 50%;
-            transform: translateX(-50%);
-            background: rgba(0,0,0,0.9);
-            color: white;
-            padding: 8px 12px;
-            border-radius: 6px;
-            font-size: 10px;
-            white-space: nowrap;
-            opacity: 0;
-            pointer-events: none;
-            transition: opacity 0.2s;
-            margin-bottom: 5px;
-            z-index: 1000;
-        }}
-        
-        .key:hover .key-tooltip {{
-            opacity: 1;
-        }}
-        
-        .legend {{
-            background: white;
-            padding: 20px;
-            border-radius: 12px;
-            box-shadow: 0 10px 30px rgba(0,0,0,0.2);
-            margin-top: 20px;
-        }}
-        
-        .legend h3 {{
-            color: #667eea;
-            margin-bottom: 15px;
-        }}
-        
-        .legend-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 15px;
-        }}
-        
-        .legend-item {{
-            display: flex;
-            align-items: center;
-            gap: 10px;
-        }}
-        
-        .legend-color {{
-            width: 30px;
-            height: 30px;
-            border-radius: 6px;
-        }}
-        
-        .info-box {{
-            background: rgba(255,255,255,0.95);
-            padding: 15px;
-            border-radius: 8px;
-            margin-top: 15px;
-            border-left: 4px solid #667eea;
-        }}
-        
-        @media (max-width: 768px) {{
-            .controls {{
-                flex-direction: column;
-            }}
-            
-            .key {{
-                width: 45px;
-                height: 45px;
-                font-size: 9px;
-            }}
-        }}
-    </style>
+    {stylesheet}
 </head>
 <body>
     <div class="container">
         <div class="header">
             <h1>⌨️ Interactive Keyboard Layout</h1>
             <p>Click on keys to see details • Switch between layers • Press 'A' to toggle all layers view</p>
+            {diff_summary}
         </div>
         
         <div class="controls">
@@ -352,14 +233,14 @@ class InteractiveVisualizer:
             </div>
             
             <div class="action-buttons">
-                {"<a href='/download/" + static_image_filename + "' class='btn btn-primary'>📥 Download PNG</a>" if static_image_filename else ""}
+                {"<a href='/download/" + static_image_filename + "' class='btn btn-primary'>📥 Download " + static_image_filename.rsplit('.', 1)[-1].upper() + "</a>" if static_image_filename else ""}
                 {"<a href='/view/" + static_image_filename + "' target='_blank' class='btn btn-secondary'>🖼️ View Static Image</a>" if static_image_filename else ""}
                 <button onclick="window.print()" class="btn btn-secondary">🖨️ Print</button>
             </div>
         </div>
         
         <div class="keyboard">
-            <div class="keyboard-grid" id="keyboardGrid"></div>
+            <div id="keyboardGrid"></div>
         </div>
         
         <div class="info-box" id="keyInfo" style="display: none;">
@@ -369,231 +250,64 @@ class InteractiveVisualizer:
         <div class="legend">
             <h3>Key Legend</h3>
             <div class="legend-grid">
-                <div class="legend-item">
-                    <div class="legend-color" style="background: #f0f0f0; border: 2px solid #cccccc;"></div>
-                    <span>Transparent (▽)</span>
-                </div>
-                <div class="legend-item">
-                    <div class="legend-color" style="background: #ffcccc; border: 2px solid #cc0000;"></div>
-                    <span>Layer Keys (MO, LT)</span>
-                </div>
-                <div class="legend-item">
-                    <div class="legend-color" style="background: #ccccff; border: 2px solid #0000cc;"></div>
-                    <span>Layer Change (DF)</span>
-                </div>
-                <div class="legend-item">
-                    <div class="legend-color" style="background: #ffffcc; border: 2px solid #cccc00;"></div>
-                    <span>Modifier Combos (⇧⌃⌥⌘)</span>
-                </div>
-                <div class="legend-item">
-                    <div class="legend-color" style="background: #e0e0e0; border: 2px solid #666666;"></div>
-                    <span>Regular Keys</span>
-                </div>
+{legend_items}
+                {diff_legend}
             </div>
         </div>
     </div>
     
-    <script>
-        const layers = {layers_data};
-        const maxRows = {self.max_rows};
-        const maxCols = {self.max_cols};
-        let currentLayer = 0;
-        let viewMode = 'single'; // 'single' or 'all'
-        
-        function initializeLayerButtons() {{
-            const container = document.getElementById('layerButtons');
-            for (let i = 0; i < layers.length; i++) {{
-                const btn = document.createElement('button');
-                btn.className = 'layer-btn' + (i === 0 ? ' active' : '');
-                btn.textContent = `Layer ${{i}}`;
-                btn.onclick = () => switchLayer(i);
-                container.appendChild(btn);
-            }}
-        }}
-        
-        function toggleViewMode() {{
-            viewMode = viewMode === 'single' ? 'all' : 'single';
-            const btn = document.getElementById('viewModeBtn');
-            const layerButtons = document.getElementById('layerButtons');
-            
-            if (viewMode === 'all') {{
-                btn.textContent = '📄 Single Layer';
-                btn.classList.remove('active');
-                layerButtons.style.display = 'none';
-                renderAllLayers();
-            }} else {{
-                btn.textContent = '📋 All Layers';
-                btn.classList.add('active');
-                layerButtons.style.display = 'flex';
-                renderLayer(currentLayer);
-            }}
-        }}
-        
-        function switchLayer(layerIndex) {{
-            currentLayer = layerIndex;
-            viewMode = 'single';
-            
-            // Update view mode button
-            const viewBtn = document.getElementById('viewModeBtn');
-            viewBtn.textContent = '📋 All Layers';
-            viewBtn.classList.add('active');
-            document.getElementById('layerButtons').style.display = 'flex';
-            
-            // Update button states
-            document.querySelectorAll('#layerButtons .layer-btn').forEach((btn, idx) => {{
-                btn.classList.toggle('active', idx === layerIndex);
-            }});
-            
-            // Render the layer
-            renderLayer(layerIndex);
-        }}
-        
-        function createKeyboardGrid(layer, layerIndex = null) {{
-            const keyGrid = Array(maxRows).fill(null).map(() => Array(maxCols).fill(null));
-            
-            // Place keys in the grid
-            layer.forEach(key => {{
-                keyGrid[key.row][key.col] = key;
-            }});
-            
-            // Create grid element
-            const gridDiv = document.createElement('div');
-            gridDiv.className = 'keyboard-grid';
-            
-            // Render the grid
-            keyGrid.forEach(row => {{
-                const rowDiv = document.createElement('div');
-                rowDiv.className = 'keyboard-row';
-                
-                row.forEach(key => {{
-                    const keyDiv = document.createElement('div');
-                    keyDiv.className = 'key';
-                    
-                    if (key) {{
-                        keyDiv.style.backgroundColor = key.faceColor;
-                        keyDiv.style.border = `2px solid ${{key.edgeColor}}`;
-                        keyDiv.textContent = key.keycode;
-                        
-                        // Add tooltip
-                        const tooltip = document.createElement('div');
-                        tooltip.className = 'key-tooltip';
-                        tooltip.textContent = key.original;
-                        keyDiv.appendChild(tooltip);
-                        
-                        // Add click handler
-                        const keyInfo = layerIndex !== null ? 
-                            `${{key.keycode}} (Layer ${{layerIndex}}, Original: ${{key.original}}, Row ${{key.row}}, Col ${{key.col}})` :
-                            key;
-                        keyDiv.onclick = () => showKeyInfo(typeof keyInfo === 'string' ? {{
-                            keycode: key.keycode,
-                            original: key.original,
-                            row: key.row,
-                            col: key.col,
-                            layer: layerIndex
-                        }} : keyInfo);
-                    }} else {{
-                        keyDiv.style.visibility = 'hidden';
-                    }}
-                    
-                    rowDiv.appendChild(keyDiv);
-                }});
-                
-                gridDiv.appendChild(rowDiv);
-            }});
-            
-            return gridDiv;
-        }}
-        
-        function renderLayer(layerIndex) {{
-            const grid = document.getElementById('keyboardGrid');
-            grid.innerHTML = '';
-            grid.className = 'keyboard-grid';
-            
-            const layer = layers[layerIndex];
-            const keyboardGrid = createKeyboardGrid(layer);
-            grid.appendChild(keyboardGrid);
-        }}
-        
-        function renderAllLayers() {{
-            const grid = document.getElementById('keyboardGrid');
-            grid.innerHTML = '';
-            grid.className = 'all-layers-grid';
-            
-            layers.forEach((layer, index) => {{
-                const container = document.createElement('div');
-                container.className = 'layer-container';
-                container.id = `layer-container-${{index}}`;
-                
-                const title = document.createElement('div');
-                title.className = 'layer-title';
-                title.textContent = `Layer ${{index}}`;
-                title.style.cursor = 'pointer';
-                title.onclick = () => {{
-                    // Highlight this layer
-                    document.querySelectorAll('.layer-container').forEach(c => c.classList.remove('active'));
-                    container.classList.add('active');
-                    
-                    // Scroll to this layer
-                    container.scrollIntoView({{ behavior: 'smooth', block: 'center' }});
-                }};
-                
-                const keyboardWrapper = document.createElement('div');
-                keyboardWrapper.className = 'layer-keyboard';
-                const keyboardGrid = createKeyboardGrid(layer, index);
-                keyboardWrapper.appendChild(keyboardGrid);
-                
-                container.appendChild(title);
-                container.appendChild(keyboardWrapper);
-                grid.appendChild(container);
-            }});
-        }}
+    <script id="keymap-data" type="application/json" data-max-rows="{self.max_rows}" data-max-cols="{self.max_cols}">"""
+        yield from self._iter_layer_data()
+        yield f"""</script>
+    {script}
+</body>
+</html>"""
+    
+    def write(self, stream: IO[str], static_image_filename: str = None,
+              assets_url: Optional[str] = None) -> None:
+        """Write the HTML page to a text stream (arguments as for ``iter_html``)."""
+        for chunk in self.iter_html(static_image_filename, assets_url):
+            stream.write(chunk)
+    
+    def to_string(self, static_image_filename: str = None, assets_url: Optional[str] = None) -> str:
+        """Get the HTML page as a string (arguments as for ``iter_html``)."""
+        return ''.join(self.iter_html(static_image_filename, assets_url))
+    
+    def generate_html(self, output_file: str, static_image_filename: str = None,
+                      assets_url: Optional[str] = None) -> None:
+        """
+        Generate interactive HTML visualization.
         
-        function showKeyInfo(key) {{
-            const infoBox = document.getElementById('keyInfo');
-            const details = document.getElementById('keyDetails');
-            
-            const layerInfo = key.layer !== null && key.layer !== undefined ? 
-                `Layer ${{key.layer}} - ` : '';
-            
-            details.innerHTML = `
-                ${{layerInfo}}<strong>${{key.keycode}}</strong> 
-                (Original: <code>${{key.original}}</code>) 
-                - Position: Row ${{key.row}}, Col ${{key.col}}
-            `;
-            infoBox.style.display = 'block';
-        }}
+        The page is written to the file as it is generated (see
+        ``iter_html``). With a render cache, an identical earlier page is
+        copied to ``output_file`` instead of generating it again.
         
-        // Initialize on page load
-        document.addEventListener('DOMContentLoaded', () => {{
-            initializeLayerButtons();
-            renderLayer(0);
-        }});
+        Args:
+            output_file: Path to save the HTML file
+            static_image_filename: Optional filename of the static PNG or SVG image
+            assets_url: URL of the directory holding the viewer assets
+                (e.g. '/static/viewer'), or None to inline them
+        """
+        logger.info(f"Generating interactive HTML visualization: {output_file}")
         
-        // Keyboard shortcuts
-        document.addEventListener('keydown', (e) => {{
-            if (e.key >= '0' && e.key <= '9') {{
-                const layerNum = parseInt(e.key);
-                if (layerNum < layers.length) {{
-                    switchLayer(layerNum);
-                }}
-            }} else if (e.key === 'ArrowLeft') {{
-                if (viewMode === 'single') {{
-                    switchLayer(Math.max(0, currentLayer - 1));
-                }}
-            }} else if (e.key === 'ArrowRight') {{
-                if (viewMode === 'single') {{
-                    switchLayer(Math.min(layers.length - 1, currentLayer + 1));
-                }}
-            }} else if (e.key === 'a' || e.key === 'A') {{
-                toggleViewMode();
-            }}
-        }});
-    </script>
-</body>
-</html>"""
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(
+                self.layers, renderer='InteractiveVisualizer', version=RENDERER_VERSION,
+                dimensions=(self.max_rows, self.max_cols), resolved=self.resolver is not None,
+                diff=self.diff.to_dict() if self.diff is not None else None,
+                colors=self.colors.cache_key(),
+                static_image=static_image_filename,
+                assets_url=assets_url, assets=ASSET_FILES,
+            )
+            if self.cache.fetch(key, output_file):
+                return
         
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+            self.write(f, static_image_filename, assets_url)
+        
+        if key is not None:
+            self.cache.store(key, output_file)
         
         logger.info(f"Interactive HTML visualization saved to {output_file}")
 
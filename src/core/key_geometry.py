@@ -0,0 +1,25 @@
+"""
+Sheet and key geometry shared by the PNG and SVG visualizers.
+
+Kept free of matplotlib so the SVG renderer can use it without loading it.
+"""
+
+# Key dimensions in matrix units (one unit per matrix position)
+KEY_SIZE = 0.9
+KEY_MARGIN = 0.05
+KEY_LINEWIDTH = 1.5  # points
+
+# Size of one matrix position on the PNG sheet
+CELL_INCHES = 0.7
+
+SHEET_TITLE = 'Keyboard Layer Visualization'
+SHEET_TITLE_SIZE = 16  # points
+LAYER_TITLE_SIZE = 14  # points
+
+# Key label sizes in points, from short to long labels
+LABEL_FONT_SIZES = (8, 6, 5)
+
+
+def label_font_size(label: str) -> int:
+    """Get the font size of a key label: longer labels are drawn smaller."""
+    return 8 if len(label) <= 4 else 6 if len(label) <= 8 else 5
@@ -0,0 +1,394 @@
+"""
+Compact array-backed keymap representation.
+"""
+
+import hashlib
+from array import array
+from functools import lru_cache
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+from ..utils.keycode_parser import normalize_keycode
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Stored at positions without a key (Vial uses -1 / "-1" for these)
+NO_KEY = -1
+
+
+@lru_cache(maxsize=None)
+def load_numpy():
+    """
+    Import NumPy on first use.
+
+    NumPy is optional and slow to import, so it is only loaded when a
+    KeymapMatrix is built, keeping it out of CLI and web app startup.
+
+    Returns:
+        The numpy module, or None if it is not installed
+    """
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+    return numpy
+
+
+def is_no_key(keycode: Any) -> bool:
+    """Check whether a raw keycode from a .vil layout marks an empty position."""
+    return keycode == NO_KEY or keycode == "-1"
+
+
+class SymbolTable:
+    """Append-only table interning keycode strings to small integers."""
+
+    def __init__(self, keycodes: Iterable[str] = ()):
+        self.keycodes: List[str] = []
+        self._ids = {}
+        for keycode in keycodes:
+            self.intern(keycode)
+
+    def intern(self, keycode: Any) -> int:
+        """
+        Get the id of a keycode, adding it to the table if needed.
+
+        Args:
+            keycode: Raw keycode (empty positions map to NO_KEY)
+
+        Returns:
+            Symbol id, or NO_KEY for empty positions
+        """
+        if is_no_key(keycode):
+            return NO_KEY
+        keycode = str(keycode)
+        symbol_id = self._ids.get(keycode)
+        if symbol_id is None:
+            symbol_id = len(self.keycodes)
+            self._ids[keycode] = symbol_id
+            self.keycodes.append(keycode)
+        return symbol_id
+
+    def lookup(self, keycode: Any) -> Optional[int]:
+        """Get the id of a keycode without interning it (None if unknown)."""
+        if is_no_key(keycode):
+            return NO_KEY
+        return self._ids.get(str(keycode))
+
+    def __len__(self) -> int:
+        return len(self.keycodes)
+
+
+class RowView(Sequence):
+    """Read-only view of one row of a KeymapMatrix."""
+
+    def __init__(self, matrix: 'KeymapMatrix', layer: int, row: int):
+        self._matrix = matrix
+        self._start = (layer * matrix.num_rows + row) * matrix.num_cols
+
+    def __len__(self) -> int:
+        return self._matrix.num_cols
+
+    def __getitem__(self, col):
+        if isinstance(col, slice):
+            return [self[i] for i in range(*col.indices(len(self)))]
+        if col < 0:
+            col += len(self)
+        if not 0 <= col < len(self):
+            raise IndexError("column index out of range")
+        return self._matrix.keycode(int(self._matrix.flat[self._start + col]))
+
+    def ids(self) -> List[int]:
+        """Symbol ids of the row (NO_KEY for empty positions)."""
+        return self._matrix.flat_ids(self._start, self._start + self._matrix.num_cols)
+
+    def keycodes(self) -> List[str]:
+        """Keycodes of the row, skipping empty positions."""
+        keycodes = self._matrix.symbols.keycodes
+        return [keycodes[i] for i in self.ids() if i != NO_KEY]
+
+
+class LayerView(Sequence):
+    """Read-only view of one layer of a KeymapMatrix, indexable by row."""
+
+    def __init__(self, matrix: 'KeymapMatrix', layer: int):
+        self._matrix = matrix
+        self.index = layer
+
+    def __len__(self) -> int:
+        return self._matrix.num_rows
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("row index out of range")
+        return RowView(self._matrix, self.index, row)
+
+    @property
+    def matrix(self) -> 'KeymapMatrix':
+        return self._matrix
+
+    def ids(self) -> List[int]:
+        """Symbol ids of the layer in row-major order (NO_KEY for empty positions)."""
+        size = self._matrix.num_rows * self._matrix.num_cols
+        return self._matrix.flat_ids(self.index * size, (self.index + 1) * size)
+
+    def iter_key_ids(self) -> Iterator[Tuple[int, int, int]]:
+        """Yield (row, col, symbol_id) for every position holding a key."""
+        cols = self._matrix.num_cols
+        for pos, symbol_id in enumerate(self.ids()):
+            if symbol_id != NO_KEY:
+                yield pos // cols, pos % cols, symbol_id
+
+    def iter_keys(self) -> Iterator[Tuple[int, int, str]]:
+        """Yield (row, col, keycode) for every position holding a key."""
+        keycodes = self._matrix.symbols.keycodes
+        for row, col, symbol_id in self.iter_key_ids():
+            yield row, col, keycodes[symbol_id]
+
+
+class KeymapMatrix(Sequence):
+    """
+    Dense layers x rows x cols keymap.
+
+    Keycodes are interned into a SymbolTable and every position stores a
+    symbol id (or NO_KEY), in a NumPy int32 array when NumPy is installed and
+    a stdlib ``array('i')`` otherwise. Ragged rows are padded with NO_KEY.
+    Indexing yields LayerView/RowView objects that behave like the nested
+    lists returned by ``VialLoader.extract_layers``, so consumers that iterate
+    rows keep working, while hot loops can use the integer ids directly.
+    Unlike those lists, every layer has ``num_rows`` rows and every row
+    ``num_cols`` positions; compare rows with ``row_cells`` to ignore padding.
+
+    Each position costs 4 bytes instead of an 8-byte reference plus its share
+    of a list object: about 2x smaller than nested lists of interned strings
+    and about 11x smaller than the lists ``json.loads`` builds (where every
+    occurrence is its own string), measured on a 32x8x20 keymap with 300
+    distinct keycodes.
+    """
+
+    def __init__(self, symbols: SymbolTable, flat, shape: Tuple[int, int, int]):
+        """
+        Initialize the matrix.
+
+        Args:
+            symbols: Symbol table the ids in ``flat`` refer to
+            flat: Row-major symbol ids (NumPy array or ``array('i')``)
+            shape: Tuple of (num_layers, num_rows, num_cols)
+        """
+        self.symbols = symbols
+        self.flat = flat
+        self.num_layers, self.num_rows, self.num_cols = shape
+
+    @classmethod
+    def from_layers(cls, layers: Any, use_numpy: Optional[bool] = None) -> 'KeymapMatrix':
+        """
+        Build a matrix from nested layer lists.
+
+        Args:
+            layers: List of layers (lists of rows of keycodes), or a KeymapMatrix
+            use_numpy: Force (True) or disable (False) the NumPy backend;
+                defaults to NumPy when it is installed
+
+        Returns:
+            KeymapMatrix holding the same keys
+        """
+        if isinstance(layers, KeymapMatrix):
+            return layers
+
+        num_layers = len(layers)
+        num_rows = max((len(layer) for layer in layers), default=0)
+        num_cols = max((len(row) for layer in layers for row in layer), default=0)
+
+        symbols = SymbolTable()
+        intern = symbols.intern
+        flat = array('i', [NO_KEY]) * (num_layers * num_rows * num_cols)
+        for layer_idx, layer in enumerate(layers):
+            for row_idx, row in enumerate(layer):
+                start = (layer_idx * num_rows + row_idx) * num_cols
+                flat[start:start + len(row)] = array('i', [intern(k) for k in row])
+
+        np = load_numpy()
+        if use_numpy is None:
+            use_numpy = np is not None
+        if use_numpy:
+            flat = np.frombuffer(flat, dtype=np.int32).copy()
+
+        logger.debug(f"Built keymap matrix {num_layers}x{num_rows}x{num_cols} "
+                     f"with {len(symbols)} distinct keycodes")
+        return cls(symbols, flat, (num_layers, num_rows, num_cols))
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self.num_layers, self.num_rows, self.num_cols
+
+    @property
+    def uses_numpy(self) -> bool:
+        return not isinstance(self.flat, array)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the id array in bytes."""
+        return self.flat.nbytes if self.uses_numpy else len(self.flat) * self.flat.itemsize
+
+    def __len__(self) -> int:
+        return self.num_layers
+
+    def __getitem__(self, layer):
+        if isinstance(layer, slice):
+            return [self[i] for i in range(*layer.indices(len(self)))]
+        if layer < 0:
+            layer += len(self)
+        if not 0 <= layer < len(self):
+            raise IndexError("layer index out of range")
+        return LayerView(self, layer)
+
+    def keycode(self, symbol_id: int) -> Any:
+        """Get the keycode for a symbol id (NO_KEY for empty positions)."""
+        return NO_KEY if symbol_id == NO_KEY else self.symbols.keycodes[symbol_id]
+
+    def flat_ids(self, start: int, stop: int) -> List[int]:
+        """Get a range of the flat id array as a list of ints."""
+        return self.flat[start:stop].tolist()
+
+    def get(self, layer: int, row: int, col: int) -> Any:
+        """Get the keycode at a position (NO_KEY if empty or out of range)."""
+        if not (0 <= layer < self.num_layers and 0 <= row < self.num_rows
+                and 0 <= col < self.num_cols):
+            return NO_KEY
+        return self.keycode(int(self.flat[(layer * self.num_rows + row) * self.num_cols + col]))
+
+    def replace(self, old_keycode: str, new_keycode: str,
+                layers: Optional[Iterable[int]] = None) -> Tuple['KeymapMatrix', int]:
+        """
+        Replace a keycode, returning a new matrix.
+
+        Every spelling of ``old_keycode`` in the symbol table is replaced, so
+        ``LT(2, KC_SPC)`` also replaces ``LT2(KC_SPC)``.
+
+        Args:
+            old_keycode: Keycode to replace
+            new_keycode: Replacement keycode
+            layers: Layer indices to modify (default: all layers)
+
+        Returns:
+            Tuple of (new matrix, number of replaced keys)
+        """
+        target = normalize_keycode(old_keycode)
+        if is_no_key(target):
+            return self, 0
+        old_ids = [symbol_id for symbol_id, keycode in enumerate(self.symbols.keycodes)
+                   if normalize_keycode(keycode) == target]
+        if not old_ids:
+            return self, 0
+        new_id = self.symbols.intern(new_keycode)
+        old_set = set(old_ids)
+
+        size = self.num_rows * self.num_cols
+        layer_indices = range(self.num_layers) if layers is None else layers
+        flat = self.flat[:] if not self.uses_numpy else self.flat.copy()
+        count = 0
+        for layer_idx in layer_indices:
+            start, stop = layer_idx * size, (layer_idx + 1) * size
+            if self.uses_numpy:
+                block = flat[start:stop]
+                hits = block == old_ids[0]
+                for old_id in old_ids[1:]:
+                    hits |= block == old_id
+                count += int(hits.sum())
+                block[hits] = new_id
+            else:
+                for pos in range(start, stop):
+                    if flat[pos] in old_set:
+                        flat[pos] = new_id
+                        count += 1
+
+        return KeymapMatrix(self.symbols, flat, self.shape), count
+
+    def set_keys(self, layer: int, positions: Iterable[Tuple[int, int]],
+                 keycode: Any) -> 'KeymapMatrix':
+        """
+        Set the keycode at specific positions of a layer, returning a new matrix.
+
+        Args:
+            layer: Layer index
+            positions: (row, col) positions to change
+            keycode: Keycode to store (NO_KEY clears the positions)
+
+        Returns:
+            New KeymapMatrix sharing the symbol table
+        """
+        symbol_id = self.symbols.intern(keycode)
+        flat = self.flat[:] if not self.uses_numpy else self.flat.copy()
+        base = layer * self.num_rows
+        for row, col in positions:
+            flat[(base + row) * self.num_cols + col] = symbol_id
+        return KeymapMatrix(self.symbols, flat, self.shape)
+
+    def to_layers(self) -> List[List[List[Any]]]:
+        """Convert back to nested lists (NO_KEY for empty positions)."""
+        return [[list(row) for row in layer] for layer in self]
+
+
+def iter_layer_keys(layer: Any) -> Iterator[Tuple[int, int, str]]:
+    """
+    Yield (row, col, keycode) for each key of a layer, skipping empty positions.
+
+    Works on nested row lists as well as LayerView, where empty positions
+    are detected by integer comparison on the symbol ids.
+
+    Args:
+        layer: List of rows, or a LayerView
+    """
+    if isinstance(layer, LayerView):
+        yield from layer.iter_keys()
+        return
+
+    for row_idx, row in enumerate(layer):
+        for col_idx, keycode in enumerate(row):
+            if not is_no_key(keycode):
+                yield row_idx, col_idx, str(keycode)
+
+
+def row_keycodes(row: Any) -> List[str]:
+    """Get the keycodes of a row (list or RowView), skipping empty positions."""
+    if isinstance(row, RowView):
+        return row.keycodes()
+    return [str(k) for k in row if not is_no_key(k)]
+
+
+def row_cells(row: Any) -> Tuple[str, ...]:
+    """
+    Get the keycodes of a row by column, for comparing rows of different sources.
+
+    Empty positions become '' and trailing empty positions are dropped, so a
+    ragged list row and the padded RowView of the same keys are equal.
+
+    Args:
+        row: List of keycodes, or a RowView
+    """
+    if isinstance(row, RowView):
+        keycodes = row._matrix.symbols.keycodes
+        cells = ['' if i == NO_KEY else keycodes[i] for i in row.ids()]
+    else:
+        cells = ['' if is_no_key(k) else str(k) for k in row]
+    while cells and not cells[-1]:
+        cells.pop()
+    return tuple(cells)
+
+
+def row_digest(cells: Sequence[str]) -> bytes:
+    """Stable 8-byte digest of a row's cells (see ``row_cells``)."""
+    return hashlib.blake2b('\x00'.join(cells).encode('utf-8'), digest_size=8).digest()
+
+
+EMPTY_ROW_DIGEST = row_digest(())
+
+
+def layer_digest(row_digests: Sequence[bytes]) -> bytes:
+    """Stable 8-byte digest of a layer from its row digests (trailing empty rows ignored)."""
+    end = len(row_digests)
+    while end and row_digests[end - 1] == EMPTY_ROW_DIGEST:
+        end -= 1
+    return hashlib.blake2b(b''.join(row_digests[:end]), digest_size=8).digest()
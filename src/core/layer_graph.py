@@ -0,0 +1,265 @@
+"""
+Layer activation graph module.
+"""
+
+from collections import deque
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+from ..utils.keycode_parser import layer_action, parse_keycode
+from ..utils.logger import get_logger
+from .keymap import KeymapMatrix, is_no_key
+
+logger = get_logger(__name__)
+
+
+class LayerEdge(NamedTuple):
+    """A key on ``source`` that activates ``target``."""
+    source: int
+    target: int
+    action: str
+    row: int
+    col: int
+    keycode: str
+
+
+class LayerGraph:
+    """
+    Directed graph of which layers can activate which.
+
+    Built in one pass over the keymap; every layer key (MO, LT, LM, TG, TT,
+    OSL, TO, DF) becomes an edge labelled with its position and action. The
+    adjacency lists and the breadth-first trees used for reachability and
+    path queries are computed once and cached.
+    """
+
+    def __init__(self, num_layers: int, default_layer: int = 0):
+        """Initialize an empty graph (use ``LayerGraph.build``)."""
+        self.num_layers = num_layers
+        self.default_layer = default_layer
+        self.edges: List[LayerEdge] = []
+        self.invalid_edges: List[LayerEdge] = []
+        self.empty_layers: Set[int] = set()
+        self._adjacency: Dict[int, List[LayerEdge]] = {layer: [] for layer in range(num_layers)}
+        self._trees: Dict[int, Dict[int, Optional[LayerEdge]]] = {}
+
+    @classmethod
+    def build(cls, layers: Any, default_layer: int = 0) -> 'LayerGraph':
+        """
+        Build the graph from layer data in one pass.
+
+        Args:
+            layers: List of layers (lists of rows), or a KeymapMatrix
+            default_layer: Layer active at power-on
+
+        Returns:
+            Populated LayerGraph
+        """
+        graph = cls(len(layers), default_layer)
+
+        if isinstance(layers, KeymapMatrix):
+            # Parse each distinct keycode once, then only look at matching ids
+            actions = {}
+            transparent = set()
+            for symbol_id, keycode in enumerate(layers.symbols.keycodes):
+                node = parse_keycode(keycode)
+                action = layer_action(node)
+                if action is not None:
+                    actions[symbol_id] = action
+                elif node.kind == 'transparent':
+                    transparent.add(symbol_id)
+            for layer_idx in range(len(layers)):
+                has_keys = False
+                for row_idx, col_idx, symbol_id in layers[layer_idx].iter_key_ids():
+                    if symbol_id not in transparent:
+                        has_keys = True
+                    if symbol_id in actions:
+                        action, target = actions[symbol_id]
+                        graph._add_edge(LayerEdge(layer_idx, target, action, row_idx, col_idx,
+                                                  layers.symbols.keycodes[symbol_id]))
+                if not has_keys:
+                    graph.empty_layers.add(layer_idx)
+        else:
+            for layer_idx, layer in enumerate(layers):
+                has_keys = False
+                for row_idx, row in enumerate(layer):
+                    for col_idx, keycode in enumerate(row):
+                        if is_no_key(keycode):
+                            continue
+                        keycode = str(keycode)
+                        # Parsing is cached per distinct keycode
+                        node = parse_keycode(keycode)
+                        if node.kind != 'transparent':
+                            has_keys = True
+                        action = layer_action(node)
+                        if action is not None:
+                            graph._add_edge(LayerEdge(layer_idx, action[1], action[0],
+                                                      row_idx, col_idx, keycode))
+                if not has_keys:
+                    graph.empty_layers.add(layer_idx)
+
+        logger.debug(f"Built layer graph: {len(graph.edges)} edges over {graph.num_layers} layers")
+        return graph
+
+    def _add_edge(self, edge: LayerEdge) -> None:
+        if 0 <= edge.target < self.num_layers:
+            self.edges.append(edge)
+            self._adjacency[edge.source].append(edge)
+        else:
+            self.invalid_edges.append(edge)
+
+    def successors(self, layer: int) -> List[int]:
+        """Layers directly activated by keys on ``layer`` (sorted, unique)."""
+        return sorted({edge.target for edge in self._adjacency.get(layer, ())})
+
+    def edges_from(self, layer: int) -> List[LayerEdge]:
+        """Layer keys placed on ``layer``."""
+        return list(self._adjacency.get(layer, ()))
+
+    def _tree(self, source: int) -> Dict[int, Optional[LayerEdge]]:
+        """Breadth-first tree from ``source``: layer -> edge it was first reached by."""
+        tree = self._trees.get(source)
+        if tree is None:
+            tree = {source: None}
+            queue = deque([source])
+            while queue:
+                for edge in self._adjacency.get(queue.popleft(), ()):
+                    if edge.target not in tree:
+                        tree[edge.target] = edge
+                        queue.append(edge.target)
+            self._trees[source] = tree
+        return tree
+
+    def reachable(self, source: Optional[int] = None) -> Set[int]:
+        """
+        Get every layer reachable from a layer.
+
+        Args:
+            source: Starting layer (default: the default layer)
+
+        Returns:
+            Set of reachable layer indices, including ``source``
+        """
+        return set(self._tree(self.default_layer if source is None else source))
+
+    def is_reachable(self, layer: int, source: Optional[int] = None) -> bool:
+        """Check whether ``layer`` can be reached from ``source`` (default layer by default)."""
+        return layer in self._tree(self.default_layer if source is None else source)
+
+    def unreachable_layers(self) -> List[int]:
+        """Layers that no chain of layer keys reaches from the default layer."""
+        reachable = self._tree(self.default_layer)
+        return [layer for layer in range(self.num_layers) if layer not in reachable]
+
+    def dead_layers(self) -> List[int]:
+        """
+        Unreachable layers that still hold keys.
+
+        Unreachable layers made only of transparent or empty positions are
+        usually unused slots and are not reported.
+        """
+        return [layer for layer in self.unreachable_layers() if layer not in self.empty_layers]
+
+    def path_to(self, layer: int, source: Optional[int] = None) -> Optional[List[LayerEdge]]:
+        """
+        Find the shortest chain of layer keys that reaches a layer.
+
+        Args:
+            layer: Target layer
+            source: Starting layer (default: the default layer)
+
+        Returns:
+            Edges to press in order (empty if ``layer`` is the source),
+            or None if the layer is unreachable
+        """
+        tree = self._tree(self.default_layer if source is None else source)
+        if layer not in tree:
+            return None
+        path = []
+        edge = tree[layer]
+        while edge is not None:
+            path.append(edge)
+            edge = tree[edge.source]
+        path.reverse()
+        return path
+
+    def cycles(self) -> List[List[int]]:
+        """
+        Find groups of layers that can activate each other.
+
+        Returns:
+            Strongly connected components with more than one layer, or a
+            single layer with a key activating itself (sorted lists)
+        """
+        index_of: Dict[int, int] = {}
+        lowlink: Dict[int, int] = {}
+        stack: List[int] = []
+        on_stack: Set[int] = set()
+        components = []
+        counter = 0
+
+        # Iterative Tarjan to stay clear of the recursion limit
+        for root in range(self.num_layers):
+            if root in index_of:
+                continue
+            work = [(root, iter(self.successors(root)))]
+            index_of[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if child not in index_of:
+                        index_of[child] = lowlink[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.successors(child))))
+                        break
+                    if child in on_stack:
+                        lowlink[node] = min(lowlink[node], index_of[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] == index_of[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        if len(component) > 1 or node in self.successors(node):
+                            components.append(sorted(component))
+        return sorted(components)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Summarize the graph.
+
+        Returns:
+            JSON-serializable dictionary with edges, unreachable and dead
+            layers, cycles and the shortest activation path of each layer
+        """
+        paths = {}
+        for layer in range(self.num_layers):
+            path = self.path_to(layer)
+            if path:
+                paths[layer] = [f"L{edge.source} {edge.keycode} @ ({edge.row},{edge.col})"
+                                for edge in path]
+        return {
+            'num_layers': self.num_layers,
+            'default_layer': self.default_layer,
+            'edges': [edge._asdict() for edge in self.edges],
+            'invalid_edges': [edge._asdict() for edge in self.invalid_edges],
+            'unreachable': self.unreachable_layers(),
+            'dead': self.dead_layers(),
+            'cycles': self.cycles(),
+            'paths': paths,
+        }
+
+
+def analyze_layers(layers: Any) -> Dict[str, Any]:
+    """Build a LayerGraph and summarize it (usable as ``VialLoader.load_many(analyze=...)``)."""
+    return LayerGraph.build(layers).to_dict()
@@ -0,0 +1,183 @@
+"""
+Precomputed layout index module.
+"""
+
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from ..utils.keycode_parser import normalize_keycode
+from ..utils.logger import get_logger
+from .keymap import KeymapMatrix, is_no_key
+
+logger = get_logger(__name__)
+
+Position = Tuple[int, int, int]
+
+
+class LayoutIndex:
+    """
+    Index over a keymap built in a single pass.
+
+    Holds the keyboard dimensions, the number of keys per layer, an inverted
+    index from keycode to positions and per-keycode frequencies. Transforms
+    that are given the index keep it up to date, so renames and lookups cost
+    O(hits) instead of a scan over every key.
+
+    Keycodes are indexed and looked up by their canonical spelling
+    (``normalize_keycode``), so ``LT(2, KC_SPC)`` finds ``LT2(KC_SPC)``.
+    """
+
+    def __init__(self):
+        """Initialize an empty index (use ``LayoutIndex.build``)."""
+        self.num_layers = 0
+        self.max_rows = 0
+        self.max_cols = 0
+        self.layer_key_counts: List[int] = []
+        self.frequencies: Counter = Counter()
+        # canonical keycode -> layer -> [(row, col), ...]
+        self._positions: Dict[str, Dict[int, List[Tuple[int, int]]]] = {}
+
+    @classmethod
+    def build(cls, layers: Any) -> 'LayoutIndex':
+        """
+        Build the index from layer data in one pass.
+
+        Args:
+            layers: List of layers (lists of rows), or a KeymapMatrix
+
+        Returns:
+            Populated LayoutIndex
+        """
+        index = cls()
+        index.num_layers = len(layers)
+        positions = index._positions
+
+        if isinstance(layers, KeymapMatrix):
+            index.max_rows, index.max_cols = layers.num_rows, layers.num_cols
+            # Normalize each distinct keycode once
+            canonical = [normalize_keycode(keycode) for keycode in layers.symbols.keycodes]
+            for layer_idx in range(len(layers)):
+                count = 0
+                for row_idx, col_idx, symbol_id in layers[layer_idx].iter_key_ids():
+                    keycode = canonical[symbol_id]
+                    if is_no_key(keycode):
+                        continue
+                    positions.setdefault(keycode, {}).setdefault(layer_idx, []).append((row_idx, col_idx))
+                    count += 1
+                index.layer_key_counts.append(count)
+        else:
+            for layer_idx, layer in enumerate(layers):
+                count = 0
+                index.max_rows = max(index.max_rows, len(layer))
+                for row_idx, row in enumerate(layer):
+                    index.max_cols = max(index.max_cols, len(row))
+                    for col_idx, keycode in enumerate(row):
+                        keycode = normalize_keycode(keycode)
+                        if is_no_key(keycode):
+                            continue
+                        positions.setdefault(keycode, {}).setdefault(layer_idx, []).append((row_idx, col_idx))
+                        count += 1
+                index.layer_key_counts.append(count)
+
+        index.frequencies = Counter({
+            keycode: sum(len(hits) for hits in by_layer.values())
+            for keycode, by_layer in positions.items()
+        })
+        logger.debug(f"Indexed {sum(index.layer_key_counts)} keys "
+                     f"({len(positions)} distinct keycodes)")
+        return index
+
+    @property
+    def dimensions(self) -> Tuple[int, int]:
+        """Tuple of (max_rows, max_cols)."""
+        return self.max_rows, self.max_cols
+
+    def positions(self, keycode: str, layer: Optional[int] = None) -> List[Position]:
+        """
+        Find where a keycode is placed.
+
+        Args:
+            keycode: Keycode to look up
+            layer: Restrict the search to one layer
+
+        Returns:
+            List of (layer, row, col) positions
+        """
+        by_layer = self._positions.get(normalize_keycode(keycode), {})
+        if layer is not None:
+            return [(layer, row, col) for row, col in by_layer.get(layer, ())]
+        return [(layer_idx, row, col)
+                for layer_idx in sorted(by_layer)
+                for row, col in by_layer[layer_idx]]
+
+    def layer_positions(self, keycode: str, layer: int) -> List[Tuple[int, int]]:
+        """Get the (row, col) positions of a keycode in one layer."""
+        return list(self._positions.get(normalize_keycode(keycode), {}).get(layer, ()))
+
+    def frequency(self, keycode: str) -> int:
+        """Number of keys holding the keycode across all layers."""
+        return self.frequencies.get(normalize_keycode(keycode), 0)
+
+    def keycodes(self) -> List[str]:
+        """All indexed keycodes (canonical spelling), most frequent first."""
+        return [keycode for keycode, _ in self.frequencies.most_common()]
+
+    def record_rename(self, layer: int, old_keycode: str, new_keycode: str) -> List[Tuple[int, int]]:
+        """
+        Update the index after every ``old_keycode`` in a layer became ``new_keycode``.
+
+        Args:
+            layer: Layer index the rename was applied to
+            old_keycode: Keycode that was replaced
+            new_keycode: Replacement keycode
+
+        Returns:
+            The (row, col) positions that moved to the new keycode
+        """
+        old_keycode = normalize_keycode(old_keycode)
+        new_keycode = normalize_keycode(new_keycode)
+        by_layer = self._positions.get(old_keycode)
+        if not by_layer or layer not in by_layer or old_keycode == new_keycode:
+            return []
+
+        moved = by_layer.pop(layer)
+        if not by_layer:
+            del self._positions[old_keycode]
+        self._positions.setdefault(new_keycode, {}).setdefault(layer, []).extend(moved)
+
+        self.frequencies[old_keycode] -= len(moved)
+        if self.frequencies[old_keycode] <= 0:
+            del self.frequencies[old_keycode]
+        self.frequencies[new_keycode] += len(moved)
+        return moved
+
+    def record_change(self, layer: int, row: int, col: int,
+                      old_keycode: Any, new_keycode: Any) -> None:
+        """
+        Update the index after a single position changed.
+
+        Args:
+            layer: Layer index of the position
+            row: Row of the position
+            col: Column of the position
+            old_keycode: Previous keycode (or an empty-position marker)
+            new_keycode: New keycode (or an empty-position marker)
+        """
+        old_keycode = normalize_keycode(old_keycode)
+        new_keycode = normalize_keycode(new_keycode)
+        if not is_no_key(old_keycode):
+            hits = self._positions.get(old_keycode, {}).get(layer)
+            if hits and (row, col) in hits:
+                hits.remove((row, col))
+                if not hits:
+                    del self._positions[old_keycode][layer]
+                    if not self._positions[old_keycode]:
+                        del self._positions[old_keycode]
+                self.frequencies[old_keycode] -= 1
+                if self.frequencies[old_keycode] <= 0:
+                    del self.frequencies[old_keycode]
+                self.layer_key_counts[layer] -= 1
+
+        if not is_no_key(new_keycode):
+            self._positions.setdefault(new_keycode, {}).setdefault(layer, []).append((row, col))
+            self.frequencies[new_keycode] += 1
+            self.layer_key_counts[layer] += 1
@@ -2,23 +2,126 @@
 Vial file loader module.
 """
 
-import json
-from typing import Dict, List, Any
+import glob
+import io
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple, Union
+from ..utils.json_stream import get_json_loads, read_sections
 from ..utils.logger import get_logger
+from .keymap import KeymapMatrix
+from .layout_index import LayoutIndex
+from .parse_cache import ParseCache
 
 logger = get_logger(__name__)
 
+# Sections needed to visualize a keymap; everything else in a backup
+# (macros, encoders, layout options...) can be skipped while parsing.
+LAYOUT_SECTIONS = ('layout',)
+
+
+class BulkLoadResult(NamedTuple):
+    """Outcome of loading one file with ``VialLoader.load_many``."""
+    path: str
+    num_layers: int = 0
+    dimensions: Optional[Tuple[int, int]] = None
+    layers: Optional[Any] = None
+    analysis: Optional[Any] = None
+    error: Optional[str] = None
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _init_bulk_worker() -> None:
+    """Keep per-file progress messages out of the console in pool workers."""
+    logger.setLevel(logging.WARNING)
+
+
+def _load_one(path: str, sections: Optional[Tuple[str, ...]],
+              include_layers: bool, analyze: Optional[Callable[[Any], Any]] = None) -> BulkLoadResult:
+    """Load and validate a single file for ``VialLoader.load_many``."""
+    try:
+        vil_data = VialLoader.load_file(path, sections)
+        if not isinstance(vil_data, dict):
+            raise ValueError("File does not contain a JSON object")
+        VialLoader.validate_layers(vil_data.get('layout'))
+        layers = VialLoader.extract_layers(vil_data)
+        return BulkLoadResult(
+            path=path,
+            num_layers=len(layers),
+            dimensions=VialLoader.get_key_dimensions(layers),
+            layers=layers if include_layers else None,
+            analysis=analyze(layers) if analyze is not None else None,
+        )
+    except Exception as e:
+        return BulkLoadResult(path=path, error=f"{type(e).__name__}: {e}")
+
+
+def _load_batch(paths: List[str], sections: Optional[Tuple[str, ...]],
+                include_layers: bool, analyze: Optional[Callable[[Any], Any]] = None) -> List[BulkLoadResult]:
+    """Load a batch of files in one worker task to amortize IPC overhead."""
+    return [_load_one(path, sections, include_layers, analyze) for path in paths]
+
+
+def _batched(items: Iterator[str], size: int) -> Iterator[List[str]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def expand_paths(paths_or_glob: Union[str, Iterable[str]]) -> Iterator[str]:
+    """
+    Expand a directory, glob pattern or iterable of paths lazily.
+
+    Args:
+        paths_or_glob: Directory (searched recursively for .vil files),
+            glob pattern (``**`` matches subdirectories), or iterable of paths
+
+    Yields:
+        File paths, in the order they are found
+    """
+    if isinstance(paths_or_glob, (str, os.PathLike)):
+        pattern = os.fspath(paths_or_glob)
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '**', '*.vil')
+        yield from glob.iglob(pattern, recursive=True)
+    else:
+        for path in paths_or_glob:
+            yield os.fspath(path)
+
 
 class VialLoader:
     """Handles loading and parsing of .vil files."""
     
+    def __init__(self, cache: Optional[ParseCache] = None):
+        """
+        Initialize the loader.
+        
+        Args:
+            cache: Optional parse cache consulted by ``load_cached``
+        """
+        self.cache = cache
+    
     @staticmethod
-    def load_file(filepath: str) -> Dict[str, Any]:
+    def load_file(filepath: str, sections: Optional[Iterable[str]] = None,
+                  json_backend: Optional[str] = None) -> Dict[str, Any]:
         """
         Load and parse a .vil JSON file.
         
         Args:
             filepath: Path to the .vil file
+            sections: Top-level sections to materialize (e.g. LAYOUT_SECTIONS).
+                If None, the whole file is parsed.
+            json_backend: JSON backend to use ('orjson', 'ujson', 'json'),
+                defaults to the fastest one installed
             
         Returns:
             Parsed JSON data as dictionary
@@ -30,14 +133,20 @@ class VialLoader:
         logger.info(f"Loading file: {filepath}")
         
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            logger.info(f"Successfully loaded file with {len(data.get('layout', []))} layers")
+            if sections is not None:
+                with open(filepath, 'rb') as f:
+                    data = VialLoader.load_stream(f, sections, json_backend)
+            else:
+                with open(filepath, 'rb') as f:
+                    data = get_json_loads(json_backend)(f.read())
+            layout = data.get('layout', [])
+            logger.info(f"Successfully loaded file with "
+                        f"{len(layout) if isinstance(layout, list) else 0} layers")
             return data
         except FileNotFoundError:
             logger.error(f"File not found: {filepath}")
             raise
-        except json.JSONDecodeError as e:
+        except ValueError as e:
             logger.error(f"Invalid JSON in file {filepath}: {e}")
             raise
         except Exception as e:
@@ -45,38 +154,267 @@ class VialLoader:
             raise
     
     @staticmethod
-    def extract_layers(vil_data: Dict[str, Any]) -> List[List[List[str]]]:
+    def load_stream(stream: IO, sections: Optional[Iterable[str]] = LAYOUT_SECTIONS,
+                    json_backend: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Incrementally parse .vil data from a file object or upload stream.
+        
+        Only the requested top-level sections are decoded; the others are
+        skipped without being materialized, and reading stops once all
+        requested sections have been found.
+        
+        Args:
+            stream: Binary or text file object (e.g. an uploaded file's stream)
+            sections: Top-level sections to materialize, or None for all
+            json_backend: JSON backend to use ('orjson', 'ujson', 'json'),
+                defaults to the fastest one installed
+            
+        Returns:
+            Dictionary containing the requested sections present in the data
+            
+        Raises:
+            json.JSONDecodeError: If the data is not a valid JSON object
+        """
+        data = read_sections(stream, sections, get_json_loads(json_backend))
+        logger.debug(f"Parsed sections {sorted(data)} from stream")
+        return data
+    
+    def load_cached(self, filepath: str, sections: Optional[Iterable[str]] = LAYOUT_SECTIONS,
+                    json_backend: Optional[str] = None) -> Mapping[str, Any]:
+        """
+        Load a .vil file through the parse cache.
+        
+        The file content is hashed; if the same content was parsed before,
+        the cached result is returned without parsing JSON again.
+        
+        Args:
+            filepath: Path to the .vil file
+            sections: Top-level sections to materialize, or None for all
+            json_backend: JSON backend to use on a cache miss
+            
+        Returns:
+            Immutable parsed data (lists are tuples, objects are read-only
+            mappings); a plain dict if the loader has no cache
+            
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            json.JSONDecodeError: If file is not valid JSON
+        """
+        if self.cache is None:
+            return self.load_file(filepath, sections, json_backend)
+        
+        logger.info(f"Loading file: {filepath}")
+        try:
+            with open(filepath, 'rb') as f:
+                content = f.read()
+        except FileNotFoundError:
+            logger.error(f"File not found: {filepath}")
+            raise
+        
+        key = self.cache.make_key(content, sections)
+        data = self.cache.get(key)
+        if data is not None:
+            logger.info(f"Parse cache hit for {filepath}")
+            return data
+        
+        try:
+            data = self.load_stream(io.BytesIO(content), sections, json_backend)
+        except ValueError as e:
+            logger.error(f"Invalid JSON in file {filepath}: {e}")
+            raise
+        logger.info(f"Successfully loaded file with {len(data.get('layout', []))} layers")
+        return self.cache.put(key, data)
+    
+    @staticmethod
+    def extract_layers(vil_data: Dict[str, Any], compact: bool = False):
         """
         Extract layer data from vil JSON structure.
         
         Args:
             vil_data: Parsed .vil file data
+            compact: Return a KeymapMatrix instead of nested lists
             
         Returns:
             List of layers, where each layer is a list of rows,
-            and each row is a list of keycodes
+            and each row is a list of keycodes (or the equivalent KeymapMatrix)
         """
         layers = vil_data.get('layout', [])
         logger.debug(f"Extracted {len(layers)} layers from data")
+        if compact:
+            return KeymapMatrix.from_layers(layers)
         return layers
     
+    @staticmethod
+    def validate_layers(layers: Any) -> None:
+        """
+        Check that layer data has the layers -> rows -> keycodes structure.
+        
+        Args:
+            layers: Layer data as returned by ``extract_layers``
+            
+        Raises:
+            ValueError: If the structure is not a valid layout
+        """
+        if isinstance(layers, KeymapMatrix):
+            return
+        if not isinstance(layers, (list, tuple)) or not layers:
+            raise ValueError("Layout must be a non-empty list of layers")
+        for layer_idx, layer in enumerate(layers):
+            if not isinstance(layer, (list, tuple)):
+                raise ValueError(f"Layer {layer_idx} is not a list of rows")
+            for row_idx, row in enumerate(layer):
+                if not isinstance(row, (list, tuple)):
+                    raise ValueError(f"Layer {layer_idx}, row {row_idx} is not a list of keycodes")
+                for keycode in row:
+                    if not isinstance(keycode, (str, int)) or isinstance(keycode, bool):
+                        raise ValueError(f"Layer {layer_idx}, row {row_idx} contains "
+                                         f"invalid keycode {keycode!r}")
+    
+    @staticmethod
+    def load_many(paths_or_glob: Union[str, Iterable[str]], workers: Optional[int] = None,
+                  sections: Optional[Iterable[str]] = LAYOUT_SECTIONS,
+                  include_layers: bool = False, batch_size: int = 16,
+                  max_pending: Optional[int] = None,
+                  analyze: Optional[Callable[[Any], Any]] = None) -> Iterator[BulkLoadResult]:
+        """
+        Load and validate many .vil files in a process pool.
+        
+        Results are yielded as batches complete (not in input order). At most
+        ``max_pending`` batches are in flight at once, so memory stays bounded
+        for arbitrarily large collections. Failures are reported in the
+        result's ``error`` field instead of aborting the run.
+        
+        Args:
+            paths_or_glob: Directory (searched recursively for *.vil), glob
+                pattern, or iterable of file paths
+            workers: Number of worker processes (default: CPU count);
+                1 loads in the current process
+            sections: Top-level sections to parse (None for all)
+            include_layers: Return the layer data with each result
+            batch_size: Number of files handed to a worker per task
+            max_pending: Maximum number of submitted, unfinished batches
+                (default: 4 per worker)
+            analyze: Optional picklable function run on each file's layers in
+                the worker; its return value is stored in ``analysis``, so only
+                the (small) result crosses the process boundary
+            
+        Yields:
+            BulkLoadResult for each file
+        """
+        workers = workers or os.cpu_count() or 1
+        max_pending = max_pending or workers * 4
+        sections = tuple(sections) if sections is not None else None
+        paths = expand_paths(paths_or_glob)
+        
+        logger.info(f"Bulk loading with {workers} worker(s)")
+        loaded = failed = 0
+        
+        if workers == 1:
+            results = (_load_one(path, sections, include_layers, analyze) for path in paths)
+        else:
+            results = VialLoader._load_in_pool(_batched(paths, batch_size), workers,
+                                               sections, include_layers, max_pending, analyze)
+        
+        for result in results:
+            if result.ok:
+                loaded += 1
+            else:
+                failed += 1
+                logger.warning(f"Failed to load {result.path}: {result.error}")
+            yield result
+        
+        logger.info(f"Bulk load finished: {loaded} loaded, {failed} failed")
+    
+    @staticmethod
+    def _load_in_pool(batches: Iterator[List[str]], workers: int,
+                      sections: Optional[Tuple[str, ...]], include_layers: bool,
+                      max_pending: int,
+                      analyze: Optional[Callable[[Any], Any]] = None) -> Iterator[BulkLoadResult]:
+        """
+        Run ``_load_batch`` over batches with a bounded number of pending futures.
+        
+        A batch whose task fails (e.g. ``BrokenProcessPool`` after a worker
+        was killed) is reported as failed results, and a broken pool is
+        replaced so the remaining batches still load.
+        """
+        # Imported here: multiprocessing is only needed for bulk loads
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+        
+        def new_pool():
+            return ProcessPoolExecutor(max_workers=workers, initializer=_init_bulk_worker)
+        
+        def results_of(done):
+            for future in done:
+                batch = pending.pop(future)
+                try:
+                    yield from future.result()
+                except Exception as e:
+                    logger.error(f"Batch of {len(batch)} file(s) failed: {type(e).__name__}: {e}")
+                    for path in batch:
+                        yield BulkLoadResult(path=path, error=f"{type(e).__name__}: {e}")
+        
+        pool = new_pool()
+        pending = {}
+        try:
+            for batch in batches:
+                try:
+                    future = pool.submit(_load_batch, batch, sections, include_layers, analyze)
+                except BrokenProcessPool:
+                    logger.warning("Worker pool broke, starting a new one")
+                    pool.shutdown(wait=False)
+                    pool = new_pool()
+                    future = pool.submit(_load_batch, batch, sections, include_layers, analyze)
+                pending[future] = batch
+                if len(pending) >= max_pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from results_of(done)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from results_of(done)
+        finally:
+            pool.shutdown()
+    
+    @staticmethod
+    def build_index(layers: Any) -> LayoutIndex:
+        """
+        Build a LayoutIndex (dimensions, key counts, keycode positions) in one pass.
+        
+        Args:
+            layers: List of all layers, or a KeymapMatrix
+            
+        Returns:
+            LayoutIndex for the layers
+        """
+        return LayoutIndex.build(layers)
+    
     @staticmethod
     def get_key_dimensions(layers: List[List[List[str]]]) -> tuple:
         """
         Determine the maximum dimensions of the keyboard.
         
         Args:
-            layers: List of all layers
+            layers: List of all layers, a KeymapMatrix, or a LayoutIndex
             
         Returns:
             Tuple of (max_rows, max_cols)
         """
+        if isinstance(layers, LayoutIndex):
+            return layers.dimensions
+        
         if not layers:
             logger.warning("No layers found in data")
             return 0, 0
         
-        max_rows = max(len(layer) for layer in layers)
-        max_cols = max(len(row) for layer in layers for row in layer)
+        if isinstance(layers, KeymapMatrix):
+            return layers.num_rows, layers.num_cols
+        
+        # Single pass over the layers
+        max_rows = max_cols = 0
+        for layer in layers:
+            max_rows = max(max_rows, len(layer))
+            for row in layer:
+                max_cols = max(max_cols, len(row))
         
         logger.debug(f"Keyboard dimensions: {max_rows} rows x {max_cols} cols")
         return max_rows, max_cols
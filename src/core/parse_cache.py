@@ -0,0 +1,189 @@
+"""
+Content-addressed cache of parsed .vil data.
+"""
+
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional, Union
+from ..utils.json_stream import read_sections
+from ..utils.logger import get_logger
+from .render_cache import RenderCache
+
+logger = get_logger(__name__)
+
+
+def freeze(value: Any) -> Any:
+    """
+    Recursively convert parsed JSON into an immutable structure.
+
+    Lists become tuples and dictionaries become read-only mappings, so cached
+    layouts can be handed out to any number of callers without copying.
+    """
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    return value
+
+
+class ParseCache:
+    """
+    Bounded LRU cache of parsed .vil sections with an optional disk tier.
+
+    The disk tier is a byte-budgeted LRU store (see ``RenderCache``), so a
+    long-running server does not fill the disk.
+
+    Entries are keyed by the Vial ``uid`` and the SHA-256 of the file
+    content, plus the set of requested sections, so re-uploading the same
+    backup under any filename hits the cache. Cached values are frozen
+    (see ``freeze``) and shared between callers.
+    """
+
+    def __init__(self, max_entries: int = 128,
+                 cache_dir: Optional[Union[str, Path]] = None,
+                 max_disk_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of parsed files kept in memory
+            cache_dir: Optional directory for the on-disk cache
+            max_disk_bytes: Size of the on-disk cache above which least
+                recently used entries are deleted
+        """
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._disk = RenderCache(self.cache_dir, max_bytes=max_disk_bytes) if self.cache_dir else None
+        self._entries: 'OrderedDict[str, Mapping[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(content: bytes, sections: Optional[Iterable[str]] = None) -> str:
+        """
+        Build the cache key for raw file content.
+
+        Args:
+            content: Raw .vil file content
+            sections: Requested sections (None for the whole file)
+
+        Returns:
+            Key of the form ``<uid>-<sha256>-<sections>``
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        try:
+            # Stops at the uid, which Vial writes before the layout; without a
+            # uid the whole document is scanned (values skipped, not decoded)
+            uid = read_sections(io.BytesIO(content), ['uid'], json.loads).get('uid')
+        except ValueError:
+            uid = None
+        if not isinstance(uid, int):
+            uid = 'nouid'
+        section_part = '+'.join(sorted(sections)) if sections is not None else 'all'
+        return f"{uid}-{digest}-{section_part}"
+
+    def get(self, key: str) -> Optional[Mapping[str, Any]]:
+        """
+        Look up parsed data, checking memory first and then the disk cache.
+
+        Args:
+            key: Key from ``make_key``
+
+        Returns:
+            Frozen parsed data, or None on a miss
+        """
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+
+        data = self._read_disk(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, data)
+        return data
+
+    def put(self, key: str, data: Dict[str, Any]) -> Mapping[str, Any]:
+        """
+        Store parsed data.
+
+        Args:
+            key: Key from ``make_key``
+            data: Parsed sections, as returned by the JSON parser
+
+        Returns:
+            The frozen data as stored in the cache
+        """
+        frozen = freeze(data)
+        with self._lock:
+            self._store(key, frozen)
+        self._write_disk(key, data)
+        return frozen
+
+    def _store(self, key: str, frozen: Mapping[str, Any]) -> None:
+        self._entries[key] = frozen
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self.evictions += 1
+            logger.debug(f"Evicted parse cache entry {evicted}")
+
+    def _read_disk(self, key: str) -> Optional[Mapping[str, Any]]:
+        if self._disk is None:
+            return None
+        raw = self._disk.load(key, '.json')
+        if raw is None:
+            return None
+        try:
+            return freeze(json.loads(raw))
+        except ValueError as e:
+            logger.warning(f"Ignoring unreadable parse cache entry {key}: {e}")
+            return None
+
+    def _write_disk(self, key: str, data: Dict[str, Any]) -> None:
+        if self._disk is not None:
+            self._disk.save(key, '.json', json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss statistics.
+
+        Returns:
+            Dictionary with hits, disk_hits, misses, evictions, size, hit_rate
+            and, with a disk tier, its entries and bytes
+        """
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            stats = {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+        if self._disk is not None:
+            disk = self._disk.stats()
+            stats.update(disk_entries=disk['entries'], disk_bytes=disk['bytes'],
+                         disk_evictions=disk['evictions'])
+        return stats
+
+    def clear(self) -> None:
+        """Drop all in-memory entries and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = self.evictions = 0
@@ -0,0 +1,251 @@
+"""
+Content-addressed cache of rendered visualizations.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+from ..utils.logger import get_logger
+from .keymap import layer_digest, row_cells, row_digest
+
+logger = get_logger(__name__)
+
+
+def display_digest(keys: Iterable[Tuple[int, int, str, bool]]) -> str:
+    """
+    Hash the keys a visualizer draws for one layer.
+
+    Args:
+        keys: (row, col, keycode, inherited) tuples, as yielded by
+            ``iter_display_keys``
+
+    Returns:
+        Hex digest; equal for layers that display identically
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for row, col, keycode, inherited in keys:
+        digest.update(f"{row},{col},{keycode},{int(inherited)}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    Size-bounded on-disk LRU cache of rendered files (PNG, HTML...).
+
+    Entries are keyed by a hash of the keymap content and everything that
+    affects the output (dimensions, renderer options and version, colors),
+    so the same keymap viewed again with the same options is served by
+    copying the stored file instead of rendering it. Recency is tracked
+    with file modification times, so the LRU order survives restarts.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path], max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the cached files
+            max_bytes: Total size above which least recently used entries
+                are evicted
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, int]' = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Rebuild the LRU order from the files left by earlier runs
+        existing = []
+        for path in self.cache_dir.iterdir():
+            if path.is_file() and not path.name.endswith('.tmp'):
+                stat = path.stat()
+                existing.append((stat.st_mtime, path.name, stat.st_size))
+        for _, name, size in sorted(existing):
+            self._entries[name] = size
+            self._size += size
+        self._evict()
+
+    @staticmethod
+    def make_key(layers: Any = (), **options: Any) -> str:
+        """
+        Build the cache key of a rendering.
+
+        Args:
+            layers: Layers to render (lists of rows), or a KeymapMatrix;
+                may be empty when the options already identify the content
+                (e.g. a ``display_digest``)
+            **options: Everything else the output depends on (renderer
+                name and version, dimensions, display options, colors);
+                values must be JSON-serializable
+
+        Returns:
+            Hex SHA-256 key
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps(options, sort_keys=True, default=str).encode('utf-8'))
+        digest.update(len(layers).to_bytes(4, 'little'))
+        for layer in layers:
+            digest.update(layer_digest([row_digest(row_cells(row)) for row in layer]))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _name(key: str, suffix: str) -> str:
+        return f"{key}{suffix}"
+
+    def _lookup(self, name: str) -> Optional[Path]:
+        """Path of a cached entry (marked as recently used), or None on a miss."""
+        with self._lock:
+            if name not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(name)
+        return self.cache_dir / name
+
+    def _unreadable(self, name: str, error: Exception) -> None:
+        logger.warning(f"Dropping unreadable cache entry {self.cache_dir / name}: {error}")
+        with self._lock:
+            self._drop(name)
+            self.misses += 1
+
+    def _add(self, name: str, write) -> None:
+        """Atomically write an entry with ``write(tmp_path)`` and account for its size."""
+        path = self.cache_dir / name
+        tmp_path = path.with_name(f"{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+            size = path.stat().st_size
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {self.cache_dir / name}: {e}")
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._size -= self._entries.pop(name, 0)
+            self._entries[name] = size
+            self._size += size
+            self._evict()
+
+    def fetch(self, key: str, output_file: Union[str, Path]) -> bool:
+        """
+        Copy a cached rendering to ``output_file``.
+
+        Args:
+            key: Key from ``make_key``
+            output_file: Destination; its extension selects the entry
+
+        Returns:
+            True on a hit, False if the rendering must be produced
+        """
+        name = self._name(key, Path(output_file).suffix)
+        path = self._lookup(name)
+        if path is None:
+            return False
+        try:
+            shutil.copyfile(path, output_file)
+            os.utime(path)
+        except OSError as e:
+            self._unreadable(name, e)
+            return False
+        with self._lock:
+            self.hits += 1
+        logger.info(f"Render cache hit for {output_file}")
+        return True
+
+    def store(self, key: str, output_file: Union[str, Path]) -> None:
+        """
+        Add a freshly rendered file to the cache.
+
+        Args:
+            key: Key from ``make_key``
+            output_file: Rendered file; its extension is part of the entry
+        """
+        self._add(self._name(key, Path(output_file).suffix),
+                  lambda tmp_path: shutil.copyfile(output_file, tmp_path))
+
+    def load(self, key: str, suffix: str) -> Optional[bytes]:
+        """
+        Read a cached fragment (e.g. a layer tile).
+
+        Args:
+            key: Key from ``make_key``
+            suffix: Entry type, such as '.png'
+
+        Returns:
+            The stored bytes, or None on a miss
+        """
+        name = self._name(key, suffix)
+        path = self._lookup(name)
+        if path is None:
+            return None
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError as e:
+            self._unreadable(name, e)
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def save(self, key: str, suffix: str, data: bytes) -> None:
+        """
+        Store a fragment produced while rendering.
+
+        Args:
+            key: Key from ``make_key``
+            suffix: Entry type, such as '.png'
+            data: Content to store
+        """
+        self._add(self._name(key, suffix), lambda tmp_path: Path(tmp_path).write_bytes(data))
+
+    def _drop(self, name: str) -> None:
+        self._size -= self._entries.pop(name, 0)
+        try:
+            (self.cache_dir / name).unlink()
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            name = next(iter(self._entries))
+            self._drop(name)
+            self.evictions += 1
+            logger.debug(f"Evicted cache entry {self.cache_dir / name}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss statistics.
+
+        Returns:
+            Dictionary with hits, misses, evictions, entries, bytes and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        """Delete every cached file and reset the statistics."""
+        with self._lock:
+            for name in list(self._entries):
+                self._drop(name)
+            self.hits = self.misses = self.evictions = 0
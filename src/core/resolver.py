@@ -0,0 +1,278 @@
+"""
+Effective keymap resolution through the QMK layer stack.
+"""
+
+from collections import OrderedDict, deque
+from itertools import combinations
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Sequence, Tuple
+from ..utils.keycode_parser import TRANSPARENT_NAMES, layer_action, parse_keycode
+from ..utils.logger import get_logger
+from .keymap import NO_KEY, KeymapMatrix, iter_layer_keys, load_numpy
+
+logger = get_logger(__name__)
+
+TRANSPARENT_KEYCODES = tuple(sorted(TRANSPARENT_NAMES))
+
+
+def parse_layer_action(keycode: Any) -> Optional[Tuple[str, int]]:
+    """
+    Get the layer action of a keycode.
+
+    Args:
+        keycode: Raw keycode, e.g. MO(1), LT2(KC_SPACE) or LM(1, MOD_LSFT)
+
+    Returns:
+        Tuple of (action, target layer), e.g. ('MO', 1) or ('LT', 2),
+        or None for keys that do not change layers
+    """
+    return layer_action(parse_keycode(keycode))
+
+
+def iter_display_keys(layer_data: Any, layer_index: int,
+                      resolver: Optional['KeymapResolver'] = None) -> Iterator[Tuple[int, int, str, bool]]:
+    """
+    Yield the keys a visualizer should draw for a layer.
+
+    Args:
+        layer_data: The layer (list of rows, or a LayerView)
+        layer_index: Index of the layer
+        resolver: KeymapResolver for the "resolved" display mode, or None
+            to show the layer's own keys
+
+    Yields:
+        Tuples of (row, col, keycode, inherited)
+    """
+    if resolver is not None:
+        yield from resolver.iter_resolved_keys(layer_index)
+        return
+    for row_idx, col_idx, keycode in iter_layer_keys(layer_data):
+        yield row_idx, col_idx, keycode, False
+
+
+def next_layer_state(default: int, active: FrozenSet[int], action: str,
+                     target: int) -> Tuple[int, FrozenSet[int]]:
+    """
+    Apply a layer action to a (default layer, active layers) state.
+
+    MO/LT/LM/TG/TT/OSL turn the target layer on, TO turns it on and every
+    other non-default layer off, and DF makes it the default layer.
+    """
+    if action == 'DF':
+        return target, (active - {default}) | {target}
+    if action == 'TO':
+        return default, frozenset((default, target))
+    return default, active | {target}
+
+
+class KeymapResolver:
+    """
+    Computes the effective key at every position for a set of active layers.
+
+    Follows QMK semantics: the highest active layer wins and transparent keys
+    fall through to the next lower active layer. Resolution works on the
+    integer symbol ids of a KeymapMatrix (vectorized with NumPy when the
+    matrix is NumPy-backed) and every resolved layer combination is memoized; a
+    combination is built from the memoized result of the same combination
+    without its top layer, so enumerating many combinations costs one
+    array operation each.
+    """
+
+    def __init__(self, layers: Any, default_layer: int = 0, max_cached: int = 4096):
+        """
+        Initialize the resolver.
+
+        Args:
+            layers: List of all layers, or a KeymapMatrix
+            default_layer: Default (base) layer index
+            max_cached: Maximum number of memoized layer combinations
+        """
+        self.matrix = KeymapMatrix.from_layers(layers)
+        self.default_layer = default_layer
+        self.max_cached = max_cached
+        self._plane_size = self.matrix.num_rows * self.matrix.num_cols
+        self._cache: 'OrderedDict[FrozenSet[int], Sequence[int]]' = OrderedDict()
+        self._stacks: Optional[Dict[int, Tuple[int, ...]]] = None
+        self.hits = 0
+        self.misses = 0
+
+        self._transparent_ids = frozenset(
+            symbol_id for symbol_id, keycode in enumerate(self.matrix.symbols.keycodes)
+            if parse_keycode(keycode).kind == 'transparent'
+        )
+
+        # NumPy is already loaded for a NumPy-backed matrix
+        self._np = np = load_numpy() if self.matrix.uses_numpy else None
+        if np is not None:
+            planes = np.asarray(self.matrix.flat, dtype=np.int32).reshape(
+                len(self.matrix), self._plane_size)
+            self._planes = planes
+            self._transparent = np.isin(planes, list(self._transparent_ids))
+        else:
+            self._planes = [self.matrix[i].ids() for i in range(len(self.matrix))]
+            self._transparent = [[symbol_id in self._transparent_ids for symbol_id in plane]
+                                 for plane in self._planes]
+
+    def resolve(self, active_layers: Sequence[int]) -> Sequence[int]:
+        """
+        Resolve the effective symbol ids for a set of active layers.
+
+        Args:
+            active_layers: Indices of the active layers
+
+        Returns:
+            Read-only row-major sequence of symbol ids (NO_KEY for empty positions)
+
+        Raises:
+            ValueError: If no layer or an out-of-range layer is given
+        """
+        key = frozenset(active_layers)
+        if not key:
+            raise ValueError("At least one active layer is required")
+        if min(key) < 0 or max(key) >= len(self.matrix):
+            raise ValueError(f"Active layers {sorted(key)} out of range (0-{len(self.matrix)-1})")
+        return self._resolve(key)
+
+    def _resolve(self, key: FrozenSet[int]) -> Sequence[int]:
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached
+        self.misses += 1
+
+        np = self._np
+        top = max(key)
+        if len(key) == 1:
+            result = self._planes[top]
+            if np is None:
+                result = tuple(result)
+        else:
+            below = self._resolve(key - {top})
+            if np is not None:
+                result = np.where(self._transparent[top], below, self._planes[top])
+                result.setflags(write=False)
+            else:
+                result = tuple(low if transparent else own for own, transparent, low
+                               in zip(self._planes[top], self._transparent[top], below))
+
+        self._cache[key] = result
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        return result
+
+    def activation_keys(self) -> List[Tuple[int, int, int, str, int]]:
+        """
+        Find every key that changes layers.
+
+        Returns:
+            List of (layer, row, col, action, target_layer)
+        """
+        actions = {}
+        for symbol_id, keycode in enumerate(self.matrix.symbols.keycodes):
+            action = parse_layer_action(keycode)
+            if action is not None and 0 <= action[1] < len(self.matrix):
+                actions[symbol_id] = action
+
+        keys = []
+        for layer_idx in range(len(self.matrix)):
+            for row, col, symbol_id in self.matrix[layer_idx].iter_key_ids():
+                if symbol_id in actions:
+                    keys.append((layer_idx, row, col) + actions[symbol_id])
+        return keys
+
+    def activation_stack(self, layer: int) -> Tuple[int, ...]:
+        """
+        Get the active layers when ``layer`` is reached from the default layer.
+
+        Layers are reached breadth-first through the activation keys, so the
+        stack follows the shortest chain of layer keys. Layers that no key
+        activates are resolved on top of the default layer alone.
+
+        Args:
+            layer: Layer index
+
+        Returns:
+            Sorted tuple of active layer indices
+        """
+        if self._stacks is None:
+            self._stacks = self._compute_stacks()
+        return self._stacks.get(layer, tuple(sorted({self.default_layer, layer})))
+
+    def _compute_stacks(self) -> Dict[int, Tuple[int, ...]]:
+        edges: Dict[int, List[Tuple[str, int]]] = {}
+        for layer_idx, _, _, action, target in self.activation_keys():
+            edges.setdefault(layer_idx, []).append((action, target))
+
+        start = frozenset((self.default_layer,))
+        states = {self.default_layer: (self.default_layer, start)}
+        queue = deque([self.default_layer])
+        while queue:
+            layer_idx = queue.popleft()
+            default, active = states[layer_idx]
+            for action, target in edges.get(layer_idx, ()):
+                if target not in states:
+                    states[target] = next_layer_state(default, active, action, target)
+                    queue.append(target)
+        return {layer_idx: tuple(sorted(active)) for layer_idx, (_, active) in states.items()}
+
+    def resolve_layer(self, layer: int) -> Sequence[int]:
+        """Resolve the effective symbol ids while ``layer`` is on top of its activation stack."""
+        stack = [l for l in self.activation_stack(layer) if l <= layer]
+        return self.resolve(stack)
+
+    def iter_resolved_keys(self, layer: int) -> Iterator[Tuple[int, int, str, bool]]:
+        """
+        Yield the effective key of every position of a layer.
+
+        Args:
+            layer: Layer index
+
+        Yields:
+            Tuples of (row, col, effective keycode, inherited), where
+            ``inherited`` is True when the layer's own key is transparent and
+            the effective key comes from a lower layer
+        """
+        keycodes = self.matrix.symbols.keycodes
+        cols = self.matrix.num_cols
+        own = self._planes[layer]
+        resolved = self.resolve_layer(layer)
+        if self._np is not None:
+            own, resolved = own.tolist(), resolved.tolist()
+        for pos, (own_id, symbol_id) in enumerate(zip(own, resolved)):
+            if symbol_id == NO_KEY:
+                continue
+            yield pos // cols, pos % cols, keycodes[symbol_id], own_id != symbol_id
+
+    def resolved_matrix(self) -> KeymapMatrix:
+        """Get a KeymapMatrix where every layer holds its resolved keys."""
+        planes = [self.resolve_layer(layer) for layer in range(len(self.matrix))]
+        np = self._np
+        if np is not None:
+            flat = np.concatenate(planes) if planes else np.zeros(0, dtype=np.int32)
+        else:
+            flat = self.matrix.flat[:0]
+            for plane in planes:
+                flat.extend(plane)
+        return KeymapMatrix(self.matrix.symbols, flat, self.matrix.shape)
+
+    def iter_combinations(self, include_default: bool = True) -> Iterator[Tuple[Tuple[int, ...], Sequence[int]]]:
+        """
+        Resolve every combination of active layers.
+
+        Args:
+            include_default: Only yield combinations containing the default layer
+
+        Yields:
+            Tuples of (active layers, resolved symbol ids)
+        """
+        others = [l for l in range(len(self.matrix))
+                  if not (include_default and l == self.default_layer)]
+        base = (self.default_layer,) if include_default else ()
+        for size in range(0 if include_default else 1, len(others) + 1):
+            for combo in combinations(others, size):
+                active = tuple(sorted(base + combo))
+                yield active, self._resolve(frozenset(active))
+
+    def cache_info(self) -> Dict[str, int]:
+        """Memoization statistics (hits, misses, size)."""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._cache)}
@@ -0,0 +1,400 @@
+"""
+Batch keycode transformation rules.
+
+A rule file is JSON with a list of rules, applied to every key in one pass:
+
+    {
+        "rules": [
+            {"type": "exact", "from": "KC_TRNS", "to": "KC_NO", "layers": [4]},
+            {"type": "glob", "match": "KC_F1?", "to": "KC_NO"},
+            {"type": "regex", "match": "^KC_KP_(\\\\d)$", "to": "KC_\\\\1"},
+            {"type": "wrap", "match": "KC_[0-9]", "wrapper": "LSFT"},
+            {"type": "tap", "from": "KC_SPACE", "to": "KC_ENTER"},
+            {"type": "position", "layer": 1, "row": 0, "col": 3, "to": "KC_ESC"}
+        ]
+    }
+
+Position rules take precedence; for every other key the first matching
+keycode rule (in file order) wins. ``layers`` limits a rule to some layers.
+Tap rules replace the key inside modifier, mod-tap and layer-tap wrappers,
+so the example above also turns ``LT2(KC_SPACE)`` into ``LT2(KC_ENTER)``.
+"""
+
+import fnmatch
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from ..utils.keycode_parser import ModWrap, format_keycode, normalize_keycode, parse_keycode, replace_tap_key
+from ..utils.logger import get_logger
+from .keymap import NO_KEY, KeymapMatrix, is_no_key
+from .layout_index import LayoutIndex
+
+logger = get_logger(__name__)
+
+Change = Tuple[int, int, int, Any, Any]
+
+
+class Rule:
+    """Base class for keycode rules."""
+
+    def __init__(self, layers: Optional[Iterable[int]] = None):
+        self.layers = frozenset(layers) if layers is not None else None
+
+    def applies_to_layer(self, layer: int) -> bool:
+        return self.layers is None or layer in self.layers
+
+    def apply(self, keycode: str) -> Optional[str]:
+        """Return the replacement for a keycode, or None if the rule does not match."""
+        raise NotImplementedError
+
+
+class ExactRule(Rule):
+    """Replace one keycode (in any spelling, e.g. ``LT(2, KC_A)`` or ``LT2(KC_A)``) with another."""
+
+    def __init__(self, old_keycode: str, new_keycode: str, layers: Optional[Iterable[int]] = None):
+        super().__init__(layers)
+        self.old_keycode = normalize_keycode(old_keycode)
+        self.new_keycode = new_keycode
+
+    def apply(self, keycode: str) -> Optional[str]:
+        return self.new_keycode if normalize_keycode(keycode) == self.old_keycode else None
+
+
+class PatternRule(Rule):
+    """Replace keycodes matching a regular expression (``to`` may use backreferences)."""
+
+    def __init__(self, pattern: str, new_keycode: str, layers: Optional[Iterable[int]] = None):
+        super().__init__(layers)
+        self.pattern = re.compile(pattern)
+        self.new_keycode = new_keycode
+
+    def apply(self, keycode: str) -> Optional[str]:
+        match = self.pattern.fullmatch(keycode)
+        return match.expand(self.new_keycode) if match else None
+
+
+class GlobRule(PatternRule):
+    """Replace keycodes matching a shell-style pattern (e.g. ``KC_F*``)."""
+
+    def __init__(self, pattern: str, new_keycode: str, layers: Optional[Iterable[int]] = None):
+        super().__init__(fnmatch.translate(pattern), new_keycode.replace('\\', '\\\\'), layers)
+
+
+class WrapRule(Rule):
+    """Wrap matching keycodes in a function, e.g. ``KC_X`` -> ``LSFT(KC_X)``."""
+
+    def __init__(self, pattern: str, wrapper: str, layers: Optional[Iterable[int]] = None):
+        super().__init__(layers)
+        self.pattern = re.compile(fnmatch.translate(pattern))
+        self.wrapper = wrapper
+
+    def apply(self, keycode: str) -> Optional[str]:
+        if self.pattern.match(keycode):
+            return format_keycode(ModWrap(self.wrapper, parse_keycode(keycode)))
+        return None
+
+
+class TapRule(Rule):
+    """Replace a key wherever it is sent, e.g. ``KC_SPC`` in ``LSFT(KC_SPC)`` or ``LT1(KC_SPC)``."""
+
+    def __init__(self, old_keycode: str, new_keycode: str, layers: Optional[Iterable[int]] = None):
+        super().__init__(layers)
+        self.old_key = parse_keycode(old_keycode)
+        self.new_key = parse_keycode(new_keycode)
+
+    def apply(self, keycode: str) -> Optional[str]:
+        node = parse_keycode(keycode)
+        replaced = replace_tap_key(node, self.old_key, self.new_key)
+        return format_keycode(replaced) if replaced is not node else None
+
+
+class PositionRule(Rule):
+    """Set the keycode at one position."""
+
+    def __init__(self, layer: int, row: int, col: int, new_keycode: str):
+        super().__init__([layer])
+        self.layer = layer
+        self.row = row
+        self.col = col
+        self.new_keycode = new_keycode
+
+    def apply(self, keycode: str) -> Optional[str]:
+        return self.new_keycode
+
+
+def rule_from_dict(spec: Dict[str, Any]) -> Rule:
+    """
+    Build a rule from its JSON description.
+
+    Args:
+        spec: Rule description (see module docstring)
+
+    Returns:
+        Rule instance
+
+    Raises:
+        ValueError: If the rule type is unknown or fields are missing
+    """
+    if not isinstance(spec, dict):
+        raise ValueError(f"Rule {spec!r} is not an object")
+    kind = spec.get('type', 'exact')
+    layers = spec.get('layers')
+    try:
+        if kind == 'exact':
+            return ExactRule(spec['from'], spec['to'], layers)
+        if kind == 'glob':
+            return GlobRule(spec['match'], spec['to'], layers)
+        if kind == 'regex':
+            return PatternRule(spec['match'], spec['to'], layers)
+        if kind == 'wrap':
+            return WrapRule(spec['match'], spec['wrapper'], layers)
+        if kind == 'tap':
+            return TapRule(spec['from'], spec['to'], layers)
+        if kind == 'position':
+            return PositionRule(int(spec['layer']), int(spec['row']), int(spec['col']), spec['to'])
+    except KeyError as e:
+        raise ValueError(f"Rule {spec!r} is missing field {e}") from None
+    except re.error as e:
+        raise ValueError(f"Rule {spec!r} has an invalid pattern: {e}") from None
+    raise ValueError(f"Unknown rule type '{kind}'")
+
+
+class RuleSet:
+    """
+    Compiled set of transformation rules.
+
+    Compiling groups the keycode rules by the layers they apply to and
+    turns each group into a memoized keycode -> replacement dispatch table
+    (pre-filled with the exact rules), so applying dozens of rules costs one
+    dict lookup per key. Position rules become a per-layer position table.
+    """
+
+    def __init__(self, rules: Iterable[Rule]):
+        """
+        Initialize and compile the rule set.
+
+        Args:
+            rules: Rules in priority order
+        """
+        self.rules = list(rules)
+        self._positions: Dict[int, Dict[Tuple[int, int], str]] = {}
+        self._keycode_rules = [r for r in self.rules if not isinstance(r, PositionRule)]
+        self._tables: Dict[Tuple[int, ...], Tuple[Dict[str, Optional[str]], List[Rule]]] = {}
+        self._layer_groups: Dict[int, Tuple[int, ...]] = {}
+
+        for rule in self.rules:
+            if isinstance(rule, PositionRule):
+                self._positions.setdefault(rule.layer, {}).setdefault((rule.row, rule.col), rule.new_keycode)
+
+        logger.debug(f"Compiled {len(self.rules)} rules")
+
+    @classmethod
+    def from_json(cls, data: Any) -> 'RuleSet':
+        """
+        Build a rule set from parsed JSON.
+
+        Args:
+            data: Object with a "rules" list, or a bare list of rule descriptions
+
+        Returns:
+            Compiled RuleSet
+
+        Raises:
+            ValueError: If the data contains invalid rules
+        """
+        specs = data.get('rules', []) if isinstance(data, dict) else data
+        if not isinstance(specs, list):
+            raise ValueError("Rules must be a list of rule objects")
+        return cls(rule_from_dict(spec) for spec in specs)
+
+    @classmethod
+    def from_file(cls, filepath: str) -> 'RuleSet':
+        """
+        Load a rule set from a JSON file.
+
+        Args:
+            filepath: Path to a JSON file with a "rules" list (or a bare list)
+
+        Returns:
+            Compiled RuleSet
+
+        Raises:
+            FileNotFoundError: If file doesn't exist
+            ValueError: If the file is not valid JSON or contains invalid rules
+        """
+        logger.info(f"Loading rules from {filepath}")
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls.from_json(data)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def _table_for_layer(self, layer: int) -> Optional[Tuple[Dict[str, Optional[str]], List[Rule]]]:
+        """Get the (dispatch table, rules) pair shared by layers with the same rules."""
+        group = self._layer_groups.get(layer)
+        if group is None:
+            group = tuple(i for i, rule in enumerate(self._keycode_rules)
+                          if rule.applies_to_layer(layer))
+            self._layer_groups[layer] = group
+        if not group:
+            return None
+
+        compiled = self._tables.get(group)
+        if compiled is None:
+            table = {}
+            rules = [self._keycode_rules[i] for i in group]
+            for rule in rules:
+                if isinstance(rule, ExactRule) and rule.old_keycode not in table:
+                    table[rule.old_keycode] = self._evaluate(rules, rule.old_keycode)
+            compiled = self._tables[group] = (table, rules)
+        return compiled
+
+    @staticmethod
+    def _evaluate(rules: List[Rule], keycode: str) -> Optional[str]:
+        for rule in rules:
+            result = rule.apply(keycode)
+            if result is not None:
+                return result if result != keycode else None
+        return None
+
+    def lookup(self, layer: int, keycode: str) -> Optional[str]:
+        """
+        Get the replacement for a keycode in a layer (position rules excluded).
+
+        Returns:
+            New keycode, or None if no rule changes it
+        """
+        compiled = self._table_for_layer(layer)
+        if compiled is None:
+            return None
+        table, rules = compiled
+        try:
+            return table[keycode]
+        except KeyError:
+            result = table[keycode] = self._evaluate(rules, keycode)
+            return result
+
+    def apply(self, layers: Any, layer_indices: Optional[Iterable[int]] = None,
+              index: Optional[LayoutIndex] = None) -> Tuple[Any, List[Change]]:
+        """
+        Apply all rules in a single pass.
+
+        Layers and rows that no rule changes are shared with the input
+        (copy-on-write), so the input is never modified.
+
+        Args:
+            layers: List of all layers, or a KeymapMatrix
+            layer_indices: Restrict the transformation to these layers
+            index: Optional LayoutIndex of ``layers``, updated to match the result
+
+        Returns:
+            Tuple of (transformed layers, list of (layer, row, col, old, new) changes)
+        """
+        scope = range(len(layers)) if layer_indices is None else sorted(set(layer_indices))
+
+        if isinstance(layers, KeymapMatrix):
+            result, changes = self._apply_matrix(layers, scope)
+        else:
+            result, changes = self._apply_lists(layers, scope)
+
+        if index is not None:
+            for layer_idx, row_idx, col_idx, old, new in changes:
+                index.record_change(layer_idx, row_idx, col_idx, old, new)
+
+        logger.info(f"Applied {len(self.rules)} rules: {len(changes)} keys changed")
+        return result, changes
+
+    def _apply_lists(self, layers, scope) -> Tuple[List, List[Change]]:
+        modified_layers = None
+        changes = []
+
+        for layer_idx in scope:
+            if not 0 <= layer_idx < len(layers):
+                logger.warning(f"Layer index {layer_idx} out of range (0-{len(layers)-1})")
+                continue
+            positions = self._positions.get(layer_idx, {})
+            compiled = self._table_for_layer(layer_idx)
+            if compiled is None and not positions:
+                continue
+
+            layer = layers[layer_idx]
+            modified_layer = None
+            for row_idx, row in enumerate(layer):
+                modified_row = None
+                for col_idx, keycode in enumerate(row):
+                    if positions and (row_idx, col_idx) in positions:
+                        new = positions[row_idx, col_idx]
+                    elif compiled is None or is_no_key(keycode):
+                        continue
+                    else:
+                        new = self.lookup(layer_idx, str(keycode))
+                    if new is None or new == keycode:
+                        continue
+                    if modified_row is None:
+                        modified_row = list(row)
+                    modified_row[col_idx] = new
+                    changes.append((layer_idx, row_idx, col_idx, keycode, new))
+
+                if modified_row is not None:
+                    if modified_layer is None:
+                        modified_layer = list(layer)
+                    modified_layer[row_idx] = modified_row
+
+            if modified_layer is not None:
+                if modified_layers is None:
+                    modified_layers = list(layers)
+                modified_layers[layer_idx] = modified_layer
+
+        return (modified_layers if modified_layers is not None else layers), changes
+
+    def _apply_matrix(self, matrix: KeymapMatrix, scope) -> Tuple[KeymapMatrix, List[Change]]:
+        symbols = matrix.symbols
+        keycodes = symbols.keycodes
+        size = matrix.num_rows * matrix.num_cols
+        flat = None
+        changes = []
+
+        for layer_idx in scope:
+            if not 0 <= layer_idx < len(matrix):
+                logger.warning(f"Layer index {layer_idx} out of range (0-{len(matrix)-1})")
+                continue
+            positions = self._positions.get(layer_idx, {})
+            compiled = self._table_for_layer(layer_idx)
+            if compiled is None and not positions:
+                continue
+
+            # Map symbol ids of the distinct keycodes in this layer once
+            ids = matrix[layer_idx].ids()
+            remap = {}
+            if compiled is not None:
+                for symbol_id in set(ids):
+                    if symbol_id != NO_KEY:
+                        new = self.lookup(layer_idx, keycodes[symbol_id])
+                        if new is not None:
+                            remap[symbol_id] = symbols.intern(new)
+
+            # Integer pass: only positions whose id is remapped or targeted are visited
+            targets = {row * matrix.num_cols + col: symbols.intern(keycode)
+                       for (row, col), keycode in positions.items()
+                       if row < matrix.num_rows and col < matrix.num_cols}
+            if remap:
+                for pos, symbol_id in enumerate(ids):
+                    if symbol_id in remap and pos not in targets:
+                        targets[pos] = remap[symbol_id]
+
+            start = layer_idx * size
+            for pos in sorted(targets):
+                symbol_id, new_id = ids[pos], targets[pos]
+                if new_id == symbol_id:
+                    continue
+                row_idx, col_idx = divmod(pos, matrix.num_cols)
+                if flat is None:
+                    flat = matrix.flat[:] if not matrix.uses_numpy else matrix.flat.copy()
+                flat[start + pos] = new_id
+                changes.append((layer_idx, row_idx, col_idx,
+                                matrix.keycode(symbol_id), matrix.keycode(new_id)))
+
+        if flat is None:
+            return matrix, changes
+        return KeymapMatrix(symbols, flat, matrix.shape), changes
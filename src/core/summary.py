@@ -0,0 +1,32 @@
+"""
+Text summary of keyboard layers.
+"""
+
+from typing import List
+from ..utils.keycode_simplifier import simplify_keycode
+from ..utils.logger import get_logger
+from .keymap import row_keycodes
+
+logger = get_logger(__name__)
+
+
+def print_layer_summary(layers: List[List[List[str]]]) -> None:
+    """
+    Print a text summary of all layers.
+    
+    Args:
+        layers: List of all layers, or a KeymapMatrix
+    """
+    logger.info("Generating layer summary")
+    
+    print(f"\n{'='*60}")
+    print(f"Keyboard Layout Summary")
+    print(f"{'='*60}")
+    print(f"Total Layers: {len(layers)}")
+    
+    for layer_idx, layer in enumerate(layers):
+        print(f"\nLayer {layer_idx}:")
+        for row_idx, row in enumerate(layer):
+            # Filter out empty positions
+            keys = [simplify_keycode(k) for k in row_keycodes(row)]
+            print(f"  Row {row_idx}: {' | '.join(keys)}")
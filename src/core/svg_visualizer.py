@@ -0,0 +1,158 @@
+"""
+SVG keyboard visualization module.
+
+Writes the same sheet as ``LayerVisualizer`` (titled panels of color-coded
+keys, two per row) directly as SVG text, without matplotlib.
+"""
+
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape, quoteattr
+from ..utils.keycode_simplifier import ColorScheme, get_color_scheme
+from ..utils.logger import get_logger
+from .key_geometry import (CELL_INCHES, KEY_LINEWIDTH, KEY_MARGIN, KEY_SIZE, LABEL_FONT_SIZES,
+                           LAYER_TITLE_SIZE, SHEET_TITLE, SHEET_TITLE_SIZE, label_font_size)
+from .resolver import KeymapResolver, iter_display_keys
+
+logger = get_logger(__name__)
+
+# Pixels per matrix position; LayerVisualizer draws one position as CELL_INCHES
+UNIT = 60
+PX_PER_PT = UNIT / (72 * CELL_INCHES)
+
+FONT_FAMILY = "'DejaVu Sans', 'Bitstream Vera Sans', Arial, sans-serif"
+
+
+def _fmt(value: float) -> str:
+    """Compact number formatting for coordinates."""
+    return f"{value:.2f}".rstrip('0').rstrip('.')
+
+
+class SvgVisualizer:
+    """
+    Renders keyboard layers as a streamed SVG document.
+
+    Key colors are emitted as CSS classes (one per color-scheme entry) and
+    the document is produced as a sequence of small text chunks, so large
+    keymaps are never held in memory as a whole.
+    """
+
+    def __init__(self, layers: List[List[List[str]]], max_rows: int, max_cols: int,
+                 resolved: bool = False, color_scheme: Optional[ColorScheme] = None,
+                 cols: int = 2):
+        """
+        Initialize the visualizer.
+
+        Args:
+            layers: List of all layers to visualize (or a KeymapMatrix)
+            max_rows: Maximum number of rows
+            max_cols: Maximum number of columns
+            resolved: Show the effective key of transparent positions
+            color_scheme: Key colors (default: the active scheme, see ``set_color_scheme``)
+            cols: Number of layer panels per row
+        """
+        self.layers = layers
+        self.max_rows = max_rows
+        self.max_cols = max_cols
+        self.resolver = KeymapResolver(layers) if resolved else None
+        self.colors = color_scheme or get_color_scheme()
+        self.cols = cols
+        logger.info(f"Initializing SVG visualizer for {len(layers)} layers")
+
+    def _color_classes(self) -> Dict[Tuple[str, str], str]:
+        """CSS class of each (face, edge) pair of the color scheme."""
+        classes = {}
+        for _, face, edge in self.colors.legend():
+            classes.setdefault((face, edge), f"c{len(classes)}")
+        return classes
+
+    def iter_svg(self) -> Iterator[str]:
+        """
+        Generate the SVG document in chunks.
+
+        Yields:
+            Pieces of SVG text, in document order
+        """
+        num_layers = len(self.layers)
+        cols = max(1, min(self.cols, num_layers))
+        rows = (num_layers + cols - 1) // cols
+
+        title_height = SHEET_TITLE_SIZE * PX_PER_PT * 2
+        layer_title_height = LAYER_TITLE_SIZE * PX_PER_PT * 2
+        panel_width = self.max_cols * UNIT
+        panel_height = layer_title_height + self.max_rows * UNIT
+        gap = UNIT / 2
+        width = cols * panel_width + (cols + 1) * gap
+        height = title_height + rows * (panel_height + gap)
+
+        classes = self._color_classes()
+        transparent = self.colors.get_key_color('▽')
+
+        yield (f'<svg xmlns="http://www.w3.org/2000/svg" width="{_fmt(width)}" '
+               f'height="{_fmt(height)}" viewBox="0 0 {_fmt(width)} {_fmt(height)}">\n'
+               f'<style>\n'
+               f'text{{font-family:{FONT_FAMILY};text-anchor:middle;dominant-baseline:central}}\n'
+               f'rect{{stroke-width:{_fmt(KEY_LINEWIDTH * PX_PER_PT)}}}\n'
+               f'.h{{font-size:{_fmt(SHEET_TITLE_SIZE * PX_PER_PT)}px;font-weight:bold}}\n'
+               f'.l{{font-size:{_fmt(LAYER_TITLE_SIZE * PX_PER_PT)}px;font-weight:bold}}\n')
+        for size in LABEL_FONT_SIZES:
+            yield f'.s{size}{{font-size:{_fmt(size * PX_PER_PT)}px}}\n'
+        for (face, edge), name in classes.items():
+            # Scheme colors are user input: keep them from closing the style element
+            yield escape(f'.{name}{{fill:{face};stroke:{edge}}}\n')
+        yield (f'</style>\n<rect width="100%" height="100%" fill="white" stroke="none"/>\n'
+               f'<text class="h" x="{_fmt(width / 2)}" y="{_fmt(title_height / 2)}">'
+               f'{SHEET_TITLE}</text>\n')
+
+        for layer_idx in range(num_layers):
+            row, col = divmod(layer_idx, cols)
+            left = gap + col * (panel_width + gap)
+            top = title_height + row * (panel_height + gap)
+            title = f'Layer {layer_idx} (resolved)' if self.resolver else f'Layer {layer_idx}'
+            yield (f'<g id="layer-{layer_idx}" transform="translate({_fmt(left)},{_fmt(top)})">\n'
+                   f'<text class="l" x="{_fmt(panel_width / 2)}" '
+                   f'y="{_fmt(layer_title_height / 2)}">{title}</text>\n')
+
+            chunk = []
+            for row_idx, col_idx, keycode, inherited in iter_display_keys(
+                    self.layers[layer_idx], layer_idx, self.resolver):
+                label, face, edge = self.colors.get_key_style(keycode)
+                if inherited:
+                    # Keys inherited from a lower layer keep the transparent colors
+                    face, edge = transparent
+                x = (col_idx + KEY_MARGIN) * UNIT
+                y = layer_title_height + (row_idx + KEY_MARGIN) * UNIT
+                name = classes.get((face, edge))
+                paint = f'class="{name}"' if name else f'fill={quoteattr(face)} stroke={quoteattr(edge)}'
+                chunk.append(f'<rect {paint} x="{_fmt(x)}" y="{_fmt(y)}" '
+                             f'width="{_fmt(KEY_SIZE * UNIT)}" height="{_fmt(KEY_SIZE * UNIT)}"/>')
+                if label:
+                    chunk.append(f'<text class="s{label_font_size(label)}" x="{_fmt(x + KEY_SIZE * UNIT / 2)}" '
+                                 f'y="{_fmt(y + KEY_SIZE * UNIT / 2)}">{escape(label)}</text>')
+            chunk.append('</g>\n')
+            yield '\n'.join(chunk)
+
+        yield '</svg>\n'
+
+    def write(self, stream: IO[str]) -> None:
+        """Write the SVG document to a text stream."""
+        for chunk in self.iter_svg():
+            stream.write(chunk)
+
+    def to_string(self) -> str:
+        """Get the SVG document as a string."""
+        return ''.join(self.iter_svg())
+
+    def create_visualization(self, output_file: str) -> None:
+        """
+        Write the SVG sheet of all layers.
+
+        Args:
+            output_file: Path of the .svg file to write
+        """
+        if len(self.layers) == 0:
+            logger.warning("No layers to visualize")
+            return
+
+        with open(output_file, 'w', encoding='utf-8') as f:
+            self.write(f)
+        logger.info(f"Saved SVG visualization to {output_file}")
@@ -2,8 +2,12 @@
 Keycode transformation module.
 """
 
-from typing import List
+from typing import List, Optional
+from ..utils.keycode_parser import normalize_keycode
 from ..utils.logger import get_logger
+from .keymap import KeymapMatrix
+from .layout_index import LayoutIndex
+from .rules import RuleSet
 
 logger = get_logger(__name__)
 
@@ -17,8 +21,11 @@ class KeycodeTransformer:
         """
         Replace all instances of a specific keycode with a new keycode in a layer.
         
+        Keycodes are compared by their canonical spelling, so spacing and
+        alias variants (``LT(2, KC_SPC)``, ``LT2(KC_SPC)``) are all replaced.
+        
         Args:
-            layer: The layer to modify (list of rows)
+            layer: The layer to modify (list of rows, or a LayerView)
             old_keycode: The keycode to replace
             new_keycode: The new keycode to use as replacement
             
@@ -27,11 +34,12 @@ class KeycodeTransformer:
         """
         modified_layer = []
         replacement_count = 0
+        target = normalize_keycode(old_keycode)
         
         for row in layer:
             modified_row = []
             for keycode in row:
-                if str(keycode) == old_keycode:
+                if normalize_keycode(keycode) == target:
                     modified_row.append(new_keycode)
                     replacement_count += 1
                 else:
@@ -43,18 +51,23 @@ class KeycodeTransformer:
     
     @staticmethod
     def rename_keycode_in_all_layers(layers: List[List[List[str]]], layer_index: int,
-                                     old_keycode: str, new_keycode: str) -> List[List[List[str]]]:
+                                     old_keycode: str, new_keycode: str,
+                                     index: Optional[LayoutIndex] = None) -> List[List[List[str]]]:
         """
         Replace all instances of a keycode in a specific layer.
         
         Args:
-            layers: List of all layers
+            layers: List of all layers, or a KeymapMatrix
             layer_index: Index of the layer to modify
             old_keycode: The keycode to replace
             new_keycode: The new keycode to use
+            index: Optional LayoutIndex of ``layers``. When given, only the
+                indexed positions are touched and the index is updated to
+                describe the returned layers.
             
         Returns:
             Modified layers list with the specified layer updated
+            (a new KeymapMatrix if a matrix was given)
         """
         if layer_index < 0 or layer_index >= len(layers):
             logger.warning(f"Layer index {layer_index} out of range (0-{len(layers)-1})")
@@ -62,6 +75,15 @@ class KeycodeTransformer:
         
         logger.info(f"Renaming '{old_keycode}' to '{new_keycode}' in layer {layer_index}")
         
+        if index is not None:
+            return KeycodeTransformer._rename_indexed(layers, layer_index, old_keycode,
+                                                      new_keycode, index)
+        
+        if isinstance(layers, KeymapMatrix):
+            modified, count = layers.replace(old_keycode, new_keycode, [layer_index])
+            logger.debug(f"Replaced {count} instances of '{old_keycode}' with '{new_keycode}'")
+            return modified
+        
         modified_layers = []
         for idx, layer in enumerate(layers):
             if idx == layer_index:
@@ -74,3 +96,46 @@ class KeycodeTransformer:
         
         return modified_layers
 
+    
+    @staticmethod
+    def apply_rules(layers: List[List[List[str]]], rules: RuleSet,
+                    layer_indices: Optional[List[int]] = None,
+                    index: Optional[LayoutIndex] = None) -> List[List[List[str]]]:
+        """
+        Apply a compiled rule set to all (or some) layers in one pass.
+        
+        Args:
+            layers: List of all layers, or a KeymapMatrix
+            rules: Compiled RuleSet (e.g. from ``RuleSet.from_file``)
+            layer_indices: Optional layer indices to restrict the rules to
+            index: Optional LayoutIndex of ``layers``, kept up to date
+            
+        Returns:
+            Transformed layers; unchanged layers and rows are shared with the input
+        """
+        modified, _ = rules.apply(layers, layer_indices, index)
+        return modified
+    
+    @staticmethod
+    def _rename_indexed(layers, layer_index: int, old_keycode: str, new_keycode: str,
+                        index: LayoutIndex):
+        """Rename using the index: only rows holding ``old_keycode`` are copied."""
+        hits = index.layer_positions(old_keycode, layer_index)
+        if not hits:
+            logger.debug(f"No instances of '{old_keycode}' in layer {layer_index}")
+            return layers
+        
+        if isinstance(layers, KeymapMatrix):
+            modified = layers.set_keys(layer_index, hits, new_keycode)
+        else:
+            layer = list(layers[layer_index])
+            for row_idx in {row for row, _ in hits}:
+                layer[row_idx] = list(layer[row_idx])
+            for row_idx, col_idx in hits:
+                layer[row_idx][col_idx] = new_keycode
+            modified = list(layers)
+            modified[layer_index] = layer
+        
+        index.record_rename(layer_index, old_keycode, new_keycode)
+        logger.debug(f"Replaced {len(hits)} instances of '{old_keycode}' with '{new_keycode}'")
+        return modified
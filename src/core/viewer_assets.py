@@ -0,0 +1,619 @@
+"""
+Viewer assets of the interactive HTML visualization.
+
+The stylesheet and script are identical for every keymap; the page only
+adds the keymap data. They are either inlined into a self-contained page
+or written once under content-hashed file names (``write_assets``) so
+browsers and proxies can cache them indefinitely.
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Union
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+VIEWER_CSS = """\
+:root {
+    --key-size: 60px;
+}
+
+* {
+    margin: 0;
+    padding: 0;
+    box-sizing: border-box;
+}
+
+body {
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    min-height: 100vh;
+    padding: 20px;
+}
+
+.container {
+    max-width: 1400px;
+    margin: 0 auto;
+}
+
+.header {
+    text-align: center;
+    color: white;
+    margin-bottom: 30px;
+}
+
+.header h1 {
+    font-size: 2.5rem;
+    margin-bottom: 10px;
+    text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
+}
+
+.controls {
+    background: white;
+    padding: 20px;
+    border-radius: 12px;
+    box-shadow: 0 10px 30px rgba(0,0,0,0.2);
+    margin-bottom: 20px;
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+    flex-wrap: wrap;
+    gap: 15px;
+}
+
+.layer-selector {
+    display: flex;
+    gap: 10px;
+    align-items: center;
+    flex-wrap: wrap;
+}
+
+.layer-btn {
+    padding: 10px 20px;
+    border: 2px solid #667eea;
+    background: white;
+    color: #667eea;
+    border-radius: 8px;
+    cursor: pointer;
+    font-weight: 600;
+    transition: all 0.3s;
+}
+
+.layer-btn:hover {
+    background: #f0f0ff;
+}
+
+.layer-btn.active {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+}
+
+.action-buttons {
+    display: flex;
+    gap: 10px;
+}
+
+.btn {
+    padding: 10px 20px;
+    border: none;
+    border-radius: 8px;
+    cursor: pointer;
+    font-weight: 600;
+    transition: all 0.3s;
+    text-decoration: none;
+    display: inline-block;
+}
+
+.btn-primary {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+}
+
+.btn-primary:hover {
+    transform: translateY(-2px);
+    box-shadow: 0 5px 20px rgba(102, 126, 234, 0.4);
+}
+
+.btn-secondary {
+    background: #6c757d;
+    color: white;
+}
+
+.btn-secondary:hover {
+    background: #5a6268;
+}
+
+.keyboard {
+    background: white;
+    padding: 30px;
+    border-radius: 12px;
+    box-shadow: 0 10px 30px rgba(0,0,0,0.2);
+    overflow-x: auto;
+}
+
+.keyboard-grid {
+    /* Keys are placed by position, so empty positions need no element */
+    display: inline-grid;
+    grid-template-columns: repeat(var(--cols), calc(var(--key-size) + 4px));
+    grid-template-rows: repeat(var(--rows), calc(var(--key-size) + 4px));
+    row-gap: 5px;
+    min-width: fit-content;
+}
+
+.all-layers-grid {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(400px, 1fr));
+    gap: 20px;
+    padding: 10px;
+}
+
+.layer-container {
+    background: #f8f9fa;
+    padding: 20px;
+    border-radius: 8px;
+    border: 2px solid #e0e0e0;
+}
+
+.layer-container.active {
+    border-color: #667eea;
+    box-shadow: 0 0 0 2px rgba(102, 126, 234, 0.2);
+}
+
+.layer-title {
+    font-size: 1.1rem;
+    font-weight: 700;
+    color: #667eea;
+    margin-bottom: 15px;
+    text-align: center;
+}
+
+.layer-keyboard {
+    transform: scale(0.7);
+    transform-origin: top center;
+}
+
+.key {
+    width: var(--key-size);
+    height: var(--key-size);
+    margin: 2px;
+    border-radius: 6px;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    font-size: 11px;
+    font-weight: 600;
+    text-align: center;
+    cursor: pointer;
+    transition: transform 0.2s, box-shadow 0.2s;
+    word-wrap: break-word;
+    padding: 4px;
+    position: relative;
+}
+
+.key:hover {
+    transform: translateY(-3px);
+    box-shadow: 0 5px 15px rgba(0,0,0,0.3);
+}
+
+.key:active {
+    transform: translateY(-1px);
+}
+
+.key-tooltip {
+    position: absolute;
+    bottom: 100%;
+    left: 50%;
+    transform: translateX(-50%);
+    background: rgba(0,0,0,0.9);
+    color: white;
+    padding: 8px 12px;
+    border-radius: 6px;
+    font-size: 10px;
+    white-space: nowrap;
+    opacity: 0;
+    pointer-events: none;
+    transition: opacity 0.2s;
+    margin-bottom: 5px;
+    z-index: 1000;
+}
+
+.key:hover .key-tooltip {
+    opacity: 1;
+}
+
+.diff-changed {
+    outline: 3px solid #ff9800;
+    outline-offset: 1px;
+}
+
+.diff-added {
+    outline: 3px solid #2e7d32;
+    outline-offset: 1px;
+}
+
+.diff-removed {
+    outline: 3px dashed #c62828;
+    outline-offset: 1px;
+    opacity: 0.45;
+    text-decoration: line-through;
+}
+
+.diff-moved {
+    outline: 3px dashed #1565c0;
+    outline-offset: 1px;
+}
+
+.legend {
+    background: white;
+    padding: 20px;
+    border-radius: 12px;
+    box-shadow: 0 10px 30px rgba(0,0,0,0.2);
+    margin-top: 20px;
+}
+
+.legend h3 {
+    color: #667eea;
+    margin-bottom: 15px;
+}
+
+.legend-grid {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+    gap: 15px;
+}
+
+.legend-item {
+    display: flex;
+    align-items: center;
+    gap: 10px;
+}
+
+.legend-color {
+    width: 30px;
+    height: 30px;
+    border-radius: 6px;
+}
+
+.info-box {
+    background: rgba(255,255,255,0.95);
+    padding: 15px;
+    border-radius: 8px;
+    margin-top: 15px;
+    border-left: 4px solid #667eea;
+}
+
+@media (max-width: 768px) {
+    .controls {
+        flex-direction: column;
+    }
+
+    :root {
+        --key-size: 45px;
+    }
+
+    .key {
+        font-size: 9px;
+    }
+}
+"""
+
+VIEWER_JS = """\
+const keymapData = document.getElementById('keymap-data');
+const maxRows = Number(keymapData.dataset.maxRows);
+const maxCols = Number(keymapData.dataset.maxCols);
+const layers = decodeLayers(JSON.parse(keymapData.textContent));
+let currentLayer = 0;
+let viewMode = 'single'; // 'single' or 'all'
+let singleKeys = null; // key elements of the single-layer grid, by position
+let allLayersView = null;
+
+document.documentElement.style.setProperty('--rows', maxRows);
+document.documentElement.style.setProperty('--cols', maxCols);
+
+// Expand the columnar payload into one sparse array of keys per layer,
+// indexed by position (row * maxCols + col)
+function decodeLayers(payload) {
+    return payload.layers.map(layer => {
+        const keys = [];
+        layer.pos.forEach((pos, i) => {
+            const [faceColor, edgeColor] = payload.colors[layer.color[i]];
+            keys[pos] = {
+                row: Math.floor(pos / maxCols),
+                col: pos % maxCols,
+                keycode: payload.labels[layer.label[i]],
+                original: payload.originals[layer.original[i]],
+                faceColor,
+                edgeColor
+            };
+        });
+        if (layer.diff) {
+            layer.diff.key.forEach((keyIndex, i) => {
+                const key = keys[layer.pos[keyIndex]];
+                key.diff = layer.diff.kind[i];
+                key.before = payload.originals[layer.diff.before[i]];
+            });
+        }
+        return keys;
+    });
+}
+
+function initializeLayerButtons() {
+    const container = document.getElementById('layerButtons');
+    for (let i = 0; i < layers.length; i++) {
+        const btn = document.createElement('button');
+        btn.className = 'layer-btn' + (i === 0 ? ' active' : '');
+        btn.textContent = `Layer ${i}`;
+        btn.onclick = () => switchLayer(i);
+        container.appendChild(btn);
+    }
+}
+
+function toggleViewMode() {
+    viewMode = viewMode === 'single' ? 'all' : 'single';
+    const btn = document.getElementById('viewModeBtn');
+    const layerButtons = document.getElementById('layerButtons');
+
+    if (viewMode === 'all') {
+        btn.textContent = '📄 Single Layer';
+        btn.classList.remove('active');
+        layerButtons.style.display = 'none';
+        renderAllLayers();
+    } else {
+        btn.textContent = '📋 All Layers';
+        btn.classList.add('active');
+        layerButtons.style.display = 'flex';
+        renderLayer(currentLayer);
+    }
+}
+
+function switchLayer(layerIndex) {
+    currentLayer = layerIndex;
+    viewMode = 'single';
+
+    // Update view mode button
+    const viewBtn = document.getElementById('viewModeBtn');
+    viewBtn.textContent = '📋 All Layers';
+    viewBtn.classList.add('active');
+    document.getElementById('layerButtons').style.display = 'flex';
+
+    // Update button states
+    document.querySelectorAll('#layerButtons .layer-btn').forEach((btn, idx) => {
+        btn.classList.toggle('active', idx === layerIndex);
+    });
+
+    // Render the layer
+    renderLayer(layerIndex);
+}
+
+function createKeyElement(pos) {
+    const keyDiv = document.createElement('div');
+    keyDiv.className = 'key';
+    keyDiv.dataset.pos = pos;
+    keyDiv.style.gridArea = `${Math.floor(pos / maxCols) + 1} / ${pos % maxCols + 1}`;
+    keyDiv.appendChild(document.createTextNode(''));
+    const tooltip = document.createElement('div');
+    tooltip.className = 'key-tooltip';
+    keyDiv.appendChild(tooltip);
+    return keyDiv;
+}
+
+// Show a key (or hide the element when the position is empty), in place
+function updateKeyElement(keyDiv, key) {
+    if (!key) {
+        keyDiv.style.visibility = 'hidden';
+        return;
+    }
+    keyDiv.style.visibility = '';
+    keyDiv.style.backgroundColor = key.faceColor;
+    keyDiv.style.border = `2px solid ${key.edgeColor}`;
+    keyDiv.className = key.diff ? `key diff-${key.diff}` : 'key';
+    keyDiv.firstChild.nodeValue = key.keycode;
+    keyDiv.lastChild.textContent = !key.diff ? key.original :
+        key.diff === 'removed' ? `${key.original} (removed)` :
+        `${key.before} → ${key.original}`;
+}
+
+// Grid holding elements for the given positions only
+function createKeyboardGrid(positions) {
+    const gridDiv = document.createElement('div');
+    gridDiv.className = 'keyboard-grid';
+    const keyDivs = [];
+    positions.forEach(pos => {
+        keyDivs[pos] = createKeyElement(pos);
+        gridDiv.appendChild(keyDivs[pos]);
+    });
+    return { gridDiv, keyDivs };
+}
+
+function renderLayer(layerIndex) {
+    const grid = document.getElementById('keyboardGrid');
+    if (!singleKeys) {
+        // One element per position used by any layer, reused on every switch
+        const used = new Set();
+        layers.forEach(layer => layer.forEach((key, pos) => used.add(pos)));
+        const { gridDiv, keyDivs } = createKeyboardGrid([...used].sort((a, b) => a - b));
+        gridDiv.id = 'singleLayerGrid';
+        grid.appendChild(gridDiv);
+        singleKeys = keyDivs;
+    }
+    if (allLayersView) {
+        allLayersView.style.display = 'none';
+    }
+    document.getElementById('singleLayerGrid').style.display = '';
+
+    const layer = layers[layerIndex];
+    singleKeys.forEach((keyDiv, pos) => updateKeyElement(keyDiv, layer[pos]));
+}
+
+function renderLayerPanel(wrapper, index) {
+    const layer = layers[index];
+    const { gridDiv, keyDivs } = createKeyboardGrid(Object.keys(layer).map(Number));
+    keyDivs.forEach((keyDiv, pos) => updateKeyElement(keyDiv, layer[pos]));
+    wrapper.style.minHeight = '';
+    wrapper.appendChild(gridDiv);
+}
+
+function renderAllLayers() {
+    const grid = document.getElementById('keyboardGrid');
+    document.getElementById('singleLayerGrid').style.display = 'none';
+    if (allLayersView) {
+        allLayersView.style.display = '';
+        return;
+    }
+
+    allLayersView = document.createElement('div');
+    allLayersView.className = 'all-layers-grid';
+    grid.appendChild(allLayersView);
+
+    // Panels get their keys when they come close to the viewport
+    const observer = 'IntersectionObserver' in window ? new IntersectionObserver(entries => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                observer.unobserve(entry.target);
+                renderLayerPanel(entry.target, Number(entry.target.dataset.layer));
+            }
+        });
+    }, { rootMargin: '200px 0px' }) : null;
+
+    layers.forEach((layer, index) => {
+        const container = document.createElement('div');
+        container.className = 'layer-container';
+        container.id = `layer-container-${index}`;
+        container.dataset.layer = index;
+
+        const title = document.createElement('div');
+        title.className = 'layer-title';
+        title.textContent = `Layer ${index}`;
+        title.style.cursor = 'pointer';
+
+        const keyboardWrapper = document.createElement('div');
+        keyboardWrapper.className = 'layer-keyboard';
+        keyboardWrapper.dataset.layer = index;
+        // Reserve the grid's height so scrolling does not jump when it is rendered
+        keyboardWrapper.style.minHeight = `calc(${maxRows} * (var(--key-size) + 4px) + ${maxRows - 1} * 5px)`;
+
+        container.appendChild(title);
+        container.appendChild(keyboardWrapper);
+        allLayersView.appendChild(container);
+        if (observer) {
+            observer.observe(keyboardWrapper);
+        } else {
+            renderLayerPanel(keyboardWrapper, index);
+        }
+    });
+}
+
+// One click handler for every key and layer title
+function handleGridClick(event) {
+    const container = event.target.closest('.layer-container');
+    if (event.target.closest('.layer-title')) {
+        // Highlight this layer
+        document.querySelectorAll('.layer-container').forEach(c => c.classList.remove('active'));
+        container.classList.add('active');
+
+        // Scroll to this layer
+        container.scrollIntoView({ behavior: 'smooth', block: 'center' });
+        return;
+    }
+
+    const keyDiv = event.target.closest('.key');
+    if (!keyDiv) {
+        return;
+    }
+    const layerIndex = container ? Number(container.dataset.layer) : currentLayer;
+    const key = layers[layerIndex][Number(keyDiv.dataset.pos)];
+    if (key) {
+        showKeyInfo({
+            keycode: key.keycode,
+            original: key.original,
+            row: key.row,
+            col: key.col,
+            layer: container ? layerIndex : null
+        });
+    }
+}
+
+function showKeyInfo(key) {
+    const infoBox = document.getElementById('keyInfo');
+    const details = document.getElementById('keyDetails');
+
+    const layerInfo = key.layer !== null && key.layer !== undefined ?
+        `Layer ${key.layer} - ` : '';
+
+    // Keycodes come from the uploaded file: insert them as text, never as markup
+    const keycode = document.createElement('strong');
+    keycode.textContent = key.keycode;
+    const original = document.createElement('code');
+    original.textContent = key.original;
+    details.replaceChildren(
+        layerInfo, keycode, ' (Original: ', original,
+        `) - Position: Row ${key.row}, Col ${key.col}`
+    );
+    infoBox.style.display = 'block';
+}
+
+// Initialize on page load
+document.addEventListener('DOMContentLoaded', () => {
+    initializeLayerButtons();
+    document.getElementById('keyboardGrid').addEventListener('click', handleGridClick);
+    renderLayer(0);
+});
+
+// Keyboard shortcuts
+document.addEventListener('keydown', (e) => {
+    if (e.key >= '0' && e.key <= '9') {
+        const layerNum = parseInt(e.key);
+        if (layerNum < layers.length) {
+            switchLayer(layerNum);
+        }
+    } else if (e.key === 'ArrowLeft') {
+        if (viewMode === 'single') {
+            switchLayer(Math.max(0, currentLayer - 1));
+        }
+    } else if (e.key === 'ArrowRight') {
+        if (viewMode === 'single') {
+            switchLayer(Math.min(layers.length - 1, currentLayer + 1));
+        }
+    } else if (e.key === 'a' || e.key === 'A') {
+        toggleViewMode();
+    }
+});
+"""
+
+ASSETS = {'css': VIEWER_CSS, 'js': VIEWER_JS}
+
+# viewer.<content hash>.<kind>: a new file name whenever an asset changes
+ASSET_FILES = {
+    kind: f"viewer.{hashlib.sha256(content.encode('utf-8')).hexdigest()[:12]}.{kind}"
+    for kind, content in ASSETS.items()
+}
+
+
+def write_assets(directory: Union[str, Path]) -> Dict[str, str]:
+    """
+    Write the viewer assets under their content-hashed names.
+
+    Files that already exist are left untouched, so this is cheap to call
+    at every startup.
+
+    Args:
+        directory: Directory served at the ``assets_url`` given to
+            ``InteractiveVisualizer.generate_html`` (created if missing)
+
+    Returns:
+        File name of each asset, keyed by 'css' and 'js'
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for kind, filename in ASSET_FILES.items():
+        path = directory / filename
+        if path.exists():
+            continue
+        tmp_path = path.with_name(f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(ASSETS[kind], encoding='utf-8')
+        os.replace(tmp_path, path)
+        logger.info(f"Wrote viewer asset {path}")
+    return dict(ASSET_FILES)
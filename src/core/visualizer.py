@@ -2,33 +2,358 @@
 Layer visualization module.
 """
 
+import hashlib
+import io
+import logging
+import os
+import pickle
+import threading
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend for web compatibility
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
-from typing import List, Optional
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from functools import lru_cache
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PatchCollection, PathCollection
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
+from matplotlib.path import Path
+from matplotlib.textpath import TextPath, text_to_path
+from matplotlib.transforms import Affine2D
+from PIL import Image, features
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 from tqdm import tqdm
-from ..utils.keycode_simplifier import simplify_keycode, get_key_color
+from ..utils.keycode_simplifier import ColorScheme, get_color_scheme
 from ..utils.logger import get_logger
+from .key_geometry import (CELL_INCHES, KEY_LINEWIDTH, KEY_MARGIN, KEY_SIZE, LAYER_TITLE_SIZE,
+                           SHEET_TITLE, SHEET_TITLE_SIZE, label_font_size)
+from .render_cache import RenderCache, display_digest
+from .resolver import KeymapResolver, iter_display_keys
+from .summary import print_layer_summary
 
 logger = get_logger(__name__)
 
+# Output resolution
+DPI = 150
+
+# Part of render cache keys; bump when the output for the same input changes
+RENDERER_VERSION = 1
+
+
+class OutputSpec(NamedTuple):
+    """
+    One image produced by ``LayerVisualizer.create_outputs``.
+    
+    ``scale`` is relative to the standard resolution (``DPI``); the file is
+    ``<base>_<name>.<format>``, or ``<base>.<format>`` for an empty name.
+    """
+    name: str
+    scale: float = 1.0
+    format: str = 'png'
+    
+    @classmethod
+    def parse(cls, text: str) -> 'OutputSpec':
+        """
+        Parse ``name[:scale[:format]]``, e.g. ``thumb:0.25:webp``.
+        
+        Raises:
+            ValueError: If the scale is not a positive number or the format is unknown
+        """
+        name, _, rest = text.partition(':')
+        scale, _, image_format = rest.partition(':')
+        spec = cls(name, float(scale) if scale else 1.0, (image_format or 'png').lower())
+        if spec.scale <= 0:
+            raise ValueError(f"Invalid output scale in {text!r}")
+        if spec.format not in IMAGE_FORMATS:
+            raise ValueError(f"Unknown output format {spec.format!r}, expected one of {sorted(IMAGE_FORMATS)}")
+        return spec
+    
+    def path(self, base: str) -> str:
+        """Output path for a base path without extension."""
+        return f"{base}_{self.name}.{self.format}" if self.name else f"{base}.{self.format}"
+
+
+# Pillow format name and save options of each output format
+IMAGE_FORMATS = {
+    'png': ('PNG', {}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True}),
+    'jpg': ('JPEG', {'quality': 85, 'optimize': True}),
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+}
+
+# Standard view, listing-page thumbnail and print image
+DEFAULT_OUTPUTS = (
+    OutputSpec('', 1.0, 'png'),
+    OutputSpec('thumb', 0.25, 'webp'),
+    OutputSpec('print', 2.0, 'png'),
+)
+
+
+def _save_image(image: Image.Image, output_file: str, image_format: str, dpi: float) -> None:
+    """Save an RGB image in one of ``IMAGE_FORMATS``."""
+    pil_format, options = IMAGE_FORMATS[image_format]
+    image.save(output_file, format=pil_format, dpi=(dpi, dpi), **options)
+
+
+@lru_cache(maxsize=4096)
+def _label_path(label: str, size: int) -> Path:
+    """
+    Outline of a key label in points, centered like ``ha/va='center'`` text.
+
+    Cached per label and size; keymaps reuse a small set of labels.
+    """
+    prop = FontProperties(size=size)
+    width, height, descent = text_to_path.get_text_width_height_descent(label, prop, ismath=False)
+    # Text reserves at least the height of "lp" for a line
+    _, lp_height, lp_descent = text_to_path.get_text_width_height_descent("lp", prop, ismath=False)
+    height, descent = max(height, lp_height), max(descent, lp_descent)
+    path = TextPath((0, 0), label, prop=prop)
+    return path.transformed(Affine2D().translate(-width / 2, descent - height / 2))
+
+
+def _setup_axes(ax: plt.Axes, max_rows: int, max_cols: int) -> None:
+    """Configure axes for a layer panel: one data unit per matrix position, no decorations."""
+    ax.set_xlim(0, max_cols)
+    ax.set_ylim(0, max_rows)
+    ax.set_aspect('equal')
+    ax.invert_yaxis()
+    ax.axis('off')
+
+
+def _set_layer_title(ax: plt.Axes, title: str) -> None:
+    ax.set_title(title, fontsize=LAYER_TITLE_SIZE, fontweight='bold', pad=10)
+
+
+# Labels drawn when warming up, so fonts and common label outlines are loaded
+_WARM_KEYCODES = (
+    [f'KC_{letter}' for letter in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ']
+    + [f'KC_{digit}' for digit in range(10)]
+    + ['KC_TRNS', 'KC_NO', 'KC_SPACE', 'KC_ENTER', 'KC_BSPACE', 'KC_LSHIFT', 'KC_LCTRL',
+       'KC_LALT', 'KC_LGUI', 'MO(1)', 'LT1(KC_SPACE)', 'LSFT(KC_1)', 'DF(0)']
+)
+
+
+class FigurePool:
+    """
+    Warm, reusable layer panels for long-lived processes.
+    
+    A panel is a figure with configured axes whose layout (``tight_layout``)
+    was computed once. Rendering borrows a panel of the right shape, draws
+    the keys and title, and on release removes only the key artists, so
+    figure construction and layout are paid once per shape instead of once
+    per layer.
+    """
+    
+    def __init__(self, max_per_shape: int = 4, max_idle: int = 16):
+        """
+        Initialize an empty pool.
+        
+        Args:
+            max_per_shape: Idle panels kept per (rows, cols, dpi)
+            max_idle: Idle panels kept in total; panels of the least
+                recently used shapes are dropped first
+        """
+        self.max_per_shape = max_per_shape
+        self.max_idle = max_idle
+        # Most recently used shape last
+        self._free: 'OrderedDict[Tuple[int, int, float], List[Tuple[Figure, plt.Axes]]]' = OrderedDict()
+        self._idle = 0
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.dropped = 0
+    
+    @staticmethod
+    def _build(max_rows: int, max_cols: int, dpi: float) -> Tuple[Figure, plt.Axes]:
+        fig = Figure(figsize=(max_cols * CELL_INCHES, max_rows * CELL_INCHES), dpi=dpi)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        _setup_axes(ax, max_rows, max_cols)
+        # Layout depends on the title's height only, not on its text
+        _set_layer_title(ax, 'Layer 0')
+        fig.tight_layout()
+        return fig, ax
+    
+    @contextmanager
+    def panel(self, max_rows: int, max_cols: int, dpi: float = DPI) -> Iterator[Tuple[Figure, plt.Axes]]:
+        """
+        Borrow a panel; key artists drawn on it are removed when it is returned.
+        
+        Args:
+            max_rows: Matrix rows
+            max_cols: Matrix columns
+            dpi: Output resolution
+            
+        Yields:
+            (figure, axes)
+        """
+        key = (max_rows, max_cols, float(dpi))
+        with self._lock:
+            free = self._free.get(key)
+            item = free.pop() if free else None
+            if item is None:
+                self.created += 1
+            else:
+                self._idle -= 1
+                self.reused += 1
+        if item is None:
+            item = self._build(max_rows, max_cols, dpi)
+        
+        try:
+            yield item
+        finally:
+            _, ax = item
+            for artist in ax.collections[:] + ax.patches[:] + ax.texts[:]:
+                artist.remove()
+            with self._lock:
+                free = self._free.setdefault(key, [])
+                self._free.move_to_end(key)
+                if len(free) < self.max_per_shape:
+                    free.append(item)
+                    self._idle += 1
+                self._trim()
+    
+    def _trim(self) -> None:
+        """Drop idle panels of the least recently used shapes beyond ``max_idle``."""
+        while self._idle > self.max_idle:
+            key, free = next(iter(self._free.items()))
+            if free:
+                free.pop()
+                self._idle -= 1
+                self.dropped += 1
+            if not free:
+                del self._free[key]
+    
+    def warm(self, shapes: Iterable[Tuple[int, int]], dpi: float = DPI) -> None:
+        """
+        Build a panel per shape and draw sample keys on it to load fonts.
+        
+        Args:
+            shapes: (rows, cols) keyboard matrix shapes expected to be rendered
+            dpi: Output resolution
+        """
+        shapes = list(shapes)
+        for max_rows, max_cols in shapes:
+            layer = [[_WARM_KEYCODES[(row * max_cols + col) % len(_WARM_KEYCODES)]
+                      for col in range(max_cols)] for row in range(max_rows)]
+            with self.panel(max_rows, max_cols, dpi) as (fig, ax):
+                LayerVisualizer([layer], max_rows, max_cols)._draw_layer(layer, 0, ax)
+                fig.canvas.draw()
+        with self._lock:
+            idle = self._idle
+        logger.info(f"Warmed figure pool for {len(shapes)} shape(s); {idle} idle panel(s)")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Panels created, reused and dropped, and idle panels per shape."""
+        with self._lock:
+            return {
+                'created': self.created,
+                'reused': self.reused,
+                'dropped': self.dropped,
+                'idle_total': self._idle,
+                'idle': {f"{rows}x{cols}@{dpi:g}": len(free)
+                         for (rows, cols, dpi), free in self._free.items()},
+            }
+
+
+# Panels shared by every LayerVisualizer of the process
+FIGURE_POOL = FigurePool()
+
+
+def warm_up(shapes: Iterable[Tuple[int, int]] = ((4, 12),), dpi: float = DPI) -> None:
+    """
+    Prepare the process for fast renders: load fonts, cache common label
+    outlines and build pooled panels for the given keyboard shapes.
+    
+    Args:
+        shapes: (rows, cols) keyboard matrix shapes expected to be rendered
+        dpi: Output resolution
+    """
+    FIGURE_POOL.warm(shapes, dpi)
+
+
+# Render processes shared by every LayerVisualizer of the process (see ``_get_render_pool``)
+_render_pool = None
+_render_pool_workers = 0
+_render_pool_lock = threading.Lock()
+
+# Visualizers a render worker built, by keymap state digest (most recently used last)
+WORKER_VISUALIZERS = 4
+_worker_visualizers: Dict[bytes, 'LayerVisualizer'] = {}
+
+
+def _init_render_worker() -> None:
+    """Keep the worker's progress messages out of the console."""
+    logger.setLevel(logging.WARNING)
+
+
+def _render_layer_worker(state_key: bytes, state: bytes, layer_index: int,
+                         dpi: float) -> Tuple[int, np.ndarray]:
+    """Render one layer in a pool worker, building its visualizer only for a new keymap."""
+    visualizer = _worker_visualizers.pop(state_key, None)
+    if visualizer is None:
+        layers, max_rows, max_cols, resolved, color_scheme, batched = pickle.loads(state)
+        visualizer = LayerVisualizer(layers, max_rows, max_cols, resolved=resolved,
+                                     color_scheme=color_scheme, batched=batched)
+    _worker_visualizers[state_key] = visualizer
+    while len(_worker_visualizers) > WORKER_VISUALIZERS:
+        del _worker_visualizers[next(iter(_worker_visualizers))]
+    return layer_index, visualizer.render_layer(layer_index, dpi)
+
+
+def _get_render_pool(workers: int) -> ProcessPoolExecutor:
+    """Get the shared render pool, starting it on first use or for a new size."""
+    global _render_pool, _render_pool_workers
+    with _render_pool_lock:
+        if _render_pool is None or _render_pool_workers != workers:
+            if _render_pool is not None:
+                _render_pool.shutdown(wait=False)
+            _render_pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker)
+            _render_pool_workers = workers
+        return _render_pool
+
+
+def _discard_render_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken render pool so the next render starts a new one."""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is pool:
+            _render_pool = None
+    pool.shutdown(wait=False)
+
 
 class LayerVisualizer:
     """Handles visualization of keyboard layers."""
     
-    def __init__(self, layers: List[List[List[str]]], max_rows: int, max_cols: int):
+    def __init__(self, layers: List[List[List[str]]], max_rows: int, max_cols: int,
+                 resolved: bool = False, color_scheme: Optional[ColorScheme] = None,
+                 batched: bool = True, cache: Optional[RenderCache] = None):
         """
         Initialize the visualizer.
         
         Args:
-            layers: List of all layers to visualize
+            layers: List of all layers to visualize (or a KeymapMatrix)
             max_rows: Maximum number of rows
             max_cols: Maximum number of columns
+            resolved: Show the effective key of transparent positions
+            color_scheme: Key colors (default: the active scheme, see ``set_color_scheme``)
+            batched: Draw each layer with two collection artists instead of
+                two artists per key; labels become glyph outlines, which
+                antialias slightly differently and are never wrapped
+            cache: Optional render cache consulted by ``create_visualization``
         """
         self.layers = layers
         self.max_rows = max_rows
         self.max_cols = max_cols
+        self.resolver = KeymapResolver(layers) if resolved else None
+        self.colors = color_scheme or get_color_scheme()
+        self.batched = batched
+        self.cache = cache
         logger.info(f"Initializing visualizer for {len(layers)} layers")
     
     def plot_layer(self, layer_data: List[List[str]], layer_index: int,
@@ -37,7 +362,7 @@ class LayerVisualizer:
         Plot a single keyboard layer on the given axes.
         
         Args:
-            layer_data: The layer to plot (list of rows)
+            layer_data: The layer to plot (list of rows, or a LayerView)
             layer_index: Index of the layer (for title)
             ax: Matplotlib axes to plot on
             
@@ -45,59 +370,394 @@ class LayerVisualizer:
             Modified axes object
         """
         # Set up the plot
-        ax.set_xlim(0, self.max_cols)
-        ax.set_ylim(0, self.max_rows)
-        ax.set_aspect('equal')
-        ax.invert_yaxis()
-        ax.axis('off')
-        ax.set_title(f'Layer {layer_index}', fontsize=14, fontweight='bold', pad=10)
+        _setup_axes(ax, self.max_rows, self.max_cols)
+        self._draw_layer(layer_data, layer_index, ax)
+        return ax
+    
+    def _draw_layer(self, layer_data: List[List[str]], layer_index: int, ax: plt.Axes) -> None:
+        """Draw the title and keys of a layer on configured axes."""
+        title = f'Layer {layer_index} (resolved)' if self.resolver else f'Layer {layer_index}'
+        _set_layer_title(ax, title)
         
+        keys = iter_display_keys(layer_data, layer_index, self.resolver)
+        if self.batched:
+            self._draw_keys_batched(keys, ax)
+        else:
+            self._draw_keys(keys, ax)
+    
+    def _draw_keys(self, keys, ax: plt.Axes) -> None:
+        """Draw keys with one Rectangle and one Text artist each (legacy path)."""
         # Key dimensions
-        key_width = 0.9
-        key_height = 0.9
-        
-        # Plot each key
-        for row_idx, row in enumerate(layer_data):
-            for col_idx, keycode in enumerate(row):
-                # Skip empty positions
-                if keycode == -1 or keycode == "-1":
-                    continue
-                
-                # Draw key background
-                x = col_idx + 0.05
-                y = row_idx + 0.05
-                
-                # Get simplified keycode and colors
-                simplified = simplify_keycode(str(keycode))
-                face_color, edge_color = get_key_color(simplified)
-                
-                # Draw key rectangle
-                rect = patches.Rectangle((x, y), key_width, key_height,
-                                        linewidth=1.5, edgecolor=edge_color,
-                                        facecolor=face_color)
-                ax.add_patch(rect)
-                
-                # Add keycode text
-                text_x = x + key_width / 2
-                text_y = y + key_height / 2
-                
-                # Adjust font size based on text length
-                font_size = 8 if len(simplified) <= 4 else 6 if len(simplified) <= 8 else 5
-                
-                ax.text(text_x, text_y, simplified,
-                       ha='center', va='center',
-                       fontsize=font_size, fontweight='normal',
-                       wrap=True)
+        key_width = KEY_SIZE
+        key_height = KEY_SIZE
         
-        return ax
+        # Plot each key (empty positions are skipped)
+        for row_idx, col_idx, keycode, inherited in keys:
+            # Draw key background
+            x = col_idx + KEY_MARGIN
+            y = row_idx + KEY_MARGIN
+            
+            # Get simplified keycode and colors
+            simplified, face_color, edge_color = self.colors.get_key_style(keycode)
+            if inherited:
+                # Keys inherited from a lower layer keep the transparent colors
+                face_color, edge_color = self.colors.get_key_color('▽')
+            
+            # Draw key rectangle
+            rect = patches.Rectangle((x, y), key_width, key_height,
+                                    linewidth=KEY_LINEWIDTH, edgecolor=edge_color,
+                                    facecolor=face_color)
+            ax.add_patch(rect)
+            
+            # Add keycode text
+            text_x = x + key_width / 2
+            text_y = y + key_height / 2
+            
+            font_size = label_font_size(simplified)
+            
+            ax.text(text_x, text_y, simplified,
+                   ha='center', va='center',
+                   fontsize=font_size, fontweight='normal',
+                   wrap=True)
     
-    def create_visualization(self, output_file: Optional[str] = None, show_progress: bool = True) -> None:
+    def _draw_keys_batched(self, keys, ax: plt.Axes) -> None:
+        """
+        Draw keys with two artists: a PatchCollection holding every key
+        background and a PathCollection holding every label outline.
+        
+        Labels are cached text outlines placed at the key centers, sized in
+        points through the figure's DPI transform, so they scale with the
+        output DPI exactly like text artists.
+        """
+        rects, face_colors, edge_colors = [], [], []
+        label_paths, label_offsets = [], []
+        
+        for row_idx, col_idx, keycode, inherited in keys:
+            x = col_idx + KEY_MARGIN
+            y = row_idx + KEY_MARGIN
+            
+            simplified, face_color, edge_color = self.colors.get_key_style(keycode)
+            if inherited:
+                # Keys inherited from a lower layer keep the transparent colors
+                face_color, edge_color = self.colors.get_key_color('▽')
+            
+            rects.append(patches.Rectangle((x, y), KEY_SIZE, KEY_SIZE))
+            face_colors.append(face_color)
+            edge_colors.append(edge_color)
+            if simplified:
+                label_paths.append(_label_path(simplified, label_font_size(simplified)))
+                label_offsets.append((x + KEY_SIZE / 2, y + KEY_SIZE / 2))
+        
+        if rects:
+            ax.add_collection(PatchCollection(
+                rects, facecolors=face_colors, edgecolors=edge_colors,
+                linewidths=KEY_LINEWIDTH, joinstyle='miter',
+            ), autolim=False)
+        if label_paths:
+            ax.add_collection(PathCollection(
+                label_paths, offsets=label_offsets, offset_transform=ax.transData,
+                transform=Affine2D().scale(1 / 72) + ax.figure.dpi_scale_trans,
+                facecolors=plt.rcParams['text.color'], edgecolors='none', linewidths=0,
+                zorder=3,
+            ), autolim=False)
+    
+    def render_layer(self, layer_index: int, dpi: float = DPI) -> np.ndarray:
+        """
+        Render one layer on its own Agg canvas.
+        
+        The panel has the size of one cell of the ``create_visualization``
+        sheet and uses no pyplot state, so layers can be rendered in
+        parallel processes. Panels are borrowed from ``FIGURE_POOL``.
+        
+        Args:
+            layer_index: Index of the layer to render
+            dpi: Output resolution
+            
+        Returns:
+            RGBA image as a (height, width, 4) uint8 array
+        """
+        with FIGURE_POOL.panel(self.max_rows, self.max_cols, dpi) as (fig, ax):
+            self._draw_layer(self.layers[layer_index], layer_index, ax)
+            fig.canvas.draw()
+            return np.asarray(fig.canvas.buffer_rgba()).copy()
+    
+    def _tile_key(self, layer_index: int, dpi: float) -> str:
+        """Render cache key of one layer panel, derived from the keys it displays."""
+        keys = iter_display_keys(self.layers[layer_index], layer_index, self.resolver)
+        return self.cache.make_key(
+            renderer='LayerVisualizer.tile', version=RENDERER_VERSION, layer=layer_index,
+            keys=display_digest(keys), dimensions=(self.max_rows, self.max_cols),
+            resolved=self.resolver is not None, batched=self.batched,
+            colors=self.colors.cache_key(), dpi=dpi,
+        )
+    
+    def _cached_tiles(self, dpi: float) -> Tuple[Dict[int, np.ndarray], Dict[int, str]]:
+        """Look up every layer panel in the render cache: (hits, keys of the misses)."""
+        tiles, missing = {}, {}
+        for idx in range(len(self.layers)):
+            key = self._tile_key(idx, dpi)
+            data = self.cache.load(key, '.png')
+            if data is None:
+                missing[idx] = key
+            else:
+                tiles[idx] = np.asarray(Image.open(io.BytesIO(data)).convert('RGBA'))
+        return tiles, missing
+    
+    def _store_tile(self, key: str, image: np.ndarray) -> None:
+        buffer = io.BytesIO()
+        # Fast compression: tiles are written on every miss and read back often
+        Image.fromarray(image).save(buffer, format='PNG', compress_level=1)
+        self.cache.save(key, '.png', buffer.getvalue())
+    
+    def iter_layer_images(self, workers: Optional[int] = None, show_progress: bool = True,
+                          dpi: float = DPI) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Render every layer, each independently, in a process pool.
+        
+        The process pool is started once and shared by later calls. The keymap
+        is pickled once per call and workers keep the visualizers of recent
+        keymaps, so repeated renders of a keymap only rebuild it on a worker's
+        first task.
+        With a render cache, panels are cached per layer by the keys they
+        display: only layers whose content changed are drawn again.
+        
+        Args:
+            workers: Number of worker processes (default: CPU count, capped
+                at the number of layers to draw); 1 renders in the current process
+            show_progress: Whether to show a progress bar of completed layers
+            dpi: Output resolution
+            
+        Yields:
+            (layer_index, RGBA image), cached panels first, then in completion order
+        """
+        num_layers = len(self.layers)
+        progress = tqdm(total=num_layers, desc="Rendering layers", disable=not show_progress)
+        try:
+            if self.cache is not None:
+                tiles, missing = self._cached_tiles(dpi)
+                for idx, image in tiles.items():
+                    yield idx, image
+                    progress.update()
+            else:
+                missing = dict.fromkeys(range(num_layers))
+            
+            pending = list(missing)
+            pool_size = workers or os.cpu_count() or 1
+            workers = min(pool_size, max(len(pending), 1))
+            logger.info(f"Rendering {len(pending)} of {num_layers} layers with {workers} worker(s)")
+            
+            if workers == 1:
+                results = ((idx, self.render_layer(idx, dpi)) for idx in pending)
+            else:
+                results = self._render_in_pool(pending, pool_size, dpi)
+            for idx, image in results:
+                if missing[idx] is not None:
+                    self._store_tile(missing[idx], image)
+                yield idx, image
+                progress.update()
+        finally:
+            progress.close()
+    
+    def _render_in_pool(self, layer_indices: List[int], workers: int,
+                        dpi: float) -> Iterator[Tuple[int, np.ndarray]]:
+        """Render layers in the shared process pool, yielding them as they complete."""
+        state = pickle.dumps((self.layers, self.max_rows, self.max_cols, self.resolver is not None,
+                              self.colors, self.batched), protocol=pickle.HIGHEST_PROTOCOL)
+        state_key = hashlib.blake2b(state, digest_size=16).digest()
+        pool = _get_render_pool(workers)
+        try:
+            futures = [pool.submit(_render_layer_worker, state_key, state, idx, dpi)
+                       for idx in layer_indices]
+            for future in as_completed(futures):
+                yield future.result()
+        except BrokenProcessPool:
+            _discard_render_pool(pool)
+            raise
+    
+    def save_layer_images(self, output_dir: str, workers: Optional[int] = None,
+                          show_progress: bool = True, prefix: str = 'layer') -> List[str]:
+        """
+        Write one PNG per layer (``<prefix>_<index>.png``).
+        
+        Args:
+            output_dir: Directory for the images (created if missing)
+            workers: Number of render processes (see ``iter_layer_images``)
+            show_progress: Whether to show a progress bar
+            prefix: File name prefix
+            
+        Returns:
+            Paths of the written images, in layer order
+        """
+        return self.write_layer_images(self.iter_layer_images(workers, show_progress),
+                                       output_dir, prefix)
+    
+    @staticmethod
+    def write_layer_images(images: Iterable[Tuple[int, np.ndarray]], output_dir: str,
+                           prefix: str = 'layer') -> List[str]:
+        """
+        Write already rendered layer panels as PNGs (``<prefix>_<index>.png``).
+        
+        Args:
+            images: (layer_index, RGBA image) pairs, e.g. from ``iter_layer_images``
+            output_dir: Directory for the images (created if missing)
+            prefix: File name prefix
+            
+        Returns:
+            Paths of the written images, in layer order
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        paths = {}
+        for idx, image in images:
+            paths[idx] = os.path.join(output_dir, f"{prefix}_{idx}.png")
+            Image.fromarray(image).convert('RGB').save(paths[idx], dpi=(DPI, DPI))
+        logger.info(f"Saved {len(paths)} layer images to {output_dir}")
+        return [paths[idx] for idx in sorted(paths)]
+    
+    @staticmethod
+    def _render_title(width: int, dpi: float = DPI) -> Image.Image:
+        """Render the sheet title as a strip ``width`` pixels wide."""
+        fig = Figure(figsize=(width / dpi, 0.5), dpi=dpi)
+        FigureCanvasAgg(fig)
+        fig.text(0.5, 0.5, SHEET_TITLE, ha='center', va='center', fontsize=SHEET_TITLE_SIZE,
+                 fontweight='bold')
+        fig.canvas.draw()
+        return Image.fromarray(np.asarray(fig.canvas.buffer_rgba())).convert('RGB')
+    
+    @staticmethod
+    def _crop_common(images: Dict[int, np.ndarray], pad: int) -> Dict[int, np.ndarray]:
+        """Crop all panels to the union of their non-white areas, like ``bbox_inches='tight'``."""
+        content = np.zeros(next(iter(images.values())).shape[:2], dtype=bool)
+        for image in images.values():
+            # One 32-bit comparison per pixel: opaque white is 0xFFFFFFFF
+            content |= np.ascontiguousarray(image).view(np.uint32)[..., 0] != 0xFFFFFFFF
+        rows, cols = np.nonzero(content.any(axis=1))[0], np.nonzero(content.any(axis=0))[0]
+        if not len(rows):
+            return images
+        top, bottom = max(rows[0] - pad, 0), rows[-1] + pad + 1
+        left, right = max(cols[0] - pad, 0), cols[-1] + pad + 1
+        return {idx: image[top:bottom, left:right] for idx, image in images.items()}
+    
+    def composite_layers(self, images: Dict[int, np.ndarray], cols: int = 2,
+                         dpi: float = DPI) -> Image.Image:
+        """
+        Arrange rendered layers into a sheet (title on top, ``cols`` columns).
+        
+        Args:
+            images: Layer index -> RGBA image, as produced by ``render_layer``
+            cols: Number of columns
+            dpi: Resolution the images were rendered at
+            
+        Returns:
+            RGB sheet image
+        """
+        images = self._crop_common(images, pad=round(dpi / 10))
+        tile_height, tile_width = next(iter(images.values())).shape[:2]
+        cols = min(cols, len(images))
+        rows = (len(images) + cols - 1) // cols
+        title = self._render_title(cols * tile_width, dpi)
+        
+        sheet = Image.new('RGB', (cols * tile_width, title.height + rows * tile_height), 'white')
+        sheet.paste(title, (0, 0))
+        for position, idx in enumerate(sorted(images)):
+            row, col = divmod(position, cols)
+            sheet.paste(Image.fromarray(images[idx]).convert('RGB'),
+                        (col * tile_width, title.height + row * tile_height))
+        return sheet
+    
+    def render_sheet(self, dpi: float = DPI, workers: Optional[int] = None,
+                     show_progress: bool = True) -> Image.Image:
+        """
+        Render every layer (see ``iter_layer_images``) and composite the sheet.
+        
+        Args:
+            dpi: Output resolution
+            workers: Number of render processes
+            show_progress: Whether to show a progress bar
+            
+        Returns:
+            RGB sheet image
+        """
+        images = dict(self.iter_layer_images(workers, show_progress, dpi))
+        return self.composite_layers(images, dpi=dpi)
+    
+    def create_outputs(self, output_file: str, outputs: Iterable[OutputSpec] = DEFAULT_OUTPUTS,
+                       workers: Optional[int] = None, show_progress: bool = True) -> Dict[str, str]:
+        """
+        Write several sizes and formats of the sheet from a single render.
+        
+        The sheet is rendered once at the largest requested scale; smaller
+        outputs are downsampled from it, and all files are encoded and
+        written concurrently. WebP falls back to PNG if Pillow lacks it.
+        
+        Args:
+            output_file: Base path; its extension is replaced per output
+            outputs: Sizes and formats to produce
+            workers: Number of render processes (see ``iter_layer_images``)
+            show_progress: Whether to show a progress bar
+            
+        Returns:
+            Output name -> written path
+        """
+        outputs = [spec._replace(format='png') if spec.format == 'webp' and not features.check('webp')
+                   else spec for spec in outputs]
+        base = os.path.splitext(output_file)[0]
+        paths = {spec.name: spec.path(base) for spec in outputs}
+        
+        keys = {}
+        if self.cache is not None:
+            for spec in outputs:
+                keys[spec.name] = self.cache.make_key(
+                    self.layers, renderer='LayerVisualizer.output', version=RENDERER_VERSION,
+                    dimensions=(self.max_rows, self.max_cols), resolved=self.resolver is not None,
+                    batched=self.batched, colors=self.colors.cache_key(),
+                    output=tuple(spec),
+                )
+            if all(self.cache.fetch(keys[spec.name], paths[spec.name]) for spec in outputs):
+                return paths
+        
+        max_scale = max(spec.scale for spec in outputs)
+        sheet = self.render_sheet(DPI * max_scale, workers, show_progress)
+        
+        def write(spec: OutputSpec) -> None:
+            image = sheet
+            if spec.scale != max_scale:
+                size = (max(1, round(sheet.width * spec.scale / max_scale)),
+                        max(1, round(sheet.height * spec.scale / max_scale)))
+                image = sheet.resize(size, Image.LANCZOS)
+            _save_image(image, paths[spec.name], spec.format, DPI * spec.scale)
+            if spec.name in keys:
+                self.cache.store(keys[spec.name], paths[spec.name])
+        
+        # Pillow releases the GIL while resizing and encoding
+        with ThreadPoolExecutor(max_workers=len(outputs)) as pool:
+            list(pool.map(write, outputs))
+        logger.info(f"Saved {len(paths)} outputs: {', '.join(paths.values())}")
+        return paths
+    
+    def create_visualization(self, output_file: Optional[str] = None, show_progress: bool = True,
+                             parallel: bool = False, workers: Optional[int] = None,
+                             layer_images: Optional[str] = None) -> None:
         """
         Create a multi-panel plot showing all keyboard layers.
         
+        With a render cache, an identical earlier rendering is copied to
+        ``output_file`` instead of plotting again.
+        
+        The ``parallel`` sheet is assembled from independently rendered
+        panels, cropped to their common content and packed without gaps, so
+        its size and spacing differ from the pyplot sheet (2046x1687 instead
+        of 2261x1653 pixels for eight 4x12 layers); keys are drawn the same way.
+        
         Args:
             output_file: Optional filename to save the plot. If None, displays interactively.
             show_progress: Whether to show progress bar (disable for web/API contexts)
+            parallel: Render each layer independently in a process pool and
+                composite the panels into the sheet (requires ``output_file``);
+                with a render cache, unchanged layers reuse their panels
+            workers: Number of render processes for ``parallel`` (default: CPU count)
+            layer_images: Also write one PNG per layer to this directory (see
+                ``save_layer_images``); with ``parallel`` the panels of the
+                sheet are written, so every layer is rendered only once
         """
         num_layers = len(self.layers)
         if num_layers == 0:
@@ -106,15 +766,48 @@ class LayerVisualizer:
         
         logger.info(f"Creating visualization for {num_layers} layers")
         
+        key = None
+        if self.cache is not None and output_file:
+            key = self.cache.make_key(
+                self.layers, renderer='LayerVisualizer', version=RENDERER_VERSION,
+                dimensions=(self.max_rows, self.max_cols), resolved=self.resolver is not None,
+                batched=self.batched, parallel=parallel,
+                colors=self.colors.cache_key(),
+            )
+            if self.cache.fetch(key, output_file):
+                if layer_images:
+                    self.save_layer_images(layer_images, workers, show_progress)
+                return
+        
+        images = None
+        if parallel and output_file:
+            images = dict(self.iter_layer_images(workers, show_progress))
+            self.composite_layers(images).save(output_file, dpi=(DPI, DPI))
+            logger.info(f"Saved visualization to {output_file}")
+        else:
+            self._plot_sheet(output_file, show_progress)
+        
+        if key is not None:
+            self.cache.store(key, output_file)
+        if layer_images:
+            if images is None:
+                self.save_layer_images(layer_images, workers, show_progress)
+            else:
+                self.write_layer_images(sorted(images.items()), layer_images)
+    
+    def _plot_sheet(self, output_file: Optional[str], show_progress: bool) -> None:
+        """Plot all layers into one pyplot figure and save or show it."""
+        num_layers = len(self.layers)
+        
         # Calculate grid layout for subplots (prefer 2 columns)
         cols = 2
         rows = (num_layers + cols - 1) // cols
         
         # Create figure
-        fig_width = cols * (self.max_cols * 0.7)
-        fig_height = rows * (self.max_rows * 0.7)
+        fig_width = cols * (self.max_cols * CELL_INCHES)
+        fig_height = rows * (self.max_rows * CELL_INCHES)
         fig, axes = plt.subplots(rows, cols, figsize=(fig_width, fig_height))
-        fig.suptitle('Keyboard Layer Visualization', fontsize=16, fontweight='bold')
+        fig.suptitle(SHEET_TITLE, fontsize=SHEET_TITLE_SIZE, fontweight='bold')
         
         # Flatten axes array for easier iteration
         if num_layers == 1:
@@ -141,7 +834,7 @@ class LayerVisualizer:
         
         # Save or show
         if output_file:
-            plt.savefig(output_file, dpi=150, bbox_inches='tight')
+            plt.savefig(output_file, dpi=DPI, bbox_inches='tight')
             logger.info(f"Saved visualization to {output_file}")
         else:
             plt.show()
@@ -150,25 +843,6 @@ class LayerVisualizer:
         # Close figure to free memory
         plt.close(fig)
     
-    @staticmethod
-    def print_layer_summary(layers: List[List[List[str]]]) -> None:
-        """
-        Print a text summary of all layers.
-        
-        Args:
-            layers: List of all layers
-        """
-        logger.info("Generating layer summary")
-        
-        print(f"\n{'='*60}")
-        print(f"Keyboard Layout Summary")
-        print(f"{'='*60}")
-        print(f"Total Layers: {len(layers)}")
-        
-        for layer_idx, layer in enumerate(layers):
-            print(f"\nLayer {layer_idx}:")
-            for row_idx, row in enumerate(layer):
-                # Filter out empty positions
-                keys = [simplify_keycode(str(k)) for k in row if k != -1 and k != "-1"]
-                print(f"  Row {row_idx}: {' | '.join(keys)}")
-
+    # Kept for callers of the static method; lives in .summary so that
+    # summary-only runs do not import matplotlib
+    print_layer_summary = staticmethod(print_layer_summary)
@@ -2,8 +2,15 @@
 Utility modules for keyboard visualization.
 """
 
-from .keycode_simplifier import simplify_keycode, get_key_color
+from .keycode_simplifier import (simplify_keycode, get_key_color, get_key_style, ColorScheme,
+                                 get_color_scheme, set_color_scheme,
+                                 cache_stats as keycode_cache_stats)
+from .keycode_parser import parse_keycode, format_keycode, normalize_keycode, keycode_label
 from .logger import setup_logger, get_logger
 
-__all__ = ['simplify_keycode', 'get_key_color', 'setup_logger', 'get_logger']
+__all__ = [
+    'simplify_keycode', 'get_key_color', 'get_key_style', 'ColorScheme', 'get_color_scheme',
+    'set_color_scheme', 'keycode_cache_stats', 'parse_keycode', 'format_keycode', 'normalize_keycode',
+    'keycode_label', 'setup_logger', 'get_logger',
+]
 
@@ -0,0 +1,132 @@
+"""
+Precompressed siblings of generated files.
+
+Text outputs (HTML, SVG...) are compressed once when they are written, as
+``<file>.gz`` and, when the optional libraries are installed, ``<file>.br``
+and ``<file>.zst``. A server then picks the variant a client accepts
+instead of compressing every response.
+"""
+
+import gzip
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+from .logger import get_logger
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    from compression import zstd
+except ImportError:  # pragma: no cover - Python < 3.14
+    zstd = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = get_logger(__name__)
+
+# Files worth compressing; images (PNG, JPEG, WebP) are compressed already
+COMPRESSIBLE_SUFFIXES = {'.html', '.svg', '.css', '.js', '.json', '.txt'}
+
+
+def _compressors() -> Dict[str, Tuple[str, Callable[[bytes], bytes]]]:
+    """Content-Encoding -> (file suffix, compress function), preferred first."""
+    compressors = {}
+    if brotli is not None:
+        compressors['br'] = ('.br', lambda data: brotli.compress(data, quality=11))
+    if zstd is not None:
+        compressors['zstd'] = ('.zst', lambda data: zstd.compress(data, level=19))
+    elif zstandard is not None:
+        compressors['zstd'] = ('.zst', lambda data: zstandard.ZstdCompressor(level=19).compress(data))
+    # mtime=0 keeps the output identical for identical content
+    compressors['gzip'] = ('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))
+    return compressors
+
+
+COMPRESSORS = _compressors()
+
+
+def available_encodings() -> List[str]:
+    """
+    List the content encodings siblings can be written with.
+
+    Returns:
+        Encoding names, preferred first (always includes 'gzip')
+    """
+    return list(COMPRESSORS)
+
+
+def is_compressible(path: Union[str, Path]) -> bool:
+    """Check whether a file type gets precompressed siblings."""
+    return Path(path).suffix.lower() in COMPRESSIBLE_SUFFIXES
+
+
+def write_precompressed(path: Union[str, Path],
+                        encodings: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Write compressed siblings of a file (``page.html.gz``...).
+
+    Args:
+        path: File to compress
+        encodings: Encodings to write (default: every available one)
+
+    Returns:
+        Paths of the written siblings; empty for file types that are not
+        compressible
+    """
+    path = Path(path)
+    if not is_compressible(path):
+        return []
+
+    data = path.read_bytes()
+    written = []
+    for encoding in encodings or COMPRESSORS:
+        suffix, compress = COMPRESSORS[encoding]
+        sibling = path.with_name(path.name + suffix)
+        tmp_path = sibling.with_name(f"{sibling.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(compress(data))
+        os.replace(tmp_path, sibling)
+        written.append(str(sibling))
+    logger.debug(f"Precompressed {path} ({', '.join(encodings or COMPRESSORS)})")
+    return written
+
+
+def select_precompressed(path: Union[str, Path],
+                         accepts: Callable[[str], float]) -> Optional[Tuple[str, str]]:
+    """
+    Pick the precompressed sibling to serve for a request.
+
+    Siblings older than the file itself are ignored, so a file rewritten
+    without compressing it again is never served stale.
+
+    Args:
+        path: Requested file
+        accepts: Quality the client gives an encoding (e.g. werkzeug's
+            ``request.accept_encodings.quality``); 0 for refused encodings
+
+    Returns:
+        (encoding, sibling path), or None to serve the file as is
+    """
+    path = Path(path)
+    if not is_compressible(path):
+        return None
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    for encoding, (suffix, _) in COMPRESSORS.items():
+        if accepts(encoding) <= 0:
+            continue
+        sibling = path.with_name(path.name + suffix)
+        try:
+            if sibling.stat().st_mtime >= mtime:
+                return encoding, str(sibling)
+        except OSError:
+            continue
+    return None
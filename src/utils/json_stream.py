@@ -0,0 +1,272 @@
+"""
+Incremental, section-selective JSON reader.
+
+Vial backups are a single top-level JSON object (``layout``, ``macro``,
+``encoder_layout``...). This module scans that object from a file object in
+fixed-size chunks and only materializes the top-level members that were asked
+for; everything else is skipped bracket-by-bracket without being decoded or
+kept in memory. Reading stops as soon as every requested member was found.
+"""
+
+import json
+import re
+from typing import Any, Callable, Dict, IO, Iterable, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover - optional dependency
+    ujson = None
+
+CHUNK_SIZE = 64 * 1024
+
+# Whitespace between JSON tokens
+_WS = re.compile(rb'[ \t\r\n]*')
+# A complete JSON string literal (including the quotes)
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+# Everything up to the next bracket, consuming complete strings in one step
+_SKIP = re.compile(rb'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*', re.DOTALL)
+# Everything up to the opening quote of a string that is not closed yet
+_COMPLETE = re.compile(rb'[^"]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"]*)*', re.DOTALL)
+# Numbers and literals (true/false/null)
+_SCALAR = re.compile(rb'[^ \t\r\n,}\]]*')
+
+_OPEN = {ord('{'), ord('[')}
+_NOT_BRACKET = bytes(b for b in range(256) if b not in b'[]{}')
+_QUOTE = ord('"')
+_BOM = b'\xef\xbb\xbf'
+
+
+def available_backends() -> list:
+    """
+    List the JSON backends that can be used in this environment.
+
+    Returns:
+        Backend names, fastest first
+    """
+    backends = []
+    if orjson is not None:
+        backends.append('orjson')
+    if ujson is not None:
+        backends.append('ujson')
+    backends.append('json')
+    return backends
+
+
+def get_json_loads(backend: Optional[str] = None) -> Callable[[bytes], Any]:
+    """
+    Get a ``loads`` function for the requested JSON backend.
+
+    Args:
+        backend: 'orjson', 'ujson', 'json', or None to pick the fastest installed
+
+    Returns:
+        Function decoding UTF-8 encoded JSON bytes
+
+    Raises:
+        ValueError: If the backend is unknown or not installed
+    """
+    if backend is None:
+        backend = available_backends()[0]
+
+    if backend == 'orjson' and orjson is not None:
+        return orjson.loads
+    if backend == 'ujson' and ujson is not None:
+        return ujson.loads
+    if backend == 'json':
+        return json.loads
+
+    raise ValueError(f"JSON backend '{backend}' is not available "
+                     f"(installed: {', '.join(available_backends())})")
+
+
+class _SectionReader:
+    """Chunked scanner over the members of a top-level JSON object."""
+
+    def __init__(self, stream: IO, chunk_size: int):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._buf = bytearray()
+        self._pos = 0
+        self._mark = None
+        self._offset = 0
+        self._eof = False
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(f"{message} (byte {self._offset + self._pos})", '', 0)
+
+    def _fill(self) -> bool:
+        """Read the next chunk, dropping consumed bytes that are not being captured."""
+        if self._eof:
+            return False
+
+        chunk = self._stream.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+
+        keep_from = self._pos if self._mark is None else self._mark
+        if keep_from:
+            del self._buf[:keep_from]
+            self._offset += keep_from
+            self._pos -= keep_from
+            if self._mark is not None:
+                self._mark = 0
+        self._buf += chunk
+        return True
+
+    def _next_token(self) -> Optional[int]:
+        """Skip whitespace and return the next byte without consuming it."""
+        while True:
+            self._pos = _WS.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return None
+
+    def _skip_bom(self) -> None:
+        while len(self._buf) < len(_BOM) and self._fill():
+            pass
+        if self._buf.startswith(_BOM):
+            self._pos = len(_BOM)
+
+    def _expect(self, char: str) -> None:
+        if self._next_token() != ord(char):
+            raise self._error(f"Expected '{char}'")
+        self._pos += 1
+
+    def _match_complete(self, pattern: re.Pattern) -> int:
+        """Match a token that must not end at the buffer boundary."""
+        while True:
+            match = pattern.match(self._buf, self._pos)
+            if match and match.end() < len(self._buf):
+                return match.end()
+            if not self._fill():
+                if match and match.end() > self._pos:
+                    return match.end()
+                raise self._error("Unexpected end of data")
+
+    def _skip_container(self) -> None:
+        """
+        Skip a whole array/object.
+
+        Complete chunks are handled by stripping strings and counting brackets
+        at C speed; only the chunk where the container ends is walked bracket
+        by bracket to find the exact end position.
+        """
+        depth = 0
+        while True:
+            safe_end = _COMPLETE.match(self._buf, self._pos).end()
+            stripped = _STRING.sub(b'', self._buf[self._pos:safe_end])
+            level = depth
+            for char in stripped.translate(None, _NOT_BRACKET):
+                level += 1 if char in _OPEN else -1
+                if level == 0:
+                    return self._walk_container(depth)
+            depth = level
+            self._pos = safe_end
+            if not self._fill():
+                raise self._error("Unexpected end of data")
+
+    def _walk_container(self, depth: int) -> None:
+        """Walk bracket by bracket until a container at ``depth`` closes."""
+        while True:
+            self._pos = _SKIP.match(self._buf, self._pos).end()
+            if self._pos >= len(self._buf) or self._buf[self._pos] == _QUOTE:
+                # Either out of data or inside a string that continues in the next chunk
+                if not self._fill():
+                    raise self._error("Unexpected end of data")
+                continue
+            depth += 1 if self._buf[self._pos] in _OPEN else -1
+            self._pos += 1
+            if depth == 0:
+                return
+
+    def _skip_value(self) -> None:
+        first = self._next_token()
+        if first is None:
+            raise self._error("Unexpected end of data")
+        if first in _OPEN:
+            self._skip_container()
+        elif first == _QUOTE:
+            self._pos = self._match_complete(_STRING)
+        else:
+            self._pos = self._match_complete(_SCALAR)
+
+    def _read_value(self) -> bytes:
+        self._next_token()
+        self._mark = self._pos
+        self._skip_value()
+        raw = bytes(self._buf[self._mark:self._pos])
+        self._mark = None
+        return raw
+
+    def members(self, wanted: Optional[set]):
+        """
+        Yield ``(key, raw_value)`` for wanted members, skipping the others.
+
+        Args:
+            wanted: Member names to capture, or None to capture all of them
+        """
+        self._skip_bom()
+        self._expect('{')
+        remaining = None if wanted is None else set(wanted)
+
+        if self._next_token() == ord('}'):
+            return
+
+        while True:
+            if self._next_token() != _QUOTE:
+                raise self._error("Expected object key")
+            end = self._match_complete(_STRING)
+            key = json.loads(bytes(self._buf[self._pos:end]))
+            self._pos = end
+            self._expect(':')
+
+            if remaining is None or key in remaining:
+                yield key, self._read_value()
+                if remaining is not None:
+                    remaining.discard(key)
+                    if not remaining:
+                        return
+            else:
+                self._skip_value()
+
+            token = self._next_token()
+            if token == ord('}'):
+                return
+            if token != ord(','):
+                raise self._error("Expected ',' or '}'")
+            self._pos += 1
+
+
+def read_sections(stream: IO, sections: Optional[Iterable[str]] = None,
+                  loads: Optional[Callable[[bytes], Any]] = None,
+                  chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Read selected top-level members of a JSON object from a stream.
+
+    Args:
+        stream: Binary or text file object positioned at the start of the document
+        sections: Top-level keys to materialize, or None for all of them
+        loads: JSON decoding function (defaults to the fastest installed backend)
+        chunk_size: Number of bytes/characters read per chunk
+
+    Returns:
+        Dictionary with the requested members that were present in the document
+
+    Raises:
+        json.JSONDecodeError: If the document is not a well-formed JSON object
+    """
+    if loads is None:
+        loads = get_json_loads()
+
+    wanted = None if sections is None else set(sections)
+    reader = _SectionReader(stream, chunk_size)
+    return {key: loads(raw) for key, raw in reader.members(wanted)}
@@ -0,0 +1,419 @@
+"""
+Structured QMK keycode parser.
+
+Keycodes are parsed into small immutable nodes::
+
+    KC_A                  Key('KC_A')
+    LSFT(KC_1)            ModWrap('LSFT', Key('KC_1'))
+    LSFT_T(KC_A)          ModTap(('LSFT',), Key('KC_A'))
+    LT2(KC_SPACE)         LayerTap(2, Key('KC_SPACE'))      (also LT(2, KC_SPACE))
+    MO(1), DF(2), LM(1, MOD_LSFT)
+                          LayerOp('MO', 1), LayerOp('DF', 2), LayerOp('LM', 1, ('LSFT',))
+    M3, MACRO(3)          MacroRef(3)
+    0x7C16                Raw(0x7C16)
+    TD(0), OSM(MOD_LSFT)  Func('TD', (0,)), Func('OSM', (Key('MOD_LSFT'),))
+    -1                    EMPTY
+
+Parsing is cached per distinct keycode string and nodes are interned, so
+equal keycodes (``LT2(KC_A)`` and ``LT(2, KC_A)``) share one node and
+callers can memoize on nodes cheaply. The intern table is bounded: when it
+fills up it is cleared together with the parse cache (nodes stay equal to
+their re-parsed counterparts, only their identity is not shared anymore).
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple, Union
+
+PARSE_CACHE_SIZE = 8192
+# Nested keycodes intern several nodes per parsed string
+INTERN_TABLE_SIZE = 4 * PARSE_CACHE_SIZE
+
+TRANSPARENT_NAMES = frozenset(('KC_TRNS', 'KC_TRANSPARENT', '_______'))
+
+# Functions wrapping a key with held modifiers
+MODIFIER_WRAPPERS = frozenset((
+    'LSFT', 'LCTL', 'LALT', 'LGUI', 'RSFT', 'RCTL', 'RALT', 'RGUI',
+    'S', 'C', 'A', 'G', 'LCMD', 'LOPT', 'LWIN', 'RCMD', 'ROPT', 'RWIN', 'ALGR',
+    'C_S', 'LCA', 'LCAG', 'LSA', 'RSA', 'RCS', 'SGUI', 'LCG', 'RCG', 'MEH', 'HYPR',
+))
+
+# Layer functions taking a single layer number (LM also takes modifiers)
+LAYER_OPS = frozenset(('MO', 'TG', 'TO', 'TT', 'OSL', 'DF', 'PDF', 'LM'))
+
+MODIFIER_SYMBOLS = {
+    'LSFT': '⇧', 'LCTL': '⌃', 'LALT': '⌥', 'LGUI': '⌘',
+    'RSFT': 'R⇧', 'RCTL': 'R⌃', 'RALT': 'R⌥', 'RGUI': 'R⌘',
+    'S': '⇧', 'C': '⌃', 'A': '⌥', 'G': '⌘',
+    'C_S': '⌃⇧', 'LCA': '⌃⌥', 'LSA': '⇧⌥', 'SGUI': '⇧⌘', 'LCG': '⌃⌘', 'LCAG': '⌃⌥⌘',
+}
+
+# Display labels of basic keys (matched on the name without KC_)
+KEY_LABELS = {
+    'TRNS': '▽', 'TRANSPARENT': '▽', '_______': '▽',
+    'NO': '✗',
+    'LSFT': '⇧', 'LSHIFT': '⇧', 'LCTL': '⌃', 'LCTRL': '⌃', 'LALT': '⌥', 'LGUI': '⌘',
+    'RSFT': 'R⇧', 'RSHIFT': 'R⇧', 'RCTL': 'R⌃', 'RCTRL': 'R⌃',
+}
+
+_CALL = re.compile(r'^([A-Za-z_][A-Za-z0-9_]*)\s*\((.*)\)$', re.DOTALL)
+_LT_N = re.compile(r'^LT(\d+)$')
+_MACRO = re.compile(r'^M(\d+)$')
+_MOD_TAP = re.compile(r'^([A-Z_]+)_T$')
+_NUMBER = re.compile(r'^(0[xX][0-9A-Fa-f]+|\d+)$')
+
+
+class Node:
+    """Base class of parsed keycodes."""
+
+    __slots__ = ()
+    kind = 'node'
+
+
+@dataclass(frozen=True)
+class Empty(Node):
+    """Position without a key."""
+
+    kind = 'empty'
+
+
+@dataclass(frozen=True)
+class Key(Node):
+    """Basic (or unrecognized) keycode, e.g. ``KC_A`` or ``RGB_TOG``."""
+
+    name: str
+
+    @property
+    def kind(self) -> str:
+        return 'transparent' if self.name in TRANSPARENT_NAMES else 'key'
+
+
+@dataclass(frozen=True)
+class ModWrap(Node):
+    """Key sent with a held modifier, e.g. ``LSFT(KC_1)``."""
+
+    mod: str
+    key: Node
+    kind = 'mod'
+
+
+@dataclass(frozen=True)
+class ModTap(Node):
+    """Modifier when held, key when tapped, e.g. ``LSFT_T(KC_A)``."""
+
+    mods: Tuple[str, ...]
+    key: Node
+    kind = 'mod_tap'
+
+
+@dataclass(frozen=True)
+class LayerTap(Node):
+    """Layer when held, key when tapped, e.g. ``LT2(KC_SPACE)``."""
+
+    layer: int
+    key: Node
+    kind = 'layer_tap'
+
+
+@dataclass(frozen=True)
+class LayerOp(Node):
+    """Layer switching key, e.g. ``MO(1)``; ``mods`` is only used by ``LM``."""
+
+    op: str
+    layer: int
+    mods: Tuple[str, ...] = ()
+
+    @property
+    def kind(self) -> str:
+        return self.op
+
+
+@dataclass(frozen=True)
+class MacroRef(Node):
+    """Reference to a Vial macro, e.g. ``M3``."""
+
+    index: int
+    kind = 'macro'
+
+
+@dataclass(frozen=True)
+class Raw(Node):
+    """Numeric keycode without a name, e.g. ``0x7C16``."""
+
+    value: int
+    kind = 'raw'
+
+
+@dataclass(frozen=True)
+class Func(Node):
+    """Any other function form, e.g. ``TD(0)``; arguments are nodes or ints."""
+
+    name: str
+    args: Tuple[Union[Node, int], ...]
+    kind = 'func'
+
+
+EMPTY = Empty()
+
+_interned: Dict[Node, Node] = {EMPTY: EMPTY}
+
+
+def _intern(node: Node) -> Node:
+    if len(_interned) >= INTERN_TABLE_SIZE:
+        clear_parse_cache()
+    return _interned.setdefault(node, node)
+
+
+def _split_args(text: str) -> Optional[Tuple[str, ...]]:
+    """Split call arguments on top-level commas (None if parentheses are unbalanced)."""
+    args = []
+    depth = 0
+    start = 0
+    for pos, char in enumerate(text):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth < 0:
+                return None
+        elif char == ',' and depth == 0:
+            args.append(text[start:pos].strip())
+            start = pos + 1
+    if depth:
+        return None
+    args.append(text[start:].strip())
+    return tuple(args)
+
+
+def _parse_mods(text: str) -> Tuple[str, ...]:
+    """Parse ``MOD_LSFT | MOD_LCTL`` into ('LSFT', 'LCTL')."""
+    return tuple(part.strip()[4:] if part.strip().startswith('MOD_') else part.strip()
+                 for part in text.split('|') if part.strip())
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse(text: str) -> Node:
+    text = text.strip()
+    if not text or text == '-1':
+        return EMPTY
+    if _NUMBER.match(text):
+        return _intern(Raw(int(text, 0)))
+    match = _MACRO.match(text)
+    if match:
+        return _intern(MacroRef(int(match.group(1))))
+
+    match = _CALL.match(text)
+    args = _split_args(match.group(2)) if match else None
+    if args is None:
+        return _intern(Key(text))
+    name = match.group(1)
+
+    lt_match = _LT_N.match(name)
+    if lt_match and len(args) == 1:
+        return _intern(LayerTap(int(lt_match.group(1)), _parse(args[0])))
+    if name == 'LT' and len(args) == 2 and args[0].isdigit():
+        return _intern(LayerTap(int(args[0]), _parse(args[1])))
+    if name in LAYER_OPS and args[0].isdigit():
+        if name == 'LM' and len(args) == 2:
+            return _intern(LayerOp(name, int(args[0]), _parse_mods(args[1])))
+        if len(args) == 1:
+            return _intern(LayerOp(name, int(args[0])))
+    if name in MODIFIER_WRAPPERS and len(args) == 1:
+        return _intern(ModWrap(name, _parse(args[0])))
+    tap_match = _MOD_TAP.match(name)
+    if tap_match and tap_match.group(1) in MODIFIER_WRAPPERS and len(args) == 1:
+        return _intern(ModTap((tap_match.group(1),), _parse(args[0])))
+    if name == 'MT' and len(args) == 2:
+        return _intern(ModTap(_parse_mods(args[0]), _parse(args[1])))
+    if name == 'MACRO' and len(args) == 1 and args[0].isdigit():
+        return _intern(MacroRef(int(args[0])))
+
+    return _intern(Func(name, tuple(int(arg) if arg.isdigit() else _parse(arg) for arg in args)))
+
+
+def parse_keycode(keycode: Any) -> Node:
+    """
+    Parse a keycode into an interned node.
+
+    Args:
+        keycode: Keycode as found in a .vil layout (string, int, or -1)
+
+    Returns:
+        Parsed node (EMPTY for empty positions)
+    """
+    if keycode is None or keycode == -1:
+        return EMPTY
+    if isinstance(keycode, int):
+        return _intern(Raw(keycode))
+    return _parse(str(keycode))
+
+
+def _format_mods(mods: Tuple[str, ...]) -> str:
+    return '|'.join(f"MOD_{mod}" for mod in mods)
+
+
+def format_keycode(node: Node) -> Any:
+    """
+    Format a node back into a keycode string in the form Vial writes.
+
+    Args:
+        node: Parsed keycode
+
+    Returns:
+        Keycode string (-1 for EMPTY)
+    """
+    if isinstance(node, Key):
+        return node.name
+    if isinstance(node, ModWrap):
+        return f"{node.mod}({format_keycode(node.key)})"
+    if isinstance(node, ModTap):
+        if len(node.mods) == 1:
+            return f"{node.mods[0]}_T({format_keycode(node.key)})"
+        return f"MT({_format_mods(node.mods)}, {format_keycode(node.key)})"
+    if isinstance(node, LayerTap):
+        return f"LT{node.layer}({format_keycode(node.key)})"
+    if isinstance(node, LayerOp):
+        if node.mods:
+            return f"{node.op}({node.layer}, {_format_mods(node.mods)})"
+        return f"{node.op}({node.layer})"
+    if isinstance(node, MacroRef):
+        return f"M{node.index}"
+    if isinstance(node, Raw):
+        return f"0x{node.value:04X}"
+    if isinstance(node, Func):
+        args = ', '.join(str(arg) if isinstance(arg, int) else format_keycode(arg)
+                         for arg in node.args)
+        return f"{node.name}({args})"
+    return -1
+
+
+def normalize_keycode(keycode: Any) -> Any:
+    """
+    Get the canonical spelling of a keycode, for matching and indexing.
+
+    Spacing and alias variants of one keycode (``LT(2, KC_SPC)``,
+    ``LT(2,KC_SPC)`` and ``LT2(KC_SPC)``) all normalize to the same string.
+
+    Args:
+        keycode: Keycode as found in a .vil layout (string, int, or -1)
+
+    Returns:
+        Keycode string in the form Vial writes (-1 for empty positions)
+    """
+    if isinstance(keycode, str):
+        return _normalize(keycode)
+    return format_keycode(parse_keycode(keycode))
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _normalize(text: str) -> Any:
+    return format_keycode(_parse(text))
+
+
+def _mods_label(mods: Tuple[str, ...]) -> str:
+    return ''.join(MODIFIER_SYMBOLS.get(mod, mod) for mod in mods)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def keycode_label(node: Node) -> str:
+    """
+    Get the display label of a parsed keycode.
+
+    Basic keys lose their ``KC_`` prefix and modifier/special names become
+    symbols (``KC_LALT`` -> ``⌥``); wrapped keys are labelled recursively,
+    so ``LCTL(KC_LALT)`` becomes ``⌃(⌥)``.
+
+    Args:
+        node: Parsed keycode
+
+    Returns:
+        Label ('' for EMPTY)
+    """
+    if isinstance(node, Key):
+        if node.name.startswith('MOD_') and node.name[4:] in MODIFIER_SYMBOLS:
+            return MODIFIER_SYMBOLS[node.name[4:]]
+        name = node.name[3:] if node.name.startswith('KC_') else node.name
+        return KEY_LABELS.get(name, name)
+    if isinstance(node, ModWrap):
+        return f"{MODIFIER_SYMBOLS.get(node.mod, node.mod)}({keycode_label(node.key)})"
+    if isinstance(node, ModTap):
+        return f"{_mods_label(node.mods)}_T({keycode_label(node.key)})"
+    if isinstance(node, LayerTap):
+        return f"LT{node.layer}({keycode_label(node.key)})"
+    if isinstance(node, LayerOp):
+        if node.mods:
+            return f"{node.op}({node.layer}, {_mods_label(node.mods)})"
+        return f"{node.op}({node.layer})"
+    if isinstance(node, Func):
+        args = ', '.join(str(arg) if isinstance(arg, int) else keycode_label(arg)
+                         for arg in node.args)
+        return f"{node.name}({args})"
+    if isinstance(node, (MacroRef, Raw)):
+        return format_keycode(node)
+    return ''
+
+
+def layer_action(node: Node) -> Optional[Tuple[str, int]]:
+    """
+    Get the layer action of a parsed keycode.
+
+    Args:
+        node: Parsed keycode
+
+    Returns:
+        Tuple of (action, target layer), e.g. ('MO', 1) or ('LT', 2),
+        or None for keys that do not change layers
+    """
+    if isinstance(node, LayerOp):
+        return node.op, node.layer
+    if isinstance(node, LayerTap):
+        return 'LT', node.layer
+    return None
+
+
+def tap_key(node: Node) -> Node:
+    """Get the innermost key sent by a (possibly wrapped) keycode."""
+    while isinstance(node, (ModWrap, ModTap, LayerTap)):
+        node = node.key
+    return node
+
+
+def replace_tap_key(node: Node, old: Node, new: Node) -> Node:
+    """
+    Replace the innermost key of a keycode, keeping its wrappers.
+
+    Args:
+        node: Parsed keycode
+        old: Key to replace
+        new: Replacement key
+
+    Returns:
+        New interned node (``node`` itself if it does not contain ``old``)
+    """
+    if node == old:
+        return new
+    if isinstance(node, (ModWrap, ModTap, LayerTap)):
+        inner = replace_tap_key(node.key, old, new)
+        if inner is not node.key:
+            if isinstance(node, ModWrap):
+                return _intern(ModWrap(node.mod, inner))
+            if isinstance(node, ModTap):
+                return _intern(ModTap(node.mods, inner))
+            return _intern(LayerTap(node.layer, inner))
+    return node
+
+
+def clear_parse_cache() -> None:
+    """Empty the parse cache and the intern table."""
+    _parse.cache_clear()
+    _normalize.cache_clear()
+    _interned.clear()
+    _interned[EMPTY] = EMPTY
+
+
+def parse_cache_info() -> Dict[str, int]:
+    """Statistics of the parse cache and the intern table."""
+    info = _parse.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize,
+            'interned': len(_interned)}
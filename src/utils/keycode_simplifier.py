@@ -2,13 +2,30 @@
 Keycode simplification and color mapping utilities.
 """
 
-from typing import Tuple
+import json
+from functools import lru_cache
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+from .keycode_parser import Node, keycode_label, parse_cache_info, parse_keycode
+
+# Keycodes repeat heavily across keys, layers and files, so labels and
+# colors are memoized; these bound the caches.
+LABEL_CACHE_SIZE = 4096
+COLOR_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=LABEL_CACHE_SIZE)
+def _simplify(keycode: str) -> str:
+    return keycode_label(parse_keycode(keycode))
 
 
 def simplify_keycode(keycode: str) -> str:
     """
     Simplify QMK keycode for display purposes.
     
+    The keycode is parsed (see ``keycode_parser``), so only whole names are
+    replaced: ``KC_LALT`` becomes ``⌥`` and ``LCTL(KC_LALT)`` becomes
+    ``⌃(⌥)``, while ``KC_NONUS_HASH`` keeps its name.
+    
     Args:
         keycode: Full QMK keycode string
         
@@ -19,28 +36,161 @@ def simplify_keycode(keycode: str) -> str:
     if keycode == -1 or keycode == "-1":
         return ""
     
-    keycode = str(keycode)
-    
-    # Remove KC_ prefix for cleaner display
-    if keycode.startswith("KC_"):
-        keycode = keycode[3:]
-    
-    # Simplify common modifiers
-    replacements = {
-        "LSFT": "⇧",
-        "LCTL": "⌃",
-        "LALT": "⌥",
-        "LGUI": "⌘",
-        "RSHIFT": "R⇧",
-        "RCTRL": "R⌃",
-        "TRNS": "▽",  # Transparent key
-        "NO": "✗",
-    }
+    return _simplify(str(keycode))
+
+
+class ColorRule(NamedTuple):
+    """
+    One entry of a color scheme.
+    
+    ``match`` is 'equals', 'prefix' or 'contains', tested against the
+    simplified keycode with any of ``patterns``, or 'kind', tested against
+    the kind of the parsed keycode (e.g. 'MO', 'DF', 'layer_tap', 'mod',
+    'mod_tap', 'macro', 'transparent').
+    """
+    match: str
+    patterns: Tuple[str, ...]
+    face: str
+    edge: str
+    label: str = ''
+
+
+_MATCHERS = {
+    'equals': lambda node, label, patterns: label in patterns,
+    'prefix': lambda node, label, patterns: label.startswith(patterns),
+    'contains': lambda node, label, patterns: any(p in label for p in patterns),
+    'kind': lambda node, label, patterns: node.kind in patterns,
+}
+
+
+class ColorScheme:
+    """
+    Ordered table of color rules with a memoized classifier.
+    
+    The first matching rule wins and keys matching no rule get the default
+    colors. Each scheme has its own bounded cache, so switching or editing
+    schemes never serves stale colors.
+    """
+    
+    def __init__(self, rules: Iterable[ColorRule], default: Tuple[str, str],
+                 default_label: str = 'Regular Keys', cache_size: int = COLOR_CACHE_SIZE):
+        """
+        Initialize the scheme.
+        
+        Args:
+            rules: Color rules, tested in order
+            default: (face_color, edge_color) for keys matching no rule
+            default_label: Legend text for the default colors
+            cache_size: Maximum number of memoized keycodes
+            
+        Raises:
+            ValueError: If a rule has an unknown match type
+        """
+        self.rules = tuple(
+            rule._replace(patterns=tuple(rule.patterns)) for rule in rules
+        )
+        for rule in self.rules:
+            if rule.match not in _MATCHERS:
+                raise ValueError(f"Unknown color rule match {rule.match!r}, "
+                                 f"expected one of {sorted(_MATCHERS)}")
+        self.default = tuple(default)
+        self.default_label = default_label
+        self.cache_size = cache_size
+        self._compiled = [(_MATCHERS[rule.match], rule.patterns, (rule.face, rule.edge))
+                          for rule in self.rules]
+        self.get_key_color = lru_cache(maxsize=cache_size)(self._classify)
+        self.get_key_style = lru_cache(maxsize=cache_size)(self._style)
+    
+    def __reduce__(self):
+        # The memoized lookups cannot be pickled; rebuild them (for worker processes)
+        return (self.__class__, (self.rules, self.default, self.default_label, self.cache_size))
     
-    for old, new in replacements.items():
-        keycode = keycode.replace(old, new)
+    def _match(self, node: Node, label: str) -> Tuple[str, str]:
+        for matches, patterns, colors in self._compiled:
+            if matches(node, label, patterns):
+                return colors
+        return self.default
     
-    return keycode
+    def _classify(self, keycode: str) -> Tuple[str, str]:
+        return self._match(parse_keycode(keycode), keycode)
+    
+    def _style(self, keycode: Any) -> Tuple[str, str, str]:
+        node = parse_keycode(keycode)
+        label = keycode_label(node)
+        return (label,) + self._match(node, label)
+    
+    def legend(self) -> Tuple[Tuple[str, str, str], ...]:
+        """Legend entries as (label, face_color, edge_color), default colors last."""
+        return tuple((rule.label, rule.face, rule.edge) for rule in self.rules) + \
+            ((self.default_label,) + self.default,)
+    
+    def cache_key(self) -> Tuple[Any, ...]:
+        """Everything rendered output depends on, for render cache keys."""
+        return (self.rules, self.default, self.default_label)
+    
+    def cache_info(self) -> Dict[str, Any]:
+        """Hit/miss statistics of the color and style caches."""
+        return {'colors': _stats(self.get_key_color), 'styles': _stats(self.get_key_style)}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ColorScheme':
+        """
+        Build a scheme from a JSON-style dictionary.
+        
+        Format::
+        
+            {"rules": [{"match": "prefix", "patterns": ["MO(", "LT"],
+                        "face": "#ffcccc", "edge": "#cc0000", "label": "Layer Keys"}],
+             "default": {"face": "#e0e0e0", "edge": "#666666", "label": "Regular Keys"}}
+             
+        Args:
+            data: Scheme description
+            
+        Returns:
+            ColorScheme
+            
+        Raises:
+            ValueError: If the description is malformed
+        """
+        try:
+            rules = [ColorRule(spec['match'], tuple(spec['patterns']), spec['face'],
+                               spec['edge'], spec.get('label', ''))
+                     for spec in data.get('rules', [])]
+            default = data.get('default', {})
+            return cls(rules, (default.get('face', '#e0e0e0'), default.get('edge', '#666666')),
+                       default.get('label', 'Regular Keys'))
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"Invalid color scheme: {e}") from e
+    
+    @classmethod
+    def from_file(cls, filepath: str) -> 'ColorScheme':
+        """Load a scheme from a JSON file (see ``from_dict``)."""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+DEFAULT_COLOR_SCHEME = ColorScheme(
+    [
+        ColorRule('equals', ("▽",), '#f0f0f0', '#cccccc', 'Transparent (▽)'),
+        ColorRule('kind', ("MO", "layer_tap"), '#ffcccc', '#cc0000', 'Layer Keys (MO, LT)'),
+        ColorRule('kind', ("DF",), '#ccccff', '#0000cc', 'Layer Change (DF)'),
+        ColorRule('contains', ("⇧", "⌃", "⌥", "⌘"), '#ffffcc', '#cccc00', 'Modifier Combos (⇧⌃⌥⌘)'),
+    ],
+    ('#e0e0e0', '#666666'),
+)
+
+_color_scheme = DEFAULT_COLOR_SCHEME
+
+
+def get_color_scheme() -> ColorScheme:
+    """Get the scheme used by ``get_key_color`` and ``get_key_style``."""
+    return _color_scheme
+
+
+def set_color_scheme(scheme: Optional[ColorScheme]) -> None:
+    """Replace the active color scheme (None restores the default)."""
+    global _color_scheme
+    _color_scheme = scheme or DEFAULT_COLOR_SCHEME
 
 
 def get_key_color(keycode: str) -> Tuple[str, str]:
@@ -53,14 +203,39 @@ def get_key_color(keycode: str) -> Tuple[str, str]:
     Returns:
         Tuple of (face_color, edge_color)
     """
-    if keycode == "▽":  # Transparent
-        return '#f0f0f0', '#cccccc'
-    elif keycode.startswith("MO(") or keycode.startswith("LT"):
-        return '#ffcccc', '#cc0000'  # Layer keys
-    elif keycode.startswith("DF("):
-        return '#ccccff', '#0000cc'  # Default layer change
-    elif any(mod in keycode for mod in ["⇧", "⌃", "⌥", "⌘"]):
-        return '#ffffcc', '#cccc00'  # Modifier combos
-    else:
-        return '#e0e0e0', '#666666'  # Regular keys
+    return _color_scheme.get_key_color(keycode)
+
 
+def get_key_style(keycode: Any) -> Tuple[str, str, str]:
+    """
+    Get the label and colors of a raw keycode with a single cached lookup.
+    
+    Args:
+        keycode: Full QMK keycode
+        
+    Returns:
+        Tuple of (simplified_keycode, face_color, edge_color)
+    """
+    return _color_scheme.get_key_style(keycode)
+
+
+def _stats(cached) -> Dict[str, Any]:
+    info = cached.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'max_size': info.maxsize,
+        'hit_rate': info.hits / lookups if lookups else 0.0,
+    }
+
+
+def cache_stats() -> Dict[str, Any]:
+    """
+    Get hit-rate statistics of the label, color and parse caches.
+    
+    Returns:
+        Dictionary with 'labels', 'colors', 'styles' and 'parser' statistics
+    """
+    return {'labels': _stats(_simplify), **_color_scheme.cache_info(), 'parser': parse_cache_info()}
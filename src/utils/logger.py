@@ -8,10 +8,21 @@ from datetime import datetime
 from typing import Optional
 
 
+class _DeferredFileHandler(logging.FileHandler):
+    """File handler that creates its directory and opens the file on the first record."""
+    
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
 def setup_logger(name: str, log_dir: str = "logs", level: int = logging.INFO) -> logging.Logger:
     """
     Set up a logger with file and console handlers.
     
+    The log file (and ``log_dir``) is only created when the first record is
+    written, so importing modules stays free of file system work.
+    
     Args:
         name: Logger name
         log_dir: Directory to store log files
@@ -20,9 +31,6 @@ def setup_logger(name: str, log_dir: str = "logs", level: int = logging.INFO) ->
     Returns:
         Configured logger instance
     """
-    # Create logs directory if it doesn't exist
-    os.makedirs(log_dir, exist_ok=True)
-    
     # Create logger
     logger = logging.getLogger(name)
     logger.setLevel(level)
@@ -43,7 +51,7 @@ def setup_logger(name: str, log_dir: str = "logs", level: int = logging.INFO) ->
     
     # File handler - detailed logs
     log_filename = os.path.join(log_dir, f"{name}_{datetime.now().strftime('%Y%m%d')}.log")
-    file_handler = logging.FileHandler(log_filename, encoding='utf-8')
+    file_handler = _DeferredFileHandler(log_filename, encoding='utf-8', delay=True)
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(detailed_formatter)
     logger.addHandler(file_handler)
@@ -2,12 +2,18 @@
 Flask web application for keyboard visualization.
 """
 
+import json
+import mimetypes
 import os
+import threading
 from pathlib import Path
-from flask import Flask, render_template, request, send_file, flash, redirect, url_for
+from flask import (Flask, Response, render_template, request, send_file, flash, redirect, url_for,
+                   jsonify, stream_with_context)
 from werkzeug.utils import secure_filename
-from ..core import VialLoader, KeycodeTransformer, LayerVisualizer, InteractiveVisualizer
-from ..utils import setup_logger
+from ..core import (VialLoader, KeycodeTransformer, SvgVisualizer, InteractiveVisualizer,
+                    RuleSet, LAYOUT_SECTIONS, ParseCache, RenderCache, write_assets)
+from ..utils import setup_logger, keycode_cache_stats
+from ..utils.compression import is_compressible, select_precompressed, write_precompressed
 
 logger = setup_logger('web_app')
 
@@ -15,7 +21,10 @@ logger = setup_logger('web_app')
 PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
 UPLOAD_FOLDER = PROJECT_ROOT / 'data'
 OUTPUT_FOLDER = PROJECT_ROOT / 'output'
+CACHE_FOLDER = PROJECT_ROOT / 'cache'
 ALLOWED_EXTENSIONS = {'vil', 'json'}
+# Content-hashed viewer assets never change, so browsers may keep them for a year
+ASSET_MAX_AGE = 365 * 24 * 3600
 
 
 def allowed_file(filename: str) -> bool:
@@ -23,6 +32,11 @@ def allowed_file(filename: str) -> bool:
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def offline_filename(html_filename: str) -> str:
+    """Name of the self-contained copy of a page that uses shared viewer assets."""
+    return f"{os.path.splitext(html_filename)[0]}.offline.html"
+
+
 def create_app():
     """Create and configure the Flask application."""
     app = Flask(__name__,
@@ -31,6 +45,20 @@ def create_app():
     
     app.config['UPLOAD_FOLDER'] = str(UPLOAD_FOLDER)
     app.config['OUTPUT_FOLDER'] = str(OUTPUT_FOLDER)
+    # Processes rendering PNG layer panels; panels are cached per layer, so
+    # an edit only redraws the layers it changed
+    app.config['RENDER_WORKERS'] = int(os.environ.get('RENDER_WORKERS', 1))
+    # Extra images produced by the same render, as name:scale:format
+    # (the thumbnail is shown on the result page)
+    app.config['RENDER_OUTPUTS'] = os.environ.get('RENDER_OUTPUTS', 'thumb:0.25:webp').split()
+    # Disk budget of rendered PNG/HTML files reused across uploads
+    app.config['RENDER_CACHE_BYTES'] = int(os.environ.get('RENDER_CACHE_BYTES', 256 * 1024 * 1024))
+    # Keyboard matrix shapes (ROWSxCOLS) whose layer panels are prepared at
+    # startup, so the first uploads do not pay for fonts and figure layout
+    app.config['WARM_SHAPES'] = os.environ.get('WARM_SHAPES', '4x12 5x12 5x14 6x15').split()
+    # 'shared': interactive pages load the viewer CSS/JS from static/viewer
+    # (cached by browsers); 'inline': every page is self-contained
+    app.config['VIEWER_ASSETS'] = os.environ.get('VIEWER_ASSETS', 'shared')
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
     app.secret_key = 'keyboard-visualizer-secret-key-change-in-production'
     
@@ -38,6 +66,90 @@ def create_app():
     UPLOAD_FOLDER.mkdir(exist_ok=True)
     OUTPUT_FOLDER.mkdir(exist_ok=True)
     
+    # Parsed layouts shared by all requests, keyed by file content
+    parse_cache = ParseCache(max_entries=256, cache_dir=CACHE_FOLDER / 'parsed',
+                             max_disk_bytes=app.config['RENDER_CACHE_BYTES'])
+    
+    # Rendered outputs keyed by keymap content and render options
+    render_cache = RenderCache(CACHE_FOLDER / 'render', max_bytes=app.config['RENDER_CACHE_BYTES'])
+    
+    # Viewer stylesheet and script shared by all interactive pages
+    assets_url = None
+    if app.config['VIEWER_ASSETS'] == 'shared':
+        write_assets(Path(app.static_folder) / 'viewer')
+        assets_url = f"{app.static_url_path}/viewer"
+    
+    @app.after_request
+    def cache_viewer_assets(response):
+        """Let browsers and proxies keep the content-hashed viewer assets."""
+        if assets_url and request.path.startswith(assets_url + '/') and response.status_code == 200:
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = ASSET_MAX_AGE
+            response.cache_control.immutable = True
+        return response
+    
+    # Set once the figure pool is warm (see /ready)
+    ready = threading.Event()
+    
+    def warm_up():
+        try:
+            from ..core.visualizer import DPI, OutputSpec, warm_up as warm_figures
+            shapes = [tuple(int(n) for n in shape.lower().split('x'))
+                      for shape in app.config['WARM_SHAPES']]
+            # Panels are rendered at the resolution of the largest output
+            scale = max([1.0] + [OutputSpec.parse(spec).scale for spec in app.config['RENDER_OUTPUTS']])
+            warm_figures(shapes, DPI * scale)
+        except Exception as e:
+            logger.warning(f"Figure pool warm-up failed: {e}")
+        ready.set()
+    
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+    
+    def transform_layers(layers, index):
+        """Apply the rename and rule file options of the submitted form."""
+        rename_layer = request.form.get('rename_layer', type=int)
+        rename_old = request.form.get('rename_old', '').strip()
+        rename_new = request.form.get('rename_new', '').strip()
+        
+        # Apply transformation if requested
+        if rename_layer is not None and rename_old and rename_new:
+            transformer = KeycodeTransformer()
+            layers = transformer.rename_keycode_in_all_layers(
+                layers, rename_layer, rename_old, rename_new, index=index
+            )
+            logger.info(f"Applied transformation: layer {rename_layer}, {rename_old} -> {rename_new}")
+        
+        # Apply an uploaded rule file if provided
+        rules_file = request.files.get('rules_file')
+        if rules_file and rules_file.filename:
+            rules = RuleSet.from_json(json.load(rules_file.stream))
+            layers = KeycodeTransformer.apply_rules(layers, rules, index=index)
+            logger.info(f"Applied {len(rules)} rules from {rules_file.filename}")
+        
+        return layers
+    
+    def send_output(filepath: str, mimetype: str = None, as_attachment: bool = False,
+                    download_name: str = None):
+        """
+        Send a generated file, using its precompressed sibling when the
+        client's Accept-Encoding allows one.
+        """
+        mimetype = mimetype or mimetypes.guess_type(filepath)[0] or 'application/octet-stream'
+        selected = select_precompressed(filepath, request.accept_encodings.quality)
+        if selected is None:
+            response = send_file(filepath, mimetype=mimetype, as_attachment=as_attachment,
+                                 download_name=download_name)
+        else:
+            encoding, sibling = selected
+            response = send_file(sibling, mimetype=mimetype, as_attachment=as_attachment,
+                                 download_name=download_name or os.path.basename(filepath))
+            response.headers['Content-Encoding'] = encoding
+        if is_compressible(filepath):
+            # Caches must keep the encoded and identity variants apart
+            response.vary.add('Accept-Encoding')
+        return response
+    
     @app.route('/')
     def index():
         """Main page."""
@@ -69,45 +181,63 @@ def create_app():
             file.save(filepath)
             logger.info(f"File uploaded: {filename}")
             
-            # Get transformation parameters
-            rename_layer = request.form.get('rename_layer', type=int)
-            rename_old = request.form.get('rename_old', '').strip()
-            rename_new = request.form.get('rename_new', '').strip()
+            # Get display parameters
+            resolved = request.form.get('resolved') == 'on'
+            image_format = request.form.get('image_format', 'png')
             
             # Load and process file
-            loader = VialLoader()
-            vil_data = loader.load_file(filepath)
-            layers = loader.extract_layers(vil_data)
-            
-            # Apply transformation if requested
-            if rename_layer is not None and rename_old and rename_new:
-                transformer = KeycodeTransformer()
-                layers = transformer.rename_keycode_in_all_layers(
-                    layers, rename_layer, rename_old, rename_new
-                )
-                logger.info(f"Applied transformation: layer {rename_layer}, {rename_old} -> {rename_new}")
+            loader = VialLoader(cache=parse_cache)
+            vil_data = loader.load_cached(filepath, sections=LAYOUT_SECTIONS)
+            layers = loader.extract_layers(vil_data, compact=True)
+            index = loader.build_index(layers)
+            layers = transform_layers(layers, index)
             
             # Generate visualizations (both PNG and HTML)
-            max_rows, max_cols = loader.get_key_dimensions(layers)
+            max_rows, max_cols = loader.get_key_dimensions(index)
             
-            # Generate static PNG
-            visualizer = LayerVisualizer(layers, max_rows, max_cols)
-            png_filename = f"visualization_{os.path.splitext(filename)[0]}.png"
-            png_path = os.path.join(app.config['OUTPUT_FOLDER'], png_filename)
-            visualizer.create_visualization(png_path, show_progress=False)
-            logger.info(f"PNG visualization created: {png_filename}")
+            # Generate static image (SVG without matplotlib, or PNG)
+            thumbnail_filename = None
+            if image_format == 'svg':
+                image_filename = f"visualization_{os.path.splitext(filename)[0]}.svg"
+                image_path = os.path.join(app.config['OUTPUT_FOLDER'], image_filename)
+                SvgVisualizer(layers, max_rows, max_cols, resolved=resolved).create_visualization(image_path)
+                write_precompressed(image_path)
+            else:
+                # Imported here: matplotlib is only loaded when a PNG is rendered
+                from ..core.visualizer import LayerVisualizer, OutputSpec
+                visualizer = LayerVisualizer(layers, max_rows, max_cols, resolved=resolved,
+                                             cache=render_cache)
+                image_filename = f"visualization_{os.path.splitext(filename)[0]}.png"
+                image_path = os.path.join(app.config['OUTPUT_FOLDER'], image_filename)
+                outputs = [OutputSpec('')]
+                outputs += [OutputSpec.parse(spec) for spec in app.config['RENDER_OUTPUTS']]
+                paths = visualizer.create_outputs(image_path, outputs, show_progress=False,
+                                                  workers=app.config['RENDER_WORKERS'])
+                if 'thumb' in paths:
+                    thumbnail_filename = os.path.basename(paths['thumb'])
+            logger.info(f"Static visualization created: {image_filename}")
             
             # Generate interactive HTML
-            interactive_viz = InteractiveVisualizer(layers, max_rows, max_cols)
+            interactive_viz = InteractiveVisualizer(layers, max_rows, max_cols, resolved=resolved,
+                                                    cache=render_cache)
             html_filename = f"visualization_{os.path.splitext(filename)[0]}.html"
             html_path = os.path.join(app.config['OUTPUT_FOLDER'], html_filename)
-            interactive_viz.generate_html(html_path, png_filename)
+            interactive_viz.generate_html(html_path, image_filename, assets_url=assets_url)
+            # Compressed once here, so serving the page costs no compression
+            write_precompressed(html_path)
+            if assets_url:
+                # Downloaded pages are opened without the server, so they
+                # get a copy with the viewer assets inlined
+                offline_path = os.path.join(app.config['OUTPUT_FOLDER'], offline_filename(html_filename))
+                interactive_viz.generate_html(offline_path, image_filename)
+                write_precompressed(offline_path)
             logger.info(f"Interactive HTML created: {html_filename}")
             
             flash('Visualization created successfully!', 'success')
             
             return render_template('result.html',
-                                 image_filename=png_filename,
+                                 image_filename=image_filename,
+                                 thumbnail_filename=thumbnail_filename,
                                  html_filename=html_filename,
                                  num_layers=len(layers))
             
@@ -120,9 +250,15 @@ def create_app():
     def download_file(filename):
         """Download generated visualization."""
         try:
-            filepath = os.path.join(app.config['OUTPUT_FOLDER'], secure_filename(filename))
+            filename = secure_filename(filename)
+            filepath = os.path.join(app.config['OUTPUT_FOLDER'], filename)
             logger.info(f"File download: {filename}")
-            return send_file(filepath, as_attachment=True)
+            if assets_url and filename.endswith('.html'):
+                # Pages using the shared viewer assets are downloaded self-contained
+                offline_path = os.path.join(app.config['OUTPUT_FOLDER'], offline_filename(filename))
+                if os.path.exists(offline_path):
+                    filepath = offline_path
+            return send_output(filepath, as_attachment=True, download_name=filename)
         except Exception as e:
             logger.error(f"Error downloading file: {e}")
             flash('File not found', 'error')
@@ -130,15 +266,15 @@ def create_app():
     
     @app.route('/view/<filename>')
     def view_file(filename):
-        """View generated visualization (PNG or HTML)."""
+        """View generated visualization (image or HTML)."""
         try:
             filepath = os.path.join(app.config['OUTPUT_FOLDER'], secure_filename(filename))
             
             # Determine mimetype based on file extension
             if filename.endswith('.html'):
-                return send_file(filepath, mimetype='text/html')
+                return send_output(filepath, mimetype='text/html')
             else:
-                return send_file(filepath, mimetype='image/png')
+                return send_output(filepath, mimetype=mimetypes.guess_type(filename)[0] or 'image/png')
         except Exception as e:
             logger.error(f"Error viewing file: {e}")
             return "File not found", 404
@@ -148,18 +284,56 @@ def create_app():
         """Serve interactive HTML visualization in an iframe-friendly way."""
         try:
             filepath = os.path.join(app.config['OUTPUT_FOLDER'], secure_filename(filename))
-            with open(filepath, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            return html_content
+            return send_output(filepath, mimetype='text/html')
         except Exception as e:
             logger.error(f"Error loading interactive view: {e}")
             return "File not found", 404
     
+    @app.route('/interactive', methods=['POST'])
+    def stream_interactive():
+        """
+        Render an uploaded keymap as an interactive page streamed in the
+        response, without writing the upload or the page to disk.
+        """
+        file = request.files.get('file')
+        if file is None or not allowed_file(file.filename):
+            return "Upload a .vil or .json file", 400
+        
+        try:
+            layers = VialLoader.extract_layers(VialLoader.load_stream(file.stream, LAYOUT_SECTIONS),
+                                               compact=True)
+            index = VialLoader.build_index(layers)
+            layers = transform_layers(layers, index)
+            max_rows, max_cols = VialLoader.get_key_dimensions(index)
+        except Exception as e:
+            logger.error(f"Error processing streamed file: {e}", exc_info=True)
+            return f"Error processing file: {e}", 400
+        
+        visualizer = InteractiveVisualizer(layers, max_rows, max_cols,
+                                           resolved=request.form.get('resolved') == 'on')
+        logger.info(f"Streaming interactive HTML for {file.filename}")
+        return Response(stream_with_context(visualizer.iter_html(assets_url=assets_url)),
+                        mimetype='text/html')
+    
     @app.route('/about')
     def about():
         """About page."""
         return render_template('about.html')
     
+    @app.route('/stats')
+    def cache_stats():
+        """Report cache statistics as JSON."""
+        return jsonify({'parse_cache': parse_cache.stats(), 'render_cache': render_cache.stats(),
+                        'keycodes': keycode_cache_stats()})
+    
+    @app.route('/ready')
+    def readiness():
+        """Readiness probe: 200 once rendering is warmed up, 503 before."""
+        if not ready.is_set():
+            return jsonify({'ready': False}), 503
+        from ..core.visualizer import FIGURE_POOL
+        return jsonify({'ready': True, 'figure_pool': FIGURE_POOL.stats()})
+    
     return app
 
 
@@ -0,0 +1,125 @@
+"""
+Tests for precompressed siblings of generated files.
+"""
+
+import gzip
+import os
+
+import pytest
+
+from src.utils import compression
+from src.utils.compression import (available_encodings, is_compressible, select_precompressed,
+                                   write_precompressed)
+
+PAGE = b'<!DOCTYPE html><html><body>' + b'<div class="key">KC_A</div>' * 200 + b'</body></html>'
+
+
+def accepting(*encodings):
+    """Accept-Encoding quality function accepting only ``encodings``."""
+    return lambda encoding: 1.0 if encoding in encodings else 0.0
+
+
+@pytest.fixture
+def page(tmp_path):
+    path = tmp_path / 'page.html'
+    path.write_bytes(PAGE)
+    return path
+
+
+@pytest.fixture
+def with_fake_brotli(monkeypatch):
+    # 'br' is preferred over gzip whether or not the brotli package is installed
+    compressors = {'br': ('.br', lambda data: b'BR' + data), **compression.COMPRESSORS}
+    compressors.pop('zstd', None)
+    monkeypatch.setattr(compression, 'COMPRESSORS', compressors)
+
+
+def make_older(path, seconds=10):
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime - seconds))
+
+
+def test_gzip_is_always_available():
+    assert 'gzip' in available_encodings()
+    assert available_encodings()[-1] == 'gzip'
+
+
+@pytest.mark.parametrize('name,expected', [
+    ('page.html', True), ('image.SVG', True), ('viewer.js', True), ('data.json', True),
+    ('image.png', False), ('thumb.webp', False), ('page.html.gz', False),
+])
+def test_is_compressible(name, expected):
+    assert is_compressible(name) is expected
+
+
+def test_write_precompressed_round_trip(page):
+    written = write_precompressed(page, ['gzip'])
+    assert written == [str(page) + '.gz']
+    assert gzip.decompress((page.parent / 'page.html.gz').read_bytes()) == PAGE
+    # No temporary files are left behind
+    assert sorted(p.name for p in page.parent.iterdir()) == ['page.html', 'page.html.gz']
+
+
+def test_write_precompressed_is_deterministic(page):
+    write_precompressed(page, ['gzip'])
+    first = (page.parent / 'page.html.gz').read_bytes()
+    write_precompressed(page, ['gzip'])
+    assert (page.parent / 'page.html.gz').read_bytes() == first
+
+
+def test_write_precompressed_writes_every_available_encoding(page):
+    written = write_precompressed(page)
+    assert len(written) == len(available_encodings())
+
+
+def test_write_precompressed_skips_images(tmp_path):
+    image = tmp_path / 'image.png'
+    image.write_bytes(b'\x89PNG')
+    assert write_precompressed(image) == []
+    assert [p.name for p in tmp_path.iterdir()] == ['image.png']
+
+
+def test_selects_gzip_when_accepted(page):
+    write_precompressed(page, ['gzip'])
+    assert select_precompressed(page, accepting('gzip')) == ('gzip', str(page) + '.gz')
+
+
+def test_refused_encodings_are_not_served(page):
+    write_precompressed(page, ['gzip'])
+    assert select_precompressed(page, accepting()) is None
+    assert select_precompressed(page, accepting('identity', 'deflate')) is None
+    # q=0 refuses an encoding explicitly
+    assert select_precompressed(page, lambda encoding: 0.0) is None
+
+
+def test_prefers_encodings_in_compressor_order(page, with_fake_brotli):
+    write_precompressed(page)
+    assert (page.parent / 'page.html.br').read_bytes() == b'BR' + PAGE
+    assert select_precompressed(page, accepting('gzip', 'br')) == ('br', str(page) + '.br')
+    assert select_precompressed(page, accepting('gzip')) == ('gzip', str(page) + '.gz')
+
+
+def test_falls_back_to_an_encoding_with_a_sibling(page, with_fake_brotli):
+    write_precompressed(page, ['gzip'])
+    assert select_precompressed(page, accepting('gzip', 'br')) == ('gzip', str(page) + '.gz')
+
+
+def test_stale_siblings_are_ignored(page, with_fake_brotli):
+    write_precompressed(page)
+    # The page is rewritten after its siblings were compressed
+    make_older(page.parent / 'page.html.br')
+    make_older(page.parent / 'page.html.gz')
+    page.write_bytes(PAGE + b'<!-- edited -->')
+    assert select_precompressed(page, accepting('gzip', 'br')) is None
+
+    # Only the fresh sibling is used
+    write_precompressed(page, ['gzip'])
+    assert select_precompressed(page, accepting('gzip', 'br')) == ('gzip', str(page) + '.gz')
+
+
+def test_missing_or_incompressible_files(tmp_path):
+    assert select_precompressed(tmp_path / 'missing.html', accepting('gzip')) is None
+    image = tmp_path / 'image.png'
+    image.write_bytes(b'\x89PNG')
+    (tmp_path / 'image.png.gz').write_bytes(gzip.compress(b'\x89PNG'))
+    assert select_precompressed(image, accepting('gzip')) is None
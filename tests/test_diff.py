@@ -0,0 +1,115 @@
+"""
+Tests for the keymap diff engine.
+"""
+
+from src.core.diff import DiffReference, KeyChange, KeyMove, diff_keymaps, diff_layers
+
+BASE = [
+    ['KC_ESC', 'KC_Q', 'KC_W', 'KC_E'],
+    ['KC_TAB', 'KC_A', 'KC_S', 'KC_D'],
+    ['KC_LSFT', 'KC_Z', 'KC_X', -1],
+]
+
+
+def copy(layer):
+    return [list(row) for row in layer]
+
+
+def test_identical_layers():
+    result = diff_layers(BASE, copy(BASE))
+    assert result.identical
+    assert result.changes == []
+    assert result.counts() == {'changed': 0, 'added': 0, 'removed': 0, 'moved': 0}
+
+
+def test_changed_added_and_removed_keys():
+    new = copy(BASE)
+    new[0][1] = 'KC_1'      # changed
+    new[2][3] = 'KC_C'      # added where the reference had no key
+    new[1][3] = -1          # removed
+    result = diff_layers(BASE, new, layer=3)
+
+    assert result.layer_changes(3) == {
+        (0, 1): KeyChange(3, 0, 1, 'changed', 'KC_Q', 'KC_1'),
+        (1, 3): KeyChange(3, 1, 3, 'removed', 'KC_D', None),
+        (2, 3): KeyChange(3, 2, 3, 'added', None, 'KC_C'),
+    }
+    assert result.layer_changes(0) == {}
+    assert result.counts() == {'changed': 1, 'added': 1, 'removed': 1, 'moved': 0}
+    assert not result.identical
+
+
+def test_ragged_rows_compare_by_column():
+    # Trailing empty positions are not differences
+    assert diff_layers([['KC_A', -1, -1]], [['KC_A']]).identical
+    result = diff_layers([['KC_A']], [['KC_A', 'KC_B']])
+    assert result.changes == [KeyChange(0, 0, 1, 'added', None, 'KC_B')]
+
+
+def test_swapped_keys_are_moves():
+    new = copy(BASE)
+    new[0][1], new[0][2] = new[0][2], new[0][1]
+    result = diff_layers(BASE, new)
+
+    assert sorted(result.moves) == [
+        KeyMove(0, 'KC_Q', (0, 1), (0, 2)),
+        KeyMove(0, 'KC_W', (0, 2), (0, 1)),
+    ]
+    assert result.counts()['changed'] == 2
+    assert result.counts()['moved'] == 2
+    assert result.layer_move_targets(0) == [(0, 1), (0, 2)]
+
+
+def test_transparent_keys_are_not_moves():
+    old = [['KC_TRNS', 'KC_A']]
+    new = [['KC_A', 'KC_TRNS']]
+    result = diff_layers(old, new)
+    assert result.moves == [KeyMove(0, 'KC_A', (0, 1), (0, 0))]
+
+
+def test_keymap_layer_moves_additions_and_removals():
+    other = [['KC_1', 'KC_2']]
+    third = [['KC_F1', 'KC_F2']]
+    reference = [BASE, other, third]
+
+    swapped = diff_keymaps(reference, [BASE, third, other])
+    assert sorted(swapped.layer_moves) == [(1, 2), (2, 1)]
+    assert swapped.changes == []
+    assert not swapped.identical
+
+    grown = diff_keymaps(reference, [BASE, other, third, [['KC_B']]])
+    assert grown.added_layers == [3]
+    assert grown.removed_layers == []
+
+    shrunk = diff_keymaps(reference, [BASE, other])
+    assert shrunk.removed_layers == [2]
+    assert shrunk.identical_layers == 2
+
+
+def test_reference_is_reusable_and_serializable():
+    reference = DiffReference([BASE])
+    assert len(reference) == 1
+    assert reference.diff([copy(BASE)]).identical
+
+    new = copy(BASE)
+    new[1][0] = 'KC_CAPS'
+    data = reference.analyze([new])
+    assert data['identical'] is False
+    assert data['counts']['changed'] == 1
+    assert data['changes'] == [{'layer': 0, 'row': 1, 'col': 0, 'kind': 'changed',
+                                'old': 'KC_TAB', 'new': 'KC_CAPS'}]
+    # The reference is not modified by a comparison
+    assert reference.diff([copy(BASE)]).identical
+
+
+def test_spelling_variants_are_equal():
+    reference = [[['LT(2,KC_SPC)', 'MACRO(3)', 'LSFT( KC_A )']]]
+    layers = [[['LT2(KC_SPC)', 'M3', 'LSFT(KC_A)']]]
+    assert diff_keymaps(reference, layers).identical
+    assert diff_layers(reference[0], layers[0]).identical
+
+    # Changes and moves report the canonical spelling
+    swapped = [[['M3', 'LT(2, KC_SPC)', 'LSFT(KC_A)']]]
+    result = diff_keymaps(reference, swapped)
+    assert result.changes[0] == KeyChange(0, 0, 0, 'changed', 'LT2(KC_SPC)', 'M3')
+    assert {move.keycode for move in result.moves} == {'LT2(KC_SPC)', 'M3'}
@@ -0,0 +1,120 @@
+"""
+Tests for the versioned keymap history.
+"""
+
+import pytest
+
+from src.core.history import KeymapHistory
+from src.core.keymap import KeymapMatrix
+from src.core.rules import RuleSet
+from src.core.transformer import KeycodeTransformer
+
+LAYERS = [
+    [['KC_ESC', 'KC_Q', 'KC_W'], ['KC_TAB', 'KC_A', -1]],
+    [['KC_TRNS', 'KC_1', 'KC_2'], ['KC_TRNS', 'KC_Q', 'KC_S']],
+]
+
+
+def rename(old, new, layer=0):
+    return lambda layers: KeycodeTransformer.rename_keycode_in_all_layers(layers, layer, old, new)
+
+
+def test_initial_version():
+    history = KeymapHistory(LAYERS)
+    assert history.current == (
+        (('KC_ESC', 'KC_Q', 'KC_W'), ('KC_TAB', 'KC_A', -1)),
+        (('KC_TRNS', 'KC_1', 'KC_2'), ('KC_TRNS', 'KC_Q', 'KC_S')),
+    )
+    assert (len(history), history.version, history.labels()) == (1, 0, ['initial'])
+    assert not history.can_undo() and not history.can_redo()
+    # Undo and redo at the ends stay put
+    assert history.undo() is history.redo() is history.current
+    # A KeymapMatrix starts the same history (LAYERS is rectangular, so nothing is padded)
+    assert KeymapHistory(KeymapMatrix.from_layers(LAYERS)).current == history.current
+
+
+def test_record_shares_unchanged_rows_and_layers():
+    history = KeymapHistory(LAYERS)
+    base = history.current
+    edited = history.record([(0, 1, 0, 'KC_TAB', 'KC_CAPS')], 'caps')
+    assert edited[0][1] == ('KC_CAPS', 'KC_A', -1)
+    assert edited[0][0] is base[0][0]
+    assert edited[1] is base[1]
+    # The previous version is untouched
+    assert base[0][1] == ('KC_TAB', 'KC_A', -1)
+    assert history.changes() == ((0, 1, 0, 'KC_TAB', 'KC_CAPS'),)
+    assert history.changes(0) == ()
+
+
+def test_apply_computes_the_delta():
+    history = KeymapHistory(LAYERS)
+    history.apply(rename('KC_Q', 'KC_X', layer=1), 'rename')
+    assert history.changes() == ((1, 1, 1, 'KC_Q', 'KC_X'),)
+    assert history.current[1][1] == ('KC_TRNS', 'KC_X', 'KC_S')
+    assert history.current[0] is history.goto(0)[0]
+
+    # A transform that changes nothing still records an (empty) version
+    history.goto(1)
+    history.apply(lambda layers: layers, 'noop')
+    assert history.changes() == ()
+    assert history.labels() == ['initial', 'rename', 'noop']
+
+
+def test_undo_redo_and_branching():
+    history = KeymapHistory(LAYERS)
+    initial = history.current
+    first = history.apply(rename('KC_Q', 'KC_X'), 'first')
+    second = history.apply(rename('KC_W', 'KC_Y'), 'second')
+
+    assert history.undo() is first
+    assert history.undo() is initial
+    assert not history.can_undo()
+    assert history.redo() is first
+    assert history.goto(-1) is second
+    assert history.goto(0) is initial
+    with pytest.raises(IndexError):
+        history.goto(3)
+
+    # Recording after an undo discards the redo branch
+    history.goto(1)
+    branched = history.apply(rename('KC_ESC', 'KC_GRV'), 'branch')
+    assert history.labels() == ['initial', 'first', 'branch']
+    assert not history.can_redo()
+    assert branched[0][0] == ('KC_GRV', 'KC_X', 'KC_W')
+
+
+def test_apply_rejects_shape_changes():
+    history = KeymapHistory(LAYERS)
+    with pytest.raises(ValueError, match='number of layers'):
+        history.apply(lambda layers: layers[:1])
+    with pytest.raises(ValueError, match='number of rows'):
+        history.apply(lambda layers: (layers[0][:1], layers[1]))
+    with pytest.raises(ValueError, match='length of layer 1, row 0'):
+        history.apply(lambda layers: (layers[0], (layers[1][0][:2], layers[1][1])))
+    assert len(history) == 1
+
+
+def test_apply_rules_records_the_rule_delta():
+    history = KeymapHistory(LAYERS)
+    rules = RuleSet.from_json([{'from': 'KC_TRNS', 'to': 'KC_NO'}])
+    layers = history.apply_rules(rules)
+    assert history.labels()[-1] == 'apply 1 rules'
+    assert [change[:3] for change in history.changes()] == [(1, 0, 0), (1, 1, 0)]
+    assert layers[1][0][0] == layers[1][1][0] == 'KC_NO'
+    assert layers[0] is history.goto(0)[0]
+
+
+def test_save_and_load_replay_the_deltas(tmp_path):
+    history = KeymapHistory(LAYERS)
+    history.apply(rename('KC_Q', 'KC_X'), 'first')
+    history.apply(rename('KC_W', 'KC_Y'), 'second')
+    history.undo()
+
+    path = tmp_path / 'history.json'
+    history.save(str(path))
+    loaded = KeymapHistory.load(str(path))
+    assert loaded.version == 1
+    assert loaded.labels() == history.labels()
+    assert loaded.current == history.current
+    assert loaded.goto(2) == history.goto(2)
+    assert loaded.changes(2) == history.changes(2)
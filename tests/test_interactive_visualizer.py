@@ -0,0 +1,144 @@
+"""
+Tests for the interactive HTML visualizer.
+"""
+
+import io
+import json
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from src.core.interactive_visualizer import InteractiveVisualizer
+from src.core.render_cache import RenderCache
+from src.core.viewer_assets import ASSET_FILES, VIEWER_CSS, VIEWER_JS, write_assets
+
+HOSTILE = 'KC_<img src=x onerror="alert(1)">'
+
+LAYERS = [
+    [['KC_ESC', HOSTILE], ['MO(1)', -1]],
+    [['KC_TRNS', 'KC_</script><script>alert(2)</script>'], ['KC_TRNS', 'KC_A']],
+]
+
+
+@pytest.fixture
+def built(monkeypatch):
+    """First keycode of each layer whose keys were built (not read from a cache)."""
+    built = []
+    layer_keys = InteractiveVisualizer._layer_keys
+
+    def counting(self, keys, *args):
+        built.append(keys[0][2])
+        return layer_keys(self, keys, *args)
+    monkeypatch.setattr(InteractiveVisualizer, '_layer_keys', counting)
+    return built
+
+
+def payload(html):
+    """Decode the keymap data embedded in a page."""
+    match = re.search(r'<script id="keymap-data"[^>]*>(.*?)</script>', html, re.S)
+    return json.loads(match.group(1))
+
+
+def test_keycodes_cannot_break_out_of_the_payload():
+    html = InteractiveVisualizer(LAYERS, 2, 2).to_string()
+    data = payload(html)
+    assert HOSTILE in data['originals']
+    assert 'KC_</script><script>alert(2)</script>' in data['originals']
+    assert '<img' not in html
+    assert '<script>alert' not in html
+
+
+def test_key_details_are_inserted_as_text():
+    body = VIEWER_JS[VIEWER_JS.index('function showKeyInfo'):]
+    body = body[:body.index('\n}\n')]
+    assert 'innerHTML' not in body
+    assert 'keycode.textContent = key.keycode' in body
+    assert 'original.textContent = key.original' in body
+    # No key value is written as markup anywhere in the viewer
+    assert 'innerHTML' not in VIEWER_JS
+
+
+def test_key_details_render_keycodes_literally():
+    node = shutil.which('node')
+    if node is None:
+        pytest.skip('Node.js is not installed')
+    body = VIEWER_JS[VIEWER_JS.index('function showKeyInfo'):]
+    body = body[:body.index('\n}\n') + 2]
+    # Minimal DOM: elements record their text, #keyDetails its children
+    script = body + """
+const nodes = {keyInfo: {style: {}}, keyDetails: {replaceChildren(...children) { this.children = children; }}};
+global.document = {
+    getElementById: id => nodes[id],
+    createElement: tag => ({tag}),
+};
+showKeyInfo(JSON.parse(process.argv[1]));
+console.log(JSON.stringify(nodes.keyDetails.children));
+"""
+    key = {'keycode': '<b>"A"</b>', 'original': 'KC_<A>', 'row': 1, 'col': 2, 'layer': 3}
+    result = subprocess.run([node, '-e', script, json.dumps(key)], capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout) == [
+        'Layer 3 - ', {'tag': 'strong', 'textContent': '<b>"A"</b>'}, ' (Original: ',
+        {'tag': 'code', 'textContent': 'KC_<A>'}, ') - Position: Row 1, Col 2',
+    ]
+
+
+def test_only_changed_layers_are_rebuilt(tmp_path, built):
+    cache = RenderCache(str(tmp_path / 'cache'))
+    InteractiveVisualizer(LAYERS, 2, 2, cache=cache).to_string()
+    assert built == ['KC_ESC', 'KC_TRNS']
+
+    built.clear()
+    edited = [LAYERS[0], [['KC_TRNS', 'KC_B'], ['KC_TRNS', 'KC_A']]]
+    html = InteractiveVisualizer(edited, 2, 2, cache=cache).to_string()
+    assert built == ['KC_TRNS']
+    assert html == InteractiveVisualizer(edited, 2, 2).to_string()
+
+
+def test_write_assets(tmp_path):
+    names = write_assets(tmp_path / 'viewer')
+    assert names == ASSET_FILES
+    assert (tmp_path / 'viewer' / names['js']).read_text(encoding='utf-8') == VIEWER_JS
+    assert (tmp_path / 'viewer' / names['css']).read_text(encoding='utf-8') == VIEWER_CSS
+    assert re.fullmatch(r'viewer\.[0-9a-f]{12}\.js', names['js'])
+
+    # Existing files are kept
+    (tmp_path / 'viewer' / names['js']).write_text('kept')
+    write_assets(tmp_path / 'viewer')
+    assert (tmp_path / 'viewer' / names['js']).read_text() == 'kept'
+    assert len(list((tmp_path / 'viewer').iterdir())) == 2
+
+
+def test_pages_link_or_inline_the_assets():
+    visualizer = InteractiveVisualizer(LAYERS, 2, 2)
+    shared = visualizer.to_string(assets_url='/static/viewer/')
+    assert f'<script src="/static/viewer/{ASSET_FILES["js"]}"></script>' in shared
+    assert f'<link rel="stylesheet" href="/static/viewer/{ASSET_FILES["css"]}">' in shared
+    assert VIEWER_JS not in shared
+
+    inline = visualizer.to_string()
+    assert VIEWER_JS in inline and VIEWER_CSS in inline
+    assert ASSET_FILES['js'] not in inline
+    assert payload(inline) == payload(shared)
+
+
+def test_pages_are_generated_in_chunks(tmp_path, built):
+    visualizer = InteractiveVisualizer(LAYERS, 2, 2)
+    chunks = visualizer.iter_html('sheet.png')
+    head = next(chunks)
+    # The document head is sent before any layer is built
+    assert head.startswith('<!DOCTYPE html>')
+    assert built == []
+    rest = list(chunks)
+    assert len(rest) > len(LAYERS)
+    assert built == ['KC_ESC', 'KC_TRNS']
+
+    html = head + ''.join(rest)
+    assert html == visualizer.to_string('sheet.png')
+    stream = io.StringIO()
+    visualizer.write(stream, 'sheet.png')
+    assert stream.getvalue() == html
+    visualizer.generate_html(str(tmp_path / 'page.html'), 'sheet.png')
+    assert (tmp_path / 'page.html').read_text(encoding='utf-8') == html
+    assert len(payload(html)['layers']) == len(LAYERS)
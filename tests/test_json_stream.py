@@ -0,0 +1,78 @@
+"""
+Tests for the section-selective JSON reader.
+"""
+
+import io
+import json
+
+import pytest
+
+from src.utils.json_stream import available_backends, get_json_loads, read_sections
+
+DOCUMENT = {
+    'version': 1,
+    'macro': ['[{"}]', 'a \\"quoted\\" ] string', {'nested': [[1, [2, {'x': '{'}]]]}],
+    'layout': [[['KC_A', 'KC_B'], ['MO(1)', -1]], [['KC_TRNS', 'LT(2, KC_SPC)'], ['"]', '{']]],
+    'encoder_layout': {'deep': {'deeper': [{}, [], '}}]]']}},
+    'uid': 1234567890,
+}
+
+# Small chunks put bracket, string and escape boundaries across reads
+CHUNK_SIZES = [1, 2, 3, 7, 64 * 1024]
+
+
+def read(text, sections, chunk_size=64 * 1024, binary=True):
+    stream = io.BytesIO(text.encode('utf-8')) if binary else io.StringIO(text)
+    return read_sections(stream, sections, json.loads, chunk_size=chunk_size)
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_skips_nested_brackets_and_strings_with_brackets(chunk_size):
+    text = json.dumps(DOCUMENT)
+    assert read(text, ['layout', 'uid'], chunk_size) == {
+        'layout': DOCUMENT['layout'], 'uid': DOCUMENT['uid']}
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_reads_all_sections_when_none_requested(chunk_size):
+    text = json.dumps(DOCUMENT, indent=2)
+    assert read(text, None, chunk_size) == DOCUMENT
+
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 64 * 1024])
+def test_text_streams_and_bom(chunk_size):
+    text = '\ufeff' + json.dumps(DOCUMENT)
+    assert read(text, ['encoder_layout'], chunk_size)['encoder_layout'] == DOCUMENT['encoder_layout']
+    assert read(text[1:], ['macro'], chunk_size, binary=False)['macro'] == DOCUMENT['macro']
+
+
+def test_missing_sections_are_left_out():
+    assert read(json.dumps({'a': 1}), ['layout']) == {}
+    assert read('{}', ['layout']) == {}
+
+
+def test_stops_reading_once_sections_are_found():
+    # Everything after the wanted member is never parsed
+    text = '{"layout": [1, 2], "rest": [' + ' garbage'
+    assert read(text, ['layout'], chunk_size=4) == {'layout': [1, 2]}
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 64 * 1024])
+@pytest.mark.parametrize('text', [
+    '',
+    '{"macro": [1, [2, 3]',
+    '{"macro": ["unterminated ]',
+    '{"macro": {"a": "}"}, "layout": [[',
+    '{"macro": 1 "layout": 2}',
+    '["not", "an", "object"]',
+])
+def test_truncated_or_malformed_input_raises(text, chunk_size):
+    with pytest.raises(json.JSONDecodeError):
+        read(text, ['layout'], chunk_size)
+
+
+def test_backends():
+    assert available_backends()[-1] == 'json'
+    assert get_json_loads('json') is json.loads
+    with pytest.raises(ValueError):
+        get_json_loads('no-such-backend')
@@ -0,0 +1,107 @@
+"""
+Tests for the structured keycode parser.
+"""
+
+import pytest
+
+from src.utils import keycode_parser
+from src.utils.keycode_parser import (
+    EMPTY, Func, Key, LayerOp, LayerTap, MacroRef, ModTap, ModWrap, Raw,
+    clear_parse_cache, format_keycode, keycode_label, normalize_keycode, parse_cache_info, parse_keycode,
+)
+
+# Keycodes in the form Vial writes them, with their parsed nodes
+CANONICAL = [
+    ('KC_A', Key('KC_A')),
+    ('KC_TRNS', Key('KC_TRNS')),
+    ('LSFT(KC_1)', ModWrap('LSFT', Key('KC_1'))),
+    ('LCTL(LSFT(KC_A))', ModWrap('LCTL', ModWrap('LSFT', Key('KC_A')))),
+    ('LSFT_T(KC_A)', ModTap(('LSFT',), Key('KC_A'))),
+    ('MT(MOD_LCTL|MOD_LSFT, KC_ESC)', ModTap(('LCTL', 'LSFT'), Key('KC_ESC'))),
+    ('LT2(KC_SPACE)', LayerTap(2, Key('KC_SPACE'))),
+    ('LT2(LSFT(KC_A))', LayerTap(2, ModWrap('LSFT', Key('KC_A')))),
+    ('MO(1)', LayerOp('MO', 1)),
+    ('DF(0)', LayerOp('DF', 0)),
+    ('LM(1, MOD_LSFT|MOD_LCTL)', LayerOp('LM', 1, ('LSFT', 'LCTL'))),
+    ('M3', MacroRef(3)),
+    ('0x7C16', Raw(0x7C16)),
+    ('TD(0)', Func('TD', (0,))),
+    ('OSM(MOD_LSFT)', Func('OSM', (Key('MOD_LSFT'),))),
+    ('FOO(1, KC_A, BAR(2))', Func('FOO', (1, Key('KC_A'), Func('BAR', (2,))))),
+]
+
+# Alternative spellings and the canonical form they format to
+ALTERNATIVES = [
+    ('LT(2, KC_SPACE)', 'LT2(KC_SPACE)'),
+    ('MACRO(3)', 'M3'),
+    ('0x7c16', '0x7C16'),
+    ('31766', '0x7C16'),
+    ('LM(1,MOD_LSFT | MOD_LALT)', 'LM(1, MOD_LSFT|MOD_LALT)'),
+    ('  KC_A  ', 'KC_A'),
+]
+
+
+@pytest.mark.parametrize('keycode,node', CANONICAL)
+def test_canonical_keycodes_round_trip(keycode, node):
+    parsed = parse_keycode(keycode)
+    assert parsed == node
+    assert format_keycode(parsed) == keycode
+    assert parse_keycode(format_keycode(parsed)) is parsed
+
+
+@pytest.mark.parametrize('keycode,canonical', ALTERNATIVES)
+def test_alternative_spellings_format_canonically(keycode, canonical):
+    parsed = parse_keycode(keycode)
+    assert format_keycode(parsed) == canonical
+    assert parse_keycode(canonical) is parsed
+    assert normalize_keycode(keycode) == normalize_keycode(canonical) == canonical
+
+
+@pytest.mark.parametrize('keycode', [-1, '-1', None, ''])
+def test_empty_positions(keycode):
+    assert parse_keycode(keycode) is EMPTY
+    assert format_keycode(EMPTY) == -1
+    assert normalize_keycode(keycode) == -1
+    assert keycode_label(EMPTY) == ''
+
+
+def test_integer_keycodes():
+    assert parse_keycode(0x7C16) is parse_keycode('0x7C16')
+    assert format_keycode(parse_keycode(4)) == '0x0004'
+    assert normalize_keycode(0x7C16) == '0x7C16'
+
+
+@pytest.mark.parametrize('keycode', ['LSFT(KC_A', 'LSFT(KC_A))', 'KC_NONUS_HASH', 'RGB_TOG'])
+def test_unparseable_keycodes_are_kept_verbatim(keycode):
+    parsed = parse_keycode(keycode)
+    assert parsed == Key(keycode)
+    assert format_keycode(parsed) == keycode
+
+
+@pytest.mark.parametrize('keycode,label', [
+    ('KC_A', 'A'),
+    ('KC_LALT', '⌥'),
+    ('KC_TRNS', '▽'),
+    ('KC_NO', '✗'),
+    ('KC_NONUS_HASH', 'NONUS_HASH'),
+    ('LCTL(KC_LALT)', '⌃(⌥)'),
+    ('LSFT_T(KC_A)', '⇧_T(A)'),
+    ('LT(2, KC_SPACE)', 'LT2(SPACE)'),
+    ('OSM(MOD_LSFT)', 'OSM(⇧)'),
+    ('M3', 'M3'),
+])
+def test_labels(keycode, label):
+    assert keycode_label(parse_keycode(keycode)) == label
+
+
+def test_intern_table_is_bounded(monkeypatch):
+    clear_parse_cache()
+    monkeypatch.setattr(keycode_parser, 'INTERN_TABLE_SIZE', 16)
+    for value in range(100):
+        parse_keycode(f"LSFT(USER{value:02d})")
+        assert parse_cache_info()['interned'] <= 16
+    # Nodes parsed before and after the table was cleared are still equal
+    assert parse_keycode('LSFT(USER00)') == ModWrap('LSFT', Key('USER00'))
+    clear_parse_cache()
+    assert parse_cache_info()['size'] == 0
+    assert parse_cache_info()['interned'] == 1
@@ -0,0 +1,142 @@
+"""
+Tests for the compact array-backed keymap.
+"""
+
+import pytest
+
+from src.core.keymap import (NO_KEY, KeymapMatrix, LayerView, RowView, SymbolTable, iter_layer_keys,
+                             layer_digest, row_cells, row_digest, row_keycodes)
+
+# Ragged rows, "-1" and -1 empty positions, a keycode repeated across layers
+LAYERS = [
+    [['KC_ESC', 'KC_Q', 'KC_W'], ['KC_TAB', -1], ['MO(1)']],
+    [['KC_TRNS', 'KC_1', '-1'], ['KC_TAB', 'KC_A', 'KC_S']],
+]
+
+BACKENDS = [pytest.param(True, id='numpy'), pytest.param(False, id='array')]
+
+
+def ragged(layers):
+    """Nested lists without trailing empty positions, as compared by row_cells."""
+    return [[list(row_cells(row)) for row in layer if row_cells(row)] for layer in layers]
+
+
+def test_symbol_table_interns_keycodes():
+    symbols = SymbolTable(['KC_A', 'KC_B', 'KC_A'])
+    assert symbols.keycodes == ['KC_A', 'KC_B']
+    assert symbols.intern('KC_B') == 1
+    assert symbols.intern(-1) == NO_KEY
+    assert symbols.intern('-1') == NO_KEY
+    assert symbols.lookup('KC_C') is None
+    assert len(symbols) == 2
+
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+def test_shape_is_padded_to_the_largest_layer_and_row(use_numpy):
+    matrix = KeymapMatrix.from_layers(LAYERS, use_numpy=use_numpy)
+    assert matrix.uses_numpy is use_numpy
+    assert matrix.shape == (2, 3, 3)
+    assert matrix.nbytes == 2 * 3 * 3 * 4
+    assert len(matrix) == 2
+    assert isinstance(matrix[0], LayerView)
+    # Every layer has num_rows rows and every row num_cols positions, unlike
+    # the ragged lists: short rows and missing rows are padded with NO_KEY
+    assert [len(layer) for layer in matrix] == [3, 3]
+    assert all(len(row) == 3 for layer in matrix for row in layer)
+    assert list(matrix[0][1]) == ['KC_TAB', NO_KEY, NO_KEY]
+    assert list(matrix[1][2]) == [NO_KEY, NO_KEY, NO_KEY]
+
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+def test_round_trip_keeps_every_key(use_numpy):
+    matrix = KeymapMatrix.from_layers(LAYERS, use_numpy=use_numpy)
+    layers = matrix.to_layers()
+    assert ragged(layers) == ragged(LAYERS)
+    assert layers[0][0] == ['KC_ESC', 'KC_Q', 'KC_W']
+    # Empty positions come back as NO_KEY whichever spelling they had
+    assert layers[1][0] == ['KC_TRNS', 'KC_1', NO_KEY]
+    assert KeymapMatrix.from_layers(layers, use_numpy=use_numpy).to_layers() == layers
+    assert KeymapMatrix.from_layers(matrix) is matrix
+
+
+def test_views_index_like_lists():
+    matrix = KeymapMatrix.from_layers(LAYERS)
+    row = matrix[0][0]
+    assert isinstance(row, RowView)
+    assert row[0] == 'KC_ESC'
+    assert row[-1] == 'KC_W'
+    assert row[1:] == ['KC_Q', 'KC_W']
+    assert matrix[-1][-2][1] == 'KC_A'
+    assert [len(rows) for rows in matrix[0:2]] == [3, 3]
+    with pytest.raises(IndexError):
+        row[3]
+    with pytest.raises(IndexError):
+        matrix[0][3]
+    with pytest.raises(IndexError):
+        matrix[2]
+
+
+def test_ids_and_key_iteration():
+    matrix = KeymapMatrix.from_layers(LAYERS)
+    keycodes = matrix.symbols.keycodes
+    assert [keycodes[i] if i != NO_KEY else None for i in matrix[0][1].ids()] == ['KC_TAB', None, None]
+    assert matrix[0][1].keycodes() == ['KC_TAB']
+    assert list(matrix[0].iter_keys()) == list(iter_layer_keys(LAYERS[0]))
+    assert list(iter_layer_keys(matrix[1])) == [
+        (0, 0, 'KC_TRNS'), (0, 1, 'KC_1'), (1, 0, 'KC_TAB'), (1, 1, 'KC_A'), (1, 2, 'KC_S')]
+    assert row_keycodes(matrix[1][0]) == row_keycodes(LAYERS[1][0]) == ['KC_TRNS', 'KC_1']
+
+
+def test_get_outside_the_matrix_is_empty():
+    matrix = KeymapMatrix.from_layers(LAYERS)
+    assert matrix.get(0, 2, 0) == 'MO(1)'
+    assert matrix.get(0, 2, 1) == NO_KEY
+    assert matrix.get(2, 0, 0) == NO_KEY
+    assert matrix.get(0, -1, 0) == NO_KEY
+
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+def test_replace_returns_a_new_matrix(use_numpy):
+    matrix = KeymapMatrix.from_layers(LAYERS, use_numpy=use_numpy)
+    replaced, count = matrix.replace('KC_TAB', 'KC_CAPS')
+    assert count == 2
+    assert replaced[0][1][0] == replaced[1][1][0] == 'KC_CAPS'
+    assert matrix[0][1][0] == 'KC_TAB'
+
+    only_second, count = matrix.replace('KC_TAB', 'KC_CAPS', layers=[1])
+    assert count == 1
+    assert only_second[0][1][0] == 'KC_TAB'
+
+    assert matrix.replace('KC_NOT_THERE', 'KC_A') == (matrix, 0)
+
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+def test_set_keys(use_numpy):
+    matrix = KeymapMatrix.from_layers(LAYERS, use_numpy=use_numpy)
+    changed = matrix.set_keys(0, [(1, 1), (2, 2)], 'KC_X')
+    assert changed[0][1][1] == changed[0][2][2] == 'KC_X'
+    cleared = changed.set_keys(0, [(1, 1)], NO_KEY)
+    assert cleared[0][1][1] == NO_KEY
+    assert matrix[0][1][1] == NO_KEY and matrix[0][2][2] == NO_KEY
+
+
+def test_padded_rows_compare_equal_to_ragged_rows():
+    matrix = KeymapMatrix.from_layers(LAYERS)
+    for layer, view in zip(LAYERS, matrix):
+        for row, row_view in zip(layer, view):
+            assert row_cells(row) == row_cells(row_view)
+    assert row_cells(['KC_A', -1, 'KC_B', '-1', -1]) == ('KC_A', '', 'KC_B')
+
+
+def test_digests():
+    matrix = KeymapMatrix.from_layers(LAYERS)
+
+    def digests(layer):
+        return [row_digest(row_cells(row)) for row in layer]
+
+    # The padded view (with an extra empty row) digests like the ragged layer
+    assert layer_digest(digests(matrix[1])) == layer_digest(digests(LAYERS[1]))
+    assert layer_digest(digests(matrix[0])) != layer_digest(digests(matrix[1]))
+    # Cells are separated, so shifting a keycode between cells changes the digest
+    assert row_digest(('KC_A', 'B')) != row_digest(('KC_AB',))
+    assert row_digest(('KC_A', '')) != row_digest(('', 'KC_A'))
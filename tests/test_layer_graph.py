@@ -0,0 +1,88 @@
+"""
+Tests for the layer activation graph.
+"""
+
+import sys
+
+import pytest
+
+from src.core.keymap import KeymapMatrix
+from src.core.layer_graph import LayerEdge, LayerGraph, analyze_layers
+
+LAYERS = [
+    [['MO(1)', 'LT2(KC_A)'], ['TG(9)', 'KC_Q']],   # TG(9) targets a missing layer
+    [['TO(2)', 'KC_TRNS']],
+    [['MO(1)', 'OSL(3)']],                        # 1 and 2 activate each other
+    [['TG(3)', 'KC_B']],                          # activates itself
+    [['KC_TRNS', -1]],                            # unreachable but empty
+    [['KC_C', 'MO(6)']],                          # unreachable, with keys
+    [['MO(5)']],
+]
+
+BACKENDS = [pytest.param(False, id='lists'), pytest.param(True, id='matrix')]
+
+
+def build(compact, layers=LAYERS, **kwargs):
+    return LayerGraph.build(KeymapMatrix.from_layers(layers) if compact else layers, **kwargs)
+
+
+@pytest.mark.parametrize('compact', BACKENDS)
+def test_edges(compact):
+    graph = build(compact)
+    assert len(graph.edges) == 8
+    assert graph.edges_from(0) == [LayerEdge(0, 1, 'MO', 0, 0, 'MO(1)'), LayerEdge(0, 2, 'LT', 0, 1, 'LT2(KC_A)')]
+    assert graph.invalid_edges == [LayerEdge(0, 9, 'TG', 1, 0, 'TG(9)')]
+    assert graph.successors(2) == [1, 3]
+    assert graph.successors(4) == []
+    assert graph.empty_layers == {4}
+
+
+@pytest.mark.parametrize('compact', BACKENDS)
+def test_reachability(compact):
+    graph = build(compact)
+    assert graph.reachable() == {0, 1, 2, 3}
+    assert graph.reachable(5) == {5, 6}
+    assert graph.is_reachable(3)
+    assert not graph.is_reachable(0, source=1)
+    assert graph.unreachable_layers() == [4, 5, 6]
+    # Layer 4 only holds transparent and empty keys
+    assert graph.dead_layers() == [5, 6]
+
+    shifted = build(compact, default_layer=5)
+    assert shifted.unreachable_layers() == [0, 1, 2, 3, 4]
+
+
+def test_shortest_paths():
+    graph = build(False)
+    # Layer 2 is reached directly from the default layer, not through layer 1
+    assert [(edge.source, edge.keycode) for edge in graph.path_to(3)] == [(0, 'LT2(KC_A)'), (2, 'OSL(3)')]
+    assert graph.path_to(0) == []
+    assert graph.path_to(5) is None
+    assert graph.path_to(1, source=2) == [LayerEdge(2, 1, 'MO', 0, 0, 'MO(1)')]
+
+
+@pytest.mark.parametrize('compact', BACKENDS)
+def test_cycles(compact):
+    assert build(compact).cycles() == [[1, 2], [3], [5, 6]]
+    assert build(compact, [[['MO(1)']], [['KC_A']]]).cycles() == []
+
+
+def test_long_chains_do_not_hit_the_recursion_limit():
+    count = sys.getrecursionlimit() + 100
+    layers = [[[f"MO({(layer + 1) % count})"]] for layer in range(count)]
+    graph = LayerGraph.build(layers)
+    assert graph.cycles() == [list(range(count))]
+    assert len(graph.path_to(count - 1)) == count - 1
+    assert graph.unreachable_layers() == []
+
+
+def test_summary():
+    summary = analyze_layers(LAYERS)
+    assert summary == build(True).to_dict()
+    assert (summary['num_layers'], summary['default_layer']) == (7, 0)
+    assert summary['unreachable'] == [4, 5, 6]
+    assert summary['dead'] == [5, 6]
+    assert summary['cycles'] == [[1, 2], [3], [5, 6]]
+    assert summary['paths'] == {1: ['L0 MO(1) @ (0,0)'], 2: ['L0 LT2(KC_A) @ (0,1)'],
+                                3: ['L0 LT2(KC_A) @ (0,1)', 'L2 OSL(3) @ (0,1)']}
+    assert summary['invalid_edges'][0]['target'] == 9
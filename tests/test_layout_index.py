@@ -0,0 +1,127 @@
+"""
+Tests for the layout index and the transforms that keep it up to date.
+"""
+
+import pytest
+
+from src.core.keymap import NO_KEY, KeymapMatrix
+from src.core.layout_index import LayoutIndex
+from src.core.transformer import KeycodeTransformer
+
+LAYERS = [
+    [['KC_ESC', 'KC_Q', 'KC_W'], ['KC_TAB', 'KC_Q', -1], ['MO(1)']],
+    [['KC_TRNS', 'KC_Q', '-1'], ['KC_TAB', 'KC_A', 'KC_S']],
+]
+
+
+def snapshot(index):
+    """Everything the index knows, in a comparable form."""
+    return {
+        'dimensions': index.dimensions,
+        'layers': index.num_layers,
+        'counts': list(index.layer_key_counts),
+        'frequencies': {k: v for k, v in index.frequencies.items() if v},
+        'positions': {keycode: sorted(index.positions(keycode)) for keycode in index.keycodes()},
+    }
+
+
+def plain(layers):
+    return [[list(row) for row in layer] for layer in layers]
+
+
+@pytest.mark.parametrize('compact', [False, True], ids=['lists', 'matrix'])
+def test_build(compact):
+    layers = KeymapMatrix.from_layers(LAYERS) if compact else LAYERS
+    index = LayoutIndex.build(layers)
+    assert index.dimensions == (3, 3)
+    assert index.num_layers == 2
+    assert index.layer_key_counts == [6, 5]
+    assert index.frequency('KC_Q') == 3
+    assert index.frequency('KC_NOPE') == 0
+    assert index.keycodes()[0] == 'KC_Q'
+    assert index.positions('KC_Q') == [(0, 0, 1), (0, 1, 1), (1, 0, 1)]
+    assert index.positions('KC_TAB', layer=1) == [(1, 1, 0)]
+    assert index.layer_positions('KC_Q', 0) == [(0, 1), (1, 1)]
+
+
+def test_build_matches_for_lists_and_matrices():
+    assert snapshot(LayoutIndex.build(LAYERS)) == snapshot(LayoutIndex.build(KeymapMatrix.from_layers(LAYERS)))
+
+
+@pytest.mark.parametrize('compact', [False, True], ids=['lists', 'matrix'])
+def test_indexed_rename_keeps_the_index_consistent(compact):
+    layers = KeymapMatrix.from_layers(LAYERS) if compact else LAYERS
+    index = LayoutIndex.build(layers)
+
+    renamed = KeycodeTransformer.rename_keycode_in_all_layers(layers, 0, 'KC_Q', 'KC_TAB', index=index)
+    assert plain(renamed)[0][:2] == [['KC_ESC', 'KC_TAB', 'KC_W'], ['KC_TAB', 'KC_TAB', NO_KEY if compact else -1]]
+    assert snapshot(index) == snapshot(LayoutIndex.build(renamed))
+    # The same rename without an index gives the same layers
+    assert plain(renamed) == plain(KeycodeTransformer.rename_keycode_in_all_layers(layers, 0, 'KC_Q', 'KC_TAB'))
+    if not compact:
+        # Unchanged layers are shared with the input
+        assert renamed[1] is layers[1]
+
+
+def test_record_rename():
+    index = LayoutIndex.build(LAYERS)
+    assert index.record_rename(1, 'KC_Q', 'KC_X') == [(0, 1)]
+    assert index.positions('KC_X') == [(1, 0, 1)]
+    assert index.frequency('KC_Q') == 2
+    # Nothing to move: unknown keycode, other layer, or a no-op rename
+    before = snapshot(index)
+    assert index.record_rename(1, 'KC_NOPE', 'KC_Y') == []
+    assert index.record_rename(1, 'KC_ESC', 'KC_Y') == []
+    assert index.record_rename(0, 'KC_Q', 'KC_Q') == []
+    assert snapshot(index) == before
+
+    # The last occurrences of a keycode remove it from the index
+    index.record_rename(0, 'KC_Q', 'KC_X')
+    assert 'KC_Q' not in index.keycodes()
+    assert index.positions('KC_Q') == []
+
+
+def test_record_change_sequence_matches_a_rebuild():
+    layers = plain(LAYERS)
+    index = LayoutIndex.build(layers)
+    changes = [
+        (0, 0, 0, 'KC_GRV'),   # key -> other key
+        (0, 1, 2, 'KC_Q'),     # empty -> key
+        (1, 1, 2, -1),         # key -> empty
+        (0, 2, 0, 'MO(1)'),    # key -> same key
+        (1, 0, 2, '-1'),       # empty -> empty
+        (0, 0, 1, -1), (0, 1, 1, -1), (0, 1, 2, -1), (1, 0, 1, -1),  # every KC_Q removed
+    ]
+    for layer, row, col, new in changes:
+        old = layers[layer][row][col]
+        layers[layer][row][col] = new
+        index.record_change(layer, row, col, old, new)
+        assert snapshot(index) == snapshot(LayoutIndex.build(layers)), (layer, row, col, new)
+    assert index.frequency('KC_Q') == 0
+    assert 'KC_Q' not in index.keycodes()
+
+
+@pytest.mark.parametrize('compact', [False, True], ids=['lists', 'matrix'])
+@pytest.mark.parametrize('indexed', [False, True], ids=['scan', 'index'])
+def test_spelling_variants_rename_together(compact, indexed):
+    variants = [[['LT(2,KC_SPC)', 'LT(2, KC_SPC)'], ['LT2(KC_SPC)', 'KC_SPC']]]
+    layers = KeymapMatrix.from_layers(variants) if compact else variants
+    index = LayoutIndex.build(layers)
+    assert index.keycodes() == ['LT2(KC_SPC)', 'KC_SPC']
+    assert index.frequency('LT(2,  KC_SPC)') == 3
+    assert index.layer_positions('LT(2,KC_SPC)', 0) == [(0, 0), (0, 1), (1, 0)]
+
+    renamed = KeycodeTransformer.rename_keycode_in_all_layers(layers, 0, 'LT(2, KC_SPC)', 'KC_ENT',
+                                                              index=index if indexed else None)
+    assert plain(renamed) == [[['KC_ENT', 'KC_ENT'], ['KC_ENT', 'KC_SPC']]]
+    if indexed:
+        assert snapshot(index) == snapshot(LayoutIndex.build(renamed))
+
+
+def test_record_change_normalizes_keycodes():
+    layers = [[['LT(2, KC_SPC)', 'KC_A']]]
+    index = LayoutIndex.build(layers)
+    index.record_change(0, 0, 0, 'LT2(KC_SPC)', 'MACRO(3)')
+    assert index.positions('LT(2,KC_SPC)') == []
+    assert index.positions('M3') == [(0, 0, 0)]
+    assert snapshot(index) == snapshot(LayoutIndex.build([[['M3', 'KC_A']]]))
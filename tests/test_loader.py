@@ -0,0 +1,120 @@
+"""
+Tests for bulk loading .vil collections.
+"""
+
+import json
+import os
+
+import pytest
+
+from src.core.loader import BulkLoadResult, VialLoader, expand_paths
+
+LAYOUT = [[['KC_A', 'KC_B'], ['MO(1)', -1]], [['KC_TRNS', 'KC_1'], ['KC_2', -1]]]
+
+
+def write(path, data):
+    path.write_text(data if isinstance(data, str) else json.dumps(data))
+    return str(path)
+
+
+@pytest.fixture
+def collection(tmp_path):
+    """Six valid files and four broken ones, in a nested directory."""
+    (tmp_path / 'nested').mkdir()
+    good = [write(tmp_path / ('nested' if i % 2 else '.') / f"good{i}.vil", {'layout': LAYOUT})
+            for i in range(6)]
+    bad = {
+        write(tmp_path / 'truncated.vil', '{"layout": [[['): 'JSONDecodeError',
+        write(tmp_path / 'array.vil', '[1, 2]'): 'JSONDecodeError',
+        write(tmp_path / 'no_layout.vil', {'uid': 1}): 'ValueError',
+        str(tmp_path / 'missing.vil'): 'FileNotFoundError',
+    }
+    return tmp_path, good, bad
+
+
+def count_layers(layers):
+    return len(layers)
+
+
+def crash_on_marked_files(layers):
+    # Kills the worker process, breaking the pool
+    if layers[0][0][0] == 'KC_CRASH':
+        os._exit(1)
+    return len(layers)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_collects_errors_without_aborting(collection, workers):
+    _, good, bad = collection
+    results = list(VialLoader.load_many(good + list(bad), workers=workers, batch_size=2,
+                                        analyze=count_layers))
+    by_path = {result.path: result for result in results}
+    assert len(results) == len(by_path) == len(good) + len(bad)
+
+    for path in good:
+        result = by_path[path]
+        assert result.ok
+        assert (result.num_layers, result.dimensions, result.analysis) == (2, (2, 2), 2)
+        assert result.layers is None
+    for path, error in bad.items():
+        assert not by_path[path].ok
+        assert by_path[path].error.startswith(error + ':')
+
+
+def test_directories_and_globs(collection):
+    root, good, _ = collection
+    found = {result.path for result in VialLoader.load_many(str(root), workers=1)}
+    assert set(good) <= found
+    assert {os.path.basename(path) for path in found} >= {'truncated.vil', 'array.vil'}
+    nested = {result.path for result in VialLoader.load_many(str(root / 'nested' / '*.vil'), workers=1)}
+    assert nested == {path for path in good if '/nested/' in path}
+
+
+def test_expand_paths(collection):
+    root, good, _ = collection
+    assert set(expand_paths(str(root))) == set(expand_paths(str(root / '**' / '*.vil')))
+    assert sorted(expand_paths(str(root / 'nested' / '*.vil'))) == sorted(p for p in good if '/nested/' in p)
+    assert list(expand_paths([root / 'a.vil', 'b.vil'])) == [str(root / 'a.vil'), 'b.vil']
+
+
+def test_include_layers(collection):
+    _, good, _ = collection
+    result, = VialLoader.load_many(good[:1], workers=1, include_layers=True)
+    assert [[list(row) for row in layer] for layer in result.layers] == LAYOUT
+
+
+def test_pending_batches_are_bounded(collection):
+    _, good, _ = collection
+    pulled = []
+
+    def paths():
+        for path in good * 5:
+            pulled.append(path)
+            yield path
+
+    results = VialLoader.load_many(paths(), workers=2, batch_size=2, max_pending=2)
+    next(results)
+    # Only max_pending batches (plus the one being assembled) were read ahead
+    assert len(pulled) <= (2 + 1) * 2
+    assert len(list(results)) == len(good) * 5 - 1
+    assert len(pulled) == len(good) * 5
+
+
+def test_broken_pool_fails_only_the_lost_batches(tmp_path):
+    paths = [write(tmp_path / f"good{i}.vil", {'layout': LAYOUT}) for i in range(8)]
+    crash = write(tmp_path / 'crash.vil', {'layout': [[['KC_CRASH']]]})
+    results = list(VialLoader.load_many(paths[:4] + [crash] + paths[4:], workers=2, batch_size=1,
+                                        max_pending=1, analyze=crash_on_marked_files))
+
+    assert len(results) == len(paths) + 1
+    failed = [result for result in results if not result.ok]
+    assert crash in {result.path for result in failed}
+    assert all('BrokenProcessPool' in result.error for result in failed)
+    # Batches submitted after the crash are loaded by a new pool
+    assert sum(result.ok for result in results) >= 4
+
+
+def test_result_defaults():
+    result = BulkLoadResult(path='x.vil')
+    assert result.ok
+    assert not BulkLoadResult(path='x.vil', error='ValueError: bad').ok
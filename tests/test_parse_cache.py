@@ -0,0 +1,104 @@
+"""
+Tests for the content-addressed parse cache.
+"""
+
+import json
+
+import pytest
+
+from src.core.loader import LAYOUT_SECTIONS, VialLoader
+from src.core.parse_cache import ParseCache, freeze
+
+DOCUMENT = {'version': 1, 'uid': 1234, 'layout': [[['KC_A', -1]]], 'macro': ['x' * 100]}
+CONTENT = json.dumps(DOCUMENT).encode('utf-8')
+
+
+def test_keys_depend_on_content_uid_and_sections():
+    key = ParseCache.make_key(CONTENT, ['layout', 'uid'])
+    assert key.startswith('1234-')
+    assert key.endswith('-layout+uid')
+    # Section order does not matter
+    assert key == ParseCache.make_key(CONTENT, ['uid', 'layout'])
+    assert key != ParseCache.make_key(CONTENT, ['layout'])
+    assert ParseCache.make_key(CONTENT).endswith('-all')
+    edited = json.dumps({**DOCUMENT, 'layout': [[['KC_B']]]}).encode('utf-8')
+    assert key != ParseCache.make_key(edited, ['layout', 'uid'])
+
+
+@pytest.mark.parametrize('content', [b'{"layout": []}', b'{"uid": "text"}', b'not json'])
+def test_keys_without_a_usable_uid(content):
+    assert ParseCache.make_key(content).startswith('nouid-')
+
+
+def test_values_are_frozen_and_shared():
+    cache = ParseCache()
+    stored = cache.put('k', {'layout': [[['KC_A']]], 'meta': {'a': [1]}})
+    assert stored['layout'] == ((('KC_A',),),)
+    with pytest.raises(TypeError):
+        stored['meta']['b'] = 2
+    assert cache.get('k') is stored
+    assert freeze([{'a': [1, 2]}])[0]['a'] == (1, 2)
+
+
+def test_evicts_least_recently_used_entries():
+    cache = ParseCache(max_entries=2)
+    for key in 'abc':
+        cache.put(key, {'key': key})
+        if key == 'b':
+            cache.get('a')  # 'a' is now more recent than 'b'
+    assert cache.get('b') is None
+    assert cache.get('a')['key'] == 'a'
+    assert cache.get('c')['key'] == 'c'
+    stats = cache.stats()
+    assert (stats['size'], stats['evictions'], stats['hits'], stats['misses']) == (2, 1, 3, 1)
+    assert stats['hit_rate'] == 3 / 4
+    assert 'disk_entries' not in stats
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    cache = ParseCache(max_entries=1, cache_dir=tmp_path)
+    cache.put('a', {'layout': [[['KC_A']]]})
+    cache.put('b', {'layout': [[['KC_B']]]})
+    # 'a' left memory but is read back from disk, frozen like a memory hit
+    assert cache.get('a')['layout'] == ((('KC_A',),),)
+    assert cache.stats()['disk_hits'] == 1
+
+    restarted = ParseCache(cache_dir=tmp_path)
+    assert restarted.get('b')['layout'] == ((('KC_B',),),)
+    stats = restarted.stats()
+    assert (stats['disk_hits'], stats['disk_entries']) == (1, 2)
+
+
+def test_disk_tier_is_bounded(tmp_path):
+    cache = ParseCache(max_entries=1, cache_dir=tmp_path, max_disk_bytes=100)
+    for key in 'abcd':
+        cache.put(key, {'macro': [key * 30]})  # 44 bytes each
+    stats = cache.stats()
+    assert stats['disk_bytes'] <= 100
+    assert stats['disk_evictions'] == 2
+    assert cache.get('a') is None
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_unreadable_disk_entries_are_misses(tmp_path):
+    cache = ParseCache(cache_dir=tmp_path)
+    (tmp_path / 'broken.json').write_text('{"layout": [')
+    assert ParseCache(cache_dir=tmp_path).get('broken') is None
+    assert cache.get('missing') is None
+
+
+def test_loader_parses_identical_content_once(tmp_path):
+    first = tmp_path / 'first.vil'
+    renamed = tmp_path / 'renamed.vil'
+    first.write_bytes(CONTENT)
+    renamed.write_bytes(CONTENT)
+    loader = VialLoader(cache=ParseCache())
+
+    data = loader.load_cached(str(first))
+    assert set(data) == set(LAYOUT_SECTIONS) & set(DOCUMENT)
+    assert loader.load_cached(str(renamed)) is data
+    assert loader.cache.stats()['hits'] == 1
+    # Other sections are a different entry
+    assert loader.load_cached(str(first), sections=None)['macro'] == ('x' * 100,)
+    # Without a cache the loader parses as usual
+    assert VialLoader().load_cached(str(first))['layout'] == DOCUMENT['layout']
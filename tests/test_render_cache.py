@@ -0,0 +1,123 @@
+"""
+Tests for the on-disk render cache.
+"""
+
+import os
+
+from src.core.render_cache import RenderCache
+from src.utils.keycode_simplifier import DEFAULT_COLOR_SCHEME, ColorScheme
+
+LAYERS = [[['KC_A', 'KC_B'], ['MO(1)', -1]], [['KC_TRNS', 'KC_1'], ['KC_2', -1]]]
+
+
+def entry(size):
+    return b'x' * size
+
+
+def names(cache):
+    return sorted(path.name for path in cache.cache_dir.iterdir())
+
+
+def test_keys_depend_on_content_and_options():
+    key = RenderCache.make_key(LAYERS, renderer='test', dpi=150)
+    assert key == RenderCache.make_key([[list(row) for row in layer] for layer in LAYERS],
+                                       dpi=150, renderer='test')
+    assert key != RenderCache.make_key(LAYERS, renderer='test', dpi=300)
+    assert key != RenderCache.make_key(LAYERS[:1], renderer='test', dpi=150)
+    # Trailing empty positions do not change what is rendered
+    assert RenderCache.make_key([[['KC_A', -1]]]) == RenderCache.make_key([[['KC_A']]])
+
+
+def test_keys_depend_on_the_whole_color_scheme():
+    relabelled = ColorScheme(DEFAULT_COLOR_SCHEME.rules, DEFAULT_COLOR_SCHEME.default,
+                             default_label='Other Keys')
+    assert (RenderCache.make_key(LAYERS, colors=DEFAULT_COLOR_SCHEME.cache_key())
+            != RenderCache.make_key(LAYERS, colors=relabelled.cache_key()))
+
+
+def test_save_load_and_miss(tmp_path):
+    cache = RenderCache(tmp_path)
+    assert cache.load('k', '.png') is None
+    cache.save('k', '.png', b'data')
+    assert cache.load('k', '.png') == b'data'
+    assert cache.load('k', '.html') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries'], stats['bytes']) == (1, 2, 1, 4)
+    assert stats['hit_rate'] == 1 / 3
+
+
+def test_fetch_and_store_files(tmp_path):
+    cache = RenderCache(tmp_path / 'cache')
+    rendered = tmp_path / 'out.html'
+    rendered.write_bytes(b'<html>')
+    cache.store('k', rendered)
+
+    copy = tmp_path / 'copy.html'
+    assert cache.fetch('k', copy)
+    assert copy.read_bytes() == b'<html>'
+    assert not cache.fetch('k', tmp_path / 'copy.png')
+
+
+def test_evicts_least_recently_used_entries(tmp_path):
+    cache = RenderCache(tmp_path, max_bytes=30)
+    for key in 'abc':
+        cache.save(key, '.bin', entry(10))
+    # Using 'a' makes 'b' the least recently used entry
+    assert cache.load('a', '.bin') is not None
+    cache.save('d', '.bin', entry(10))
+
+    assert names(cache) == ['a.bin', 'c.bin', 'd.bin']
+    assert cache.load('b', '.bin') is None
+    stats = cache.stats()
+    assert (stats['entries'], stats['bytes'], stats['evictions']) == (3, 30, 1)
+
+
+def test_replacing_an_entry_accounts_for_its_new_size(tmp_path):
+    cache = RenderCache(tmp_path, max_bytes=30)
+    cache.save('a', '.bin', entry(10))
+    cache.save('a', '.bin', entry(25))
+    assert cache.stats()['bytes'] == 25
+    cache.save('b', '.bin', entry(10))
+    assert names(cache) == ['b.bin']
+
+
+def test_keeps_an_entry_larger_than_the_budget(tmp_path):
+    cache = RenderCache(tmp_path, max_bytes=10)
+    cache.save('a', '.bin', entry(5))
+    cache.save('big', '.bin', entry(50))
+    assert names(cache) == ['big.bin']
+    assert cache.load('big', '.bin') == entry(50)
+
+
+def test_rebuilds_lru_order_after_restart(tmp_path):
+    cache = RenderCache(tmp_path)
+    for key in 'abc':
+        cache.save(key, '.bin', entry(10))
+    # Recency is kept in modification times: 'b' is the oldest, 'a' the newest
+    for age, key in ((300, 'b'), (200, 'c'), (100, 'a')):
+        os.utime(tmp_path / f"{key}.bin", (0, 1_000_000 - age))
+    (tmp_path / 'x.bin.123.456.tmp').write_bytes(entry(10))
+
+    restarted = RenderCache(tmp_path, max_bytes=20)
+    assert restarted.stats()['entries'] == 2
+    assert restarted.load('b', '.bin') is None
+    assert restarted.load('c', '.bin') == entry(10)
+    assert restarted.load('a', '.bin') == entry(10)
+
+
+def test_unreadable_entries_are_dropped(tmp_path):
+    cache = RenderCache(tmp_path)
+    cache.save('a', '.bin', b'data')
+    (tmp_path / 'a.bin').unlink()
+    assert cache.load('a', '.bin') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_clear(tmp_path):
+    cache = RenderCache(tmp_path)
+    cache.save('a', '.bin', b'data')
+    cache.load('a', '.bin')
+    cache.clear()
+    assert names(cache) == []
+    stats = cache.stats()
+    assert (stats['entries'], stats['bytes'], stats['hits'], stats['misses']) == (0, 0, 0, 0)
@@ -0,0 +1,136 @@
+"""
+Tests for resolving the effective keymap through the layer stack.
+"""
+
+import pytest
+
+from src.core.keymap import NO_KEY, KeymapMatrix, load_numpy
+from src.core.resolver import KeymapResolver, iter_display_keys, next_layer_state, parse_layer_action
+
+LAYERS = [
+    [['KC_A', 'KC_B', 'MO(1)'], ['KC_C', 'LT2(KC_SPACE)', -1]],
+    [['KC_TRNS', 'KC_1', 'KC_TRNS'], ['_______', 'TO(3)', -1]],
+    [['KC_2', 'KC_TRNS', 'KC_TRANSPARENT'], ['KC_TRNS', 'KC_TRNS', 'KC_X']],
+    [['KC_TRNS', 'KC_3', -1], ['KC_TRNS', 'KC_TRNS', 'KC_TRNS']],
+]
+
+
+@pytest.fixture(params=['numpy', 'lists'])
+def make_resolver(request):
+    """Build resolvers on the NumPy path or the pure-Python fallback (which follow the matrix backend)."""
+    use_numpy = request.param == 'numpy'
+    if use_numpy and load_numpy() is None:
+        pytest.skip('NumPy is not installed')
+
+    def make(layers=LAYERS, **kwargs):
+        return KeymapResolver(KeymapMatrix.from_layers(layers, use_numpy=use_numpy), **kwargs)
+    return make
+
+
+def keys(resolver, symbol_ids):
+    keycodes = resolver.matrix.symbols.keycodes
+    return [keycodes[i] if i != NO_KEY else None for i in list(symbol_ids)]
+
+
+def test_transparent_keys_fall_through_to_lower_active_layers(make_resolver):
+    resolver = make_resolver()
+    assert keys(resolver, resolver.resolve([0])) == ['KC_A', 'KC_B', 'MO(1)', 'KC_C', 'LT2(KC_SPACE)', None]
+    assert keys(resolver, resolver.resolve([0, 1])) == ['KC_A', 'KC_1', 'MO(1)', 'KC_C', 'TO(3)', None]
+    # Each transparent spelling falls through, across more than one layer
+    assert keys(resolver, resolver.resolve([1, 0, 2])) == ['KC_2', 'KC_1', 'MO(1)', 'KC_C', 'TO(3)', 'KC_X']
+    # Inactive layers are skipped, and an empty key on top stays empty
+    assert keys(resolver, resolver.resolve([0, 3])) == ['KC_A', 'KC_3', None, 'KC_C', 'LT2(KC_SPACE)', None]
+
+
+def test_numpy_and_fallback_paths_agree():
+    if load_numpy() is None:
+        pytest.skip('NumPy is not installed')
+    numpy_matrix = KeymapMatrix.from_layers(LAYERS, use_numpy=True)
+    vectorized = [(active, ids.tolist()) for active, ids in KeymapResolver(numpy_matrix).iter_combinations()]
+    array_matrix = KeymapMatrix.from_layers(LAYERS, use_numpy=False)
+    fallback = [(active, list(ids)) for active, ids in KeymapResolver(array_matrix).iter_combinations()]
+    assert len(vectorized) == 8
+    assert vectorized == fallback
+
+
+def test_combinations_are_memoized(make_resolver):
+    resolver = make_resolver()
+    first = resolver.resolve([0, 1, 2])
+    # {0, 1, 2} is built from {0, 1}, which is built from {0}
+    assert resolver.cache_info() == {'hits': 0, 'misses': 3, 'size': 3}
+    assert resolver.resolve([2, 1, 0]) is first
+    resolver.resolve([0, 2])
+    assert resolver.cache_info() == {'hits': 2, 'misses': 4, 'size': 4}
+
+    combos = dict(resolver.iter_combinations())
+    assert len(combos) == 8
+    assert all(len(active) and active[0] == 0 for active in combos)
+    assert resolver.cache_info()['size'] == 8
+    assert len(dict(resolver.iter_combinations(include_default=False))) == 15
+
+
+def test_memoization_is_bounded(make_resolver):
+    resolver = make_resolver(max_cached=2)
+    resolver.resolve([0, 1, 2])
+    assert resolver.cache_info()['size'] == 2
+    # The least recently used combination ({0}) was dropped
+    resolver.resolve([0, 1])
+    resolver.resolve([0])
+    assert resolver.cache_info() == {'hits': 1, 'misses': 4, 'size': 2}
+
+
+def test_resolved_layers_are_read_only():
+    if load_numpy() is None:
+        pytest.skip('NumPy is not installed')
+    resolver = KeymapResolver(LAYERS)
+    resolved = resolver.resolve([0, 1])
+    with pytest.raises(ValueError):
+        resolved[0] = 0
+
+
+@pytest.mark.parametrize('layers', [[], [0, 4], [-1]])
+def test_invalid_active_layers(layers):
+    with pytest.raises(ValueError):
+        KeymapResolver(LAYERS).resolve(layers)
+
+
+def test_activation_keys_and_stacks(make_resolver):
+    resolver = make_resolver()
+    assert resolver.activation_keys() == [(0, 0, 2, 'MO', 1), (0, 1, 1, 'LT', 2), (1, 1, 1, 'TO', 3)]
+    assert [resolver.activation_stack(layer) for layer in range(4)] == [(0,), (0, 1), (0, 2), (0, 3)]
+
+    # Layers no key reaches are resolved over the default layer
+    unreachable = make_resolver(LAYERS[2:])
+    assert unreachable.activation_keys() == []
+    assert unreachable.activation_stack(1) == (0, 1)
+    assert keys(unreachable, unreachable.resolve_layer(1)) == ['KC_2', 'KC_3', None, 'KC_TRNS', 'KC_TRNS', 'KC_X']
+
+
+def test_next_layer_state():
+    active = frozenset((0, 2))
+    assert next_layer_state(0, active, 'MO', 1) == (0, frozenset((0, 1, 2)))
+    assert next_layer_state(0, active, 'TO', 3) == (0, frozenset((0, 3)))
+    assert next_layer_state(0, active, 'DF', 1) == (1, frozenset((1, 2)))
+
+
+@pytest.mark.parametrize('keycode, action', [
+    ('MO(1)', ('MO', 1)), ('LT2(KC_SPACE)', ('LT', 2)), ('TG(3)', ('TG', 3)),
+    ('KC_A', None), (-1, None),
+])
+def test_parse_layer_action(keycode, action):
+    assert parse_layer_action(keycode) == action
+
+
+def test_display_keys(make_resolver):
+    resolver = make_resolver()
+    own = list(iter_display_keys(LAYERS[2], 2))
+    assert own[:2] == [(0, 0, 'KC_2', False), (0, 1, 'KC_TRNS', False)]
+    assert list(iter_display_keys(LAYERS[2], 2, resolver)) == [
+        (0, 0, 'KC_2', False), (0, 1, 'KC_B', True), (0, 2, 'MO(1)', True),
+        (1, 0, 'KC_C', True), (1, 1, 'LT2(KC_SPACE)', True), (1, 2, 'KC_X', False),
+    ]
+
+    resolved = resolver.resolved_matrix()
+    assert resolved.shape == resolver.matrix.shape
+    assert list(resolved[2][0]) == ['KC_2', 'KC_B', 'MO(1)']
+    assert list(resolved[3][0]) == ['KC_A', 'KC_3', NO_KEY]
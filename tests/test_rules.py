@@ -0,0 +1,153 @@
+"""
+Tests for batch keycode transformation rules.
+"""
+
+import json
+
+import pytest
+
+from src.core.keymap import NO_KEY, KeymapMatrix, row_cells
+from src.core.layout_index import LayoutIndex
+from src.core.rules import (ExactRule, GlobRule, PatternRule, PositionRule, RuleSet, TapRule, WrapRule,
+                            rule_from_dict)
+
+LAYERS = [
+    [['KC_ESC', 'KC_F1', 'KC_F12'], ['KC_1', 'KC_KP_5', 'LT2(KC_SPACE)'], ['KC_TRNS', -1]],
+    [['KC_TRNS', 'KC_F1', 'KC_SPACE'], ['KC_TRNS', 'KC_A', -1]],
+]
+
+RULES = {
+    'rules': [
+        {'type': 'position', 'layer': 0, 'row': 0, 'col': 0, 'to': 'KC_GRV'},
+        {'type': 'exact', 'from': 'KC_TRNS', 'to': 'KC_NO', 'layers': [1]},
+        {'type': 'glob', 'match': 'KC_F1?', 'to': 'KC_NO'},
+        {'type': 'regex', 'match': '^KC_KP_(\\d)$', 'to': 'KC_\\1'},
+        {'type': 'wrap', 'match': 'KC_[0-9]', 'wrapper': 'LSFT'},
+        {'type': 'tap', 'from': 'KC_SPACE', 'to': 'KC_ENTER'},
+        # "KC_F1?" above needs one more character, so KC_F1 falls through to here
+        {'type': 'exact', 'from': 'KC_F1', 'to': 'KC_F2'},
+    ]
+}
+
+EXPECTED = [
+    [['KC_GRV', 'KC_F2', 'KC_NO'], ['LSFT(KC_1)', 'KC_5', 'LT2(KC_ENTER)'], ['KC_TRNS', -1]],
+    [['KC_NO', 'KC_F2', 'KC_ENTER'], ['KC_NO', 'KC_A', -1]],
+]
+
+BACKENDS = [pytest.param(False, id='lists'), pytest.param(True, id='matrix')]
+
+
+def plain(layers):
+    return [[[key if key != NO_KEY else -1 for key in row] for row in layer] for layer in layers]
+
+
+def trimmed(layers):
+    """Rows without trailing empty positions, ignoring the padding a KeymapMatrix adds."""
+    return [[list(row_cells(row)) for row in layer if row_cells(row)] for layer in layers]
+
+
+@pytest.mark.parametrize('spec, kind', [
+    ({'from': 'KC_A', 'to': 'KC_B'}, ExactRule),
+    ({'type': 'glob', 'match': 'KC_*', 'to': 'KC_B'}, GlobRule),
+    ({'type': 'regex', 'match': 'KC_.', 'to': 'KC_B'}, PatternRule),
+    ({'type': 'wrap', 'match': 'KC_A', 'wrapper': 'LCTL'}, WrapRule),
+    ({'type': 'tap', 'from': 'KC_A', 'to': 'KC_B'}, TapRule),
+    ({'type': 'position', 'layer': '1', 'row': 0, 'col': 2, 'to': 'KC_B'}, PositionRule),
+])
+def test_rule_from_dict(spec, kind):
+    assert type(rule_from_dict(spec)) is kind
+
+
+@pytest.mark.parametrize('spec, message', [
+    ({'type': 'exact', 'from': 'KC_A'}, 'missing field'),
+    ({'type': 'regex', 'match': '(', 'to': 'KC_B'}, 'invalid pattern'),
+    ({'type': 'swap'}, "Unknown rule type 'swap'"),
+    (['KC_A'], 'is not an object'),
+])
+def test_invalid_rules(spec, message):
+    with pytest.raises(ValueError, match=message):
+        rule_from_dict(spec)
+
+
+def test_rule_sets_from_json_and_files(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps(RULES))
+    assert len(RuleSet.from_file(str(path))) == len(RULES['rules'])
+    assert len(RuleSet.from_json(RULES['rules'])) == len(RULES['rules'])
+    assert len(RuleSet.from_json({})) == 0
+    with pytest.raises(ValueError):
+        RuleSet.from_json({'rules': {'type': 'exact'}})
+
+
+@pytest.mark.parametrize('compact', BACKENDS)
+def test_apply_all_rule_types(compact):
+    layers = KeymapMatrix.from_layers(LAYERS) if compact else LAYERS
+    result, changes = RuleSet.from_json(RULES).apply(layers)
+    assert trimmed(result) == trimmed(EXPECTED)
+    assert len(changes) == 10
+    assert (0, 0, 0, 'KC_ESC', 'KC_GRV') in changes
+    assert (0, 1, 2, 'LT2(KC_SPACE)', 'LT2(KC_ENTER)') in changes
+    # The input is never modified
+    assert trimmed(layers) == trimmed(LAYERS)
+
+
+def test_unchanged_layers_and_rows_are_shared():
+    rules = RuleSet.from_json([{'from': 'KC_A', 'to': 'KC_B'}])
+    result, changes = rules.apply(LAYERS)
+    assert changes == [(1, 1, 1, 'KC_A', 'KC_B')]
+    assert result[0] is LAYERS[0]
+    assert result[1][0] is LAYERS[1][0]
+    assert result[1][1] is not LAYERS[1][1]
+
+    assert rules.apply(LAYERS, layer_indices=[0]) == (LAYERS, [])
+
+
+def test_first_matching_rule_wins_per_layer():
+    rules = RuleSet.from_json([
+        {'from': 'KC_A', 'to': 'KC_B', 'layers': [1]},
+        {'type': 'glob', 'match': 'KC_?', 'to': 'KC_C'},
+        {'from': 'KC_A', 'to': 'KC_D'},
+    ])
+    assert rules.lookup(0, 'KC_A') == 'KC_C'
+    assert rules.lookup(1, 'KC_A') == 'KC_B'
+    assert rules.lookup(0, 'KC_ESC') is None
+    # A rule mapping a keycode to itself is not a change
+    assert RuleSet.from_json([{'from': 'KC_A', 'to': 'KC_A'}]).lookup(0, 'KC_A') is None
+    assert RuleSet([]).lookup(0, 'KC_A') is None
+
+
+def test_exact_rules_match_every_spelling():
+    rules = RuleSet.from_json([{'from': 'LT(2, KC_SPC)', 'to': 'KC_ENT'}])
+    layers = [[['LT2(KC_SPC)', 'LT(2,KC_SPC)', 'KC_SPC']]]
+    result, changes = rules.apply(layers)
+    assert result == [[['KC_ENT', 'KC_ENT', 'KC_SPC']]]
+    assert len(changes) == 2
+
+
+@pytest.mark.parametrize('compact', BACKENDS)
+def test_position_rules_can_clear_keys(compact):
+    layers = KeymapMatrix.from_layers(LAYERS) if compact else LAYERS
+    rules = RuleSet.from_json([
+        {'type': 'position', 'layer': 1, 'row': 0, 'col': 2, 'to': -1},
+        {'type': 'position', 'layer': 1, 'row': 9, 'col': 9, 'to': 'KC_X'},
+    ])
+    result, changes = rules.apply(layers)
+    assert changes == [(1, 0, 2, 'KC_SPACE', -1)]
+    assert plain(result)[1][0] == ['KC_TRNS', 'KC_F1', -1]
+
+
+@pytest.mark.parametrize('compact', BACKENDS)
+def test_apply_keeps_the_index_up_to_date(compact):
+    layers = KeymapMatrix.from_layers(LAYERS) if compact else LAYERS
+    index = LayoutIndex.build(layers)
+    result, _ = RuleSet.from_json(RULES).apply(layers, index=index)
+    rebuilt = LayoutIndex.build(result)
+    assert {k: v for k, v in index.frequencies.items() if v} == dict(rebuilt.frequencies)
+    assert index.positions('KC_NO') == rebuilt.positions('KC_NO')
+
+
+def test_out_of_range_layers_are_skipped():
+    rules = RuleSet.from_json([{'from': 'KC_A', 'to': 'KC_B'}])
+    assert rules.apply(LAYERS, layer_indices=[5]) == (LAYERS, [])
+    matrix = KeymapMatrix.from_layers(LAYERS)
+    assert rules.apply(matrix, layer_indices=[5]) == (matrix, [])
@@ -0,0 +1,90 @@
+"""
+Tests for the SVG visualizer.
+"""
+
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from src.core import key_geometry
+from src.core.key_geometry import KEY_SIZE, label_font_size
+from src.core.svg_visualizer import UNIT, SvgVisualizer
+from src.utils.keycode_simplifier import ColorRule, ColorScheme
+
+SVG = '{http://www.w3.org/2000/svg}'
+
+LAYERS = [
+    [['KC_ESC', 'KC_Q', 'MO(1)'], ['KC_TAB', 'KC_<&>', -1]],
+    [['KC_TRNS', 'KC_1', 'KC_TRNS'], ['KC_TRNS', 'KC_A', 'KC_S']],
+    [['KC_F1']],
+]
+
+
+def parse(visualizer):
+    return ET.fromstring(visualizer.to_string())
+
+
+def panels(root):
+    return {g.get('id'): g for g in root.iter(f'{SVG}g')}
+
+
+def test_sheet_structure():
+    root = parse(SvgVisualizer(LAYERS, 2, 3))
+    assert float(root.get('width')) > 2 * 3 * UNIT
+    groups = panels(root)
+    assert list(groups) == ['layer-0', 'layer-1', 'layer-2']
+    titles = [g.find(f'{SVG}text').text for g in groups.values()]
+    assert titles == ['Layer 0', 'Layer 1', 'Layer 2']
+
+    rects = groups['layer-0'].findall(f'{SVG}rect')
+    assert len(rects) == 5
+    assert {(rect.get('width'), rect.get('height')) for rect in rects} == {(f"{KEY_SIZE * UNIT:g}",) * 2}
+    assert len(groups['layer-2'].findall(f'{SVG}rect')) == 1
+
+
+def test_labels_are_escaped_and_sized():
+    root = parse(SvgVisualizer(LAYERS, 2, 3))
+    labels = {text.text: text.get('class') for text in panels(root)['layer-0'].findall(f'{SVG}text')[1:]}
+    assert labels['<&>'] == f"s{label_font_size('<&>')}"
+    assert labels['ESC'] == 's8'
+
+
+def test_scheme_colors_are_escaped():
+    hostile = '#fff}</style><script>alert(1)</script><style>{'
+    scheme = ColorScheme([ColorRule('equals', ('Q',), hostile, '"red"', 'Q')], ('#e0e0e0', '#666666'))
+    svg = SvgVisualizer(LAYERS, 2, 3, color_scheme=scheme).to_string()
+    assert '<script>' not in svg
+    root = ET.fromstring(svg)
+    assert root.find(f'.//{SVG}script') is None
+    # The escaped color reaches the stylesheet unchanged
+    assert hostile in root.find(f'{SVG}style').text
+
+
+def test_unclassed_colors_are_quoted(monkeypatch):
+    # Colors without a CSS class are written as attributes
+    visualizer = SvgVisualizer(LAYERS[2:], 1, 1, color_scheme=ColorScheme([], ('" onload="x', '<b>')))
+    monkeypatch.setattr(visualizer, '_color_classes', lambda: {})
+    rect = panels(parse(visualizer))['layer-0'].find(f'{SVG}rect')
+    assert (rect.get('fill'), rect.get('stroke')) == ('" onload="x', '<b>')
+    assert rect.get('onload') is None
+
+
+def test_resolved_titles():
+    root = parse(SvgVisualizer(LAYERS, 2, 3, resolved=True))
+    assert panels(root)['layer-1'].find(f'{SVG}text').text == 'Layer 1 (resolved)'
+
+
+def test_geometry_is_shared_with_the_png_renderer():
+    visualizer = pytest.importorskip('src.core.visualizer')
+    for name in ('KEY_SIZE', 'KEY_MARGIN', 'KEY_LINEWIDTH', 'CELL_INCHES', 'SHEET_TITLE'):
+        assert getattr(visualizer, name) is getattr(key_geometry, name)
+    assert [label_font_size(label) for label in ('ESC', 'SPACE', 'LT2(SPACE)')] == [8, 6, 5]
+
+
+def test_create_visualization(tmp_path):
+    path = tmp_path / 'sheet.svg'
+    SvgVisualizer(LAYERS, 2, 3).create_visualization(str(path))
+    assert ET.parse(path).getroot().tag == f'{SVG}svg'
+
+    SvgVisualizer([], 0, 0).create_visualization(str(tmp_path / 'empty.svg'))
+    assert not (tmp_path / 'empty.svg').exists()
@@ -0,0 +1,206 @@
+"""
+Tests for the matplotlib layer visualizer.
+"""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core import visualizer as visualizer_module
+from src.core.render_cache import RenderCache
+from src.core.visualizer import FigurePool, LayerVisualizer, OutputSpec
+
+LAYERS = [
+    [['KC_ESC', 'KC_Q', 'KC_W'], ['MO(1)', 'KC_A', -1]],
+    [['KC_TRNS', 'KC_1', 'KC_2'], ['KC_TRNS', 'LSFT(KC_A)', 'KC_S']],
+    [['KC_F1', -1, 'KC_F3'], ['KC_TRNS', 'KC_TRNS', 'KC_TRNS']],
+]
+
+
+@pytest.fixture
+def count_renders(monkeypatch):
+    """Count layers drawn in this process (workers=1 renders in-process)."""
+    rendered = []
+    render_layer = LayerVisualizer.render_layer
+
+    def counting(self, layer_index, *args, **kwargs):
+        rendered.append(layer_index)
+        return render_layer(self, layer_index, *args, **kwargs)
+    monkeypatch.setattr(LayerVisualizer, 'render_layer', counting)
+    return rendered
+
+
+def test_parallel_sheet_and_layer_images_share_one_render(tmp_path, count_renders):
+    visualizer = LayerVisualizer(LAYERS, 2, 3)
+    sheet = tmp_path / 'sheet.png'
+    visualizer.create_visualization(str(sheet), show_progress=False, parallel=True, workers=1,
+                                    layer_images=str(tmp_path / 'layers'))
+
+    assert sorted(count_renders) == [0, 1, 2]
+    written = sorted(path.name for path in (tmp_path / 'layers').iterdir())
+    assert written == ['layer_0.png', 'layer_1.png', 'layer_2.png']
+    # The per-layer files hold the panels the sheet was composited from
+    panel = np.asarray(Image.open(tmp_path / 'layers' / 'layer_1.png'))
+    assert np.array_equal(panel, np.asarray(Image.fromarray(visualizer.render_layer(1)).convert('RGB')))
+    assert Image.open(sheet).size[0] > panel.shape[1]
+
+
+def test_sequential_sheet_renders_layer_images_separately(tmp_path, count_renders):
+    visualizer = LayerVisualizer(LAYERS, 2, 3)
+    visualizer.create_visualization(str(tmp_path / 'sheet.png'), show_progress=False, workers=1,
+                                    layer_images=str(tmp_path / 'layers'))
+    assert sorted(count_renders) == [0, 1, 2]
+    assert len(list((tmp_path / 'layers').iterdir())) == 3
+
+
+def test_cached_sheet_still_writes_layer_images(tmp_path, count_renders):
+    cache = RenderCache(str(tmp_path / 'cache'))
+    for run in range(2):
+        LayerVisualizer(LAYERS, 2, 3, cache=cache).create_visualization(
+            str(tmp_path / 'sheet.png'), show_progress=False, parallel=True, workers=1,
+            layer_images=str(tmp_path / f"layers{run}"))
+    # The second run copies the sheet and reads the panels back from the cache
+    assert sorted(count_renders) == [0, 1, 2]
+    assert len(list((tmp_path / 'layers1').iterdir())) == 3
+
+
+def changed(layers, layer, row, col, keycode):
+    """Copy of ``layers`` with one key replaced."""
+    layers = [[list(keys) for keys in rows] for rows in layers]
+    layers[layer][row][col] = keycode
+    return layers
+
+
+def test_only_changed_layers_are_redrawn(tmp_path, count_renders):
+    cache = RenderCache(str(tmp_path / 'cache'))
+    first = LayerVisualizer(LAYERS, 2, 3, cache=cache).render_sheet(workers=1, show_progress=False)
+    assert sorted(count_renders) == [0, 1, 2]
+
+    count_renders.clear()
+    edited = changed(LAYERS, 1, 0, 1, 'KC_9')
+    sheet = LayerVisualizer(edited, 2, 3, cache=cache).render_sheet(workers=1, show_progress=False)
+    assert count_renders == [1]
+    assert sheet.size == first.size
+    assert sheet.tobytes() != first.tobytes()
+    uncached = LayerVisualizer(edited, 2, 3).render_sheet(workers=1, show_progress=False)
+    assert sheet.tobytes() == uncached.tobytes()
+
+
+def test_resolved_layers_are_redrawn_when_a_lower_layer_changes(tmp_path, count_renders):
+    cache = RenderCache(str(tmp_path / 'cache'))
+    LayerVisualizer(LAYERS, 2, 3, resolved=True, cache=cache).render_sheet(workers=1, show_progress=False)
+
+    count_renders.clear()
+    # Layers 1 and 2 show the default layer's key through KC_TRNS at (1, 0)
+    edited = changed(LAYERS, 0, 1, 0, 'KC_B')
+    LayerVisualizer(edited, 2, 3, resolved=True, cache=cache).render_sheet(workers=1, show_progress=False)
+    assert sorted(count_renders) == [0, 1, 2]
+
+    count_renders.clear()
+    # No other layer is transparent at (0, 1): only layer 0 changes
+    edited = changed(edited, 0, 0, 1, 'KC_Z')
+    LayerVisualizer(edited, 2, 3, resolved=True, cache=cache).render_sheet(workers=1, show_progress=False)
+    assert count_renders == [0]
+
+
+@pytest.mark.parametrize('text, spec', [
+    ('thumb:0.25:webp', OutputSpec('thumb', 0.25, 'webp')),
+    ('print:2', OutputSpec('print', 2.0, 'png')),
+    ('', OutputSpec('', 1.0, 'png')),
+    ('small::JPEG', OutputSpec('small', 1.0, 'jpeg')),
+])
+def test_parse_output_spec(text, spec):
+    assert OutputSpec.parse(text) == spec
+
+
+@pytest.mark.parametrize('text', ['thumb:0', 'thumb:-1', 'thumb:1:gif', 'thumb:big'])
+def test_invalid_output_spec(text):
+    with pytest.raises(ValueError):
+        OutputSpec.parse(text)
+
+
+def test_outputs_are_scaled_from_one_render(tmp_path, count_renders):
+    outputs = [OutputSpec(''), OutputSpec('thumb', 0.25, 'webp'), OutputSpec('print', 2.0, 'jpeg')]
+    paths = LayerVisualizer(LAYERS, 2, 3).create_outputs(str(tmp_path / 'sheet.png'), outputs,
+                                                         workers=1, show_progress=False)
+    assert sorted(count_renders) == [0, 1, 2]
+    assert paths == {'': str(tmp_path / 'sheet.png'), 'thumb': str(tmp_path / 'sheet_thumb.webp'),
+                     'print': str(tmp_path / 'sheet_print.jpeg')}
+
+    images = {name: Image.open(path) for name, path in paths.items()}
+    assert [images[name].format for name in ('', 'thumb', 'print')] == ['PNG', 'WEBP', 'JPEG']
+    width, height = images['print'].size
+    assert images[''].size == (round(width / 2), round(height / 2))
+    assert images['thumb'].size == (round(width / 8), round(height / 8))
+
+
+def test_webp_falls_back_to_png(tmp_path, monkeypatch):
+    monkeypatch.setattr(visualizer_module.features, 'check', lambda feature: feature != 'webp')
+    paths = LayerVisualizer(LAYERS, 2, 3).create_outputs(str(tmp_path / 'sheet.png'),
+                                                         [OutputSpec('thumb', 0.25, 'webp')],
+                                                         workers=1, show_progress=False)
+    assert paths == {'thumb': str(tmp_path / 'sheet_thumb.png')}
+    assert Image.open(paths['thumb']).format == 'PNG'
+
+
+def test_cached_outputs_are_copied(tmp_path, count_renders):
+    cache = RenderCache(str(tmp_path / 'cache'))
+    outputs = [OutputSpec(''), OutputSpec('thumb', 0.25, 'png')]
+    first = LayerVisualizer(LAYERS, 2, 3, cache=cache).create_outputs(
+        str(tmp_path / 'first.png'), outputs, workers=1, show_progress=False)
+    count_renders.clear()
+    second = LayerVisualizer(LAYERS, 2, 3, cache=cache).create_outputs(
+        str(tmp_path / 'second.png'), outputs, workers=1, show_progress=False)
+    assert count_renders == []
+    for name in ('', 'thumb'):
+        with open(first[name], 'rb') as a, open(second[name], 'rb') as b:
+            assert a.read() == b.read()
+
+
+def test_figure_pool_reuses_cleared_panels():
+    pool = FigurePool()
+    with pool.panel(2, 3) as (fig, ax):
+        LayerVisualizer(LAYERS, 2, 3)._draw_layer(LAYERS[0], 0, ax)
+        assert ax.collections or ax.patches
+    with pool.panel(2, 3) as (reused, ax):
+        assert reused is fig
+        assert not (ax.collections or ax.patches or ax.texts)
+    assert pool.stats() == {'created': 1, 'reused': 1, 'dropped': 0, 'idle_total': 1, 'idle': {'2x3@150': 1}}
+
+
+def test_figure_pool_bounds_idle_panels_per_shape():
+    pool = FigurePool(max_per_shape=2)
+    with pool.panel(2, 3), pool.panel(2, 3), pool.panel(2, 3):
+        assert pool.stats()['idle_total'] == 0
+    assert pool.stats()['created'] == 3
+    assert pool.stats()['idle'] == {'2x3@150': 2}
+
+
+def test_figure_pool_drops_least_recently_used_shapes():
+    pool = FigurePool(max_idle=2)
+    for shape in ((1, 1), (2, 2), (1, 1), (3, 3)):
+        with pool.panel(*shape):
+            pass
+    stats = pool.stats()
+    assert (stats['created'], stats['reused'], stats['dropped']) == (3, 1, 1)
+    assert stats['idle'] == {'1x1@150': 1, '3x3@150': 1}
+
+    # A different resolution is a different shape
+    with pool.panel(1, 1, dpi=75):
+        pass
+    assert pool.stats()['idle'] == {'3x3@150': 1, '1x1@75': 1}
+
+
+def test_warm_figure_pool():
+    pool = FigurePool()
+    pool.warm([(2, 3), (4, 12)], dpi=75)
+    assert pool.stats()['idle'] == {'2x3@75': 1, '4x12@75': 1}
+
+
+def test_pooled_panels_render_like_fresh_ones(monkeypatch):
+    monkeypatch.setattr(visualizer_module, 'FIGURE_POOL', FigurePool())
+    visualizer = LayerVisualizer(LAYERS, 2, 3)
+    fresh = visualizer.render_layer(0)
+    visualizer.render_layer(1)
+    assert np.array_equal(visualizer.render_layer(0), fresh)
+    assert visualizer_module.FIGURE_POOL.stats()['reused'] == 2
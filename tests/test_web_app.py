@@ -0,0 +1,219 @@
+"""
+Tests for the Flask web application.
+"""
+
+import gzip
+import io
+import json
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+from src.core import visualizer as visualizer_module
+from src.core.viewer_assets import ASSET_FILES, VIEWER_JS
+from src.core.visualizer import LayerVisualizer
+from src.web import app as web_app
+
+LAYOUT = [
+    [['KC_ESC', 'KC_Q', 'KC_W'], ['MO(1)', 'KC_A', -1]],
+    [['KC_TRNS', 'KC_1', 'KC_2'], ['KC_TRNS', 'LSFT(KC_A)', 'KC_S']],
+]
+
+
+@pytest.fixture
+def make_client(tmp_path, monkeypatch):
+    """Build test clients writing uploads, outputs and caches under tmp_path."""
+    for name in ('UPLOAD_FOLDER', 'OUTPUT_FOLDER', 'CACHE_FOLDER'):
+        monkeypatch.setattr(web_app, name, tmp_path / name.split('_')[0].lower())
+    monkeypatch.setenv('WARM_SHAPES', '')
+
+    def make(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        app = web_app.create_app()
+        app.config['TESTING'] = True
+        return app.test_client()
+    return make
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client()
+
+
+def vil_file(layout=LAYOUT, name='board.vil'):
+    return io.BytesIO(json.dumps({'layout': layout}).encode('utf-8')), name
+
+
+def wait_ready(client, timeout=10):
+    """Poll /ready until the warm-up thread is done."""
+    deadline = time.monotonic() + timeout
+    response = client.get('/ready')
+    while response.status_code == 503 and time.monotonic() < deadline:
+        time.sleep(0.01)
+        response = client.get('/ready')
+    return response
+
+
+def upload(client, layout=LAYOUT, **form):
+    response = client.post('/upload', data={'file': vil_file(layout), **form},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200, response.data
+    assert b'Visualization Complete' in response.data
+    return response
+
+
+def test_repeated_uploads_reuse_rendered_layers(client, tmp_path, monkeypatch):
+    rendered = []
+    render_layer = LayerVisualizer.render_layer
+
+    def counting(self, layer_index, *args, **kwargs):
+        rendered.append(layer_index)
+        return render_layer(self, layer_index, *args, **kwargs)
+    monkeypatch.setattr(LayerVisualizer, 'render_layer', counting)
+
+    upload(client)
+    assert (tmp_path / 'output' / 'visualization_board.png').exists()
+    assert sorted(rendered) == [0, 1]
+
+    # Renaming a key of layer 1 only redraws that layer's panel
+    rendered.clear()
+    upload(client, rename_layer='1', rename_old='KC_1', rename_new='KC_9')
+    assert rendered == [1]
+    stats = client.get('/stats').json
+    assert stats['render_cache']['hits'] >= 1
+    assert stats['parse_cache']['hits'] == 1
+    assert 'keycodes' in stats
+
+
+def test_upload_writes_configured_outputs(make_client, tmp_path):
+    client = make_client(RENDER_OUTPUTS='thumb:0.25:png print:2')
+    response = upload(client)
+    output = tmp_path / 'output'
+    assert b'visualization_board_thumb.png' in response.data
+    sizes = {name: Image.open(output / f"visualization_board{name}.png").size
+             for name in ('', '_thumb', '_print')}
+    assert sizes['_thumb'][0] < sizes[''][0] < sizes['_print'][0]
+
+
+def test_ready_after_warm_up(make_client, monkeypatch):
+    warmed = []
+    release = threading.Event()
+
+    def warm_up(shapes, dpi):
+        release.wait(10)
+        warmed.append((shapes, dpi))
+    monkeypatch.setattr(visualizer_module, 'warm_up', warm_up)
+
+    client = make_client(WARM_SHAPES='5x12 4X12', RENDER_OUTPUTS='thumb:0.25:webp print:2')
+    response = client.get('/ready')
+    assert (response.status_code, response.json) == (503, {'ready': False})
+
+    release.set()
+    response = wait_ready(client)
+    assert response.status_code == 200
+    assert set(response.json['figure_pool']) >= {'created', 'reused', 'idle'}
+    # Panels are prepared at the resolution of the largest output
+    assert warmed == [([(5, 12), (4, 12)], visualizer_module.DPI * 2)]
+
+
+def test_ready_when_warm_up_fails(make_client):
+    response = wait_ready(make_client(WARM_SHAPES='keyboard'))
+    assert response.status_code == 200
+
+
+def test_shared_viewer_assets_are_cached(client, tmp_path):
+    upload(client)
+    page = client.get('/interactive/visualization_board.html')
+    assert f'/static/viewer/{ASSET_FILES["js"]}'.encode() in page.data
+    assert VIEWER_JS.encode('utf-8') not in page.data
+
+    asset = client.get(f'/static/viewer/{ASSET_FILES["js"]}')
+    assert asset.status_code == 200
+    assert asset.data == VIEWER_JS.encode('utf-8')
+    assert asset.cache_control.public and asset.cache_control.immutable
+    assert asset.cache_control.max_age == web_app.ASSET_MAX_AGE
+    assert not client.get('/static/style.css').cache_control.immutable
+
+
+def test_download_sends_the_self_contained_page(client, tmp_path):
+    upload(client)
+    assert (tmp_path / 'output' / web_app.offline_filename('visualization_board.html')).exists()
+    response = client.get('/download/visualization_board.html')
+    assert response.status_code == 200
+    assert 'filename=visualization_board.html' in response.headers['Content-Disposition']
+    assert VIEWER_JS.encode('utf-8') in response.data
+    assert ASSET_FILES['js'].encode() not in response.data
+
+
+def test_inline_viewer_assets(make_client, tmp_path):
+    client = make_client(VIEWER_ASSETS='inline')
+    upload(client)
+    assert not (tmp_path / 'output' / web_app.offline_filename('visualization_board.html')).exists()
+    page = client.get('/interactive/visualization_board.html')
+    assert VIEWER_JS.encode('utf-8') in page.data
+    assert client.get('/download/visualization_board.html').data == page.data
+
+
+def test_stream_interactive_page(client, tmp_path):
+    response = client.post('/interactive', data={'file': vil_file(), 'resolved': 'on',
+                                                 'rename_layer': '0', 'rename_old': 'KC_Q',
+                                                 'rename_new': 'KC_Z'},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'text/html'
+    html = response.get_data(as_text=True)
+    assert html.startswith('<!DOCTYPE html>') and html.endswith('</html>')
+    assert '"KC_Z"' in html and '"KC_Q"' not in html
+    assert 'KC_TRNS → MO(1)' in html
+    # Nothing is written to disk
+    assert list((tmp_path / 'upload').iterdir()) == []
+    assert list((tmp_path / 'output').iterdir()) == []
+
+
+@pytest.mark.parametrize('data', [
+    {},
+    {'file': (io.BytesIO(b'{}'), 'board.txt')},
+    {'file': (io.BytesIO(b'{"layout": [[['), 'board.vil')},
+])
+def test_stream_interactive_rejects_bad_uploads(client, data):
+    response = client.post('/interactive', data=data, content_type='multipart/form-data')
+    assert response.status_code == 400
+
+
+def test_precompressed_pages_follow_accept_encoding(client):
+    upload(client)
+    identity = client.get('/view/visualization_board.html')
+    assert 'Content-Encoding' not in identity.headers
+    assert 'Accept-Encoding' in identity.vary
+
+    for url in ('/view/visualization_board.html', '/interactive/visualization_board.html'):
+        response = client.get(url, headers={'Accept-Encoding': 'gzip, deflate'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.mimetype == 'text/html'
+        assert 'Accept-Encoding' in response.vary
+        assert gzip.decompress(response.data) == identity.data
+
+    refused = client.get('/view/visualization_board.html', headers={'Accept-Encoding': 'gzip;q=0'})
+    assert 'Content-Encoding' not in refused.headers
+
+    download = client.get('/download/visualization_board.html', headers={'Accept-Encoding': 'gzip'})
+    assert download.headers['Content-Encoding'] == 'gzip'
+    assert 'filename=visualization_board.html' in download.headers['Content-Disposition']
+    assert VIEWER_JS.encode('utf-8') in gzip.decompress(download.data)
+
+
+def test_images_are_sent_as_is(client):
+    upload(client, image_format='svg')
+    svg = client.get('/view/visualization_board.svg', headers={'Accept-Encoding': 'gzip'})
+    assert (svg.mimetype, svg.headers['Content-Encoding']) == ('image/svg+xml', 'gzip')
+
+    upload(client)
+    png = client.get('/view/visualization_board.png', headers={'Accept-Encoding': 'gzip'})
+    assert png.mimetype == 'image/png'
+    assert 'Content-Encoding' not in png.headers
+    assert 'Accept-Encoding' not in png.vary
+    assert png.data.startswith(b'\x89PNG')